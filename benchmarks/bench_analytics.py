@@ -0,0 +1,90 @@
+"""
+Compare the results engines on a large synthetic survey.
+
+Usage:
+    python -m benchmarks.bench_analytics --responses 1000000
+"""
+
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime
+
+from src import analytics
+from src.models import MultipleChoiceQuestion, ScaleQuestion, Survey
+
+OPTIONS = ["Very poor", "Poor", "Fair", "Good", "Excellent"]
+
+
+def build_survey(count: int, seed: int = 42) -> Survey:
+    rng = random.Random(seed)
+    survey = Survey("Benchmark")
+    choice = MultipleChoiceQuestion("Overall", OPTIONS)
+    scale = ScaleQuestion("Rating", 1, 10)
+    survey.add_question(choice)
+    survey.add_question(scale)
+    survey.publish()
+    timestamp = datetime.utcnow().isoformat()
+    survey.restore_responses(
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "timestamp": timestamp,
+            "answers": {
+                choice.id: rng.choice(OPTIONS),
+                scale.id: rng.randint(1, 10),
+            },
+        }
+        for _ in range(count)
+    )
+    return survey
+
+
+def row_loop_results(survey: Survey) -> None:
+    # The pre-columnar algorithm: one Python pass over response dicts per question.
+    choice, scale = survey.questions
+    answers = [r["answers"][choice.id] for r in survey.responses]
+    {opt: answers.count(opt) for opt in choice.options}
+    values = [r["answers"][scale.id] for r in survey.responses]
+    sum(values) / len(values), min(values), max(values)
+
+
+def engine_results(survey: Survey, engine: str, extended: bool) -> None:
+    choice, scale = survey.questions
+    analytics.choice_counts(survey.responses.column(choice.id), engine)
+    values = analytics.scale_values(
+        *survey.responses.split_column(scale.id), engine=engine
+    )
+    analytics.scale_summary(values)
+    if extended:
+        analytics.scale_statistics(values, scale.min_value, scale.max_value, engine)
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    survey = build_survey(args.responses)
+    print(f"responses: {args.responses}")
+    print(
+        f"row loop (dict view):      {timed(row_loop_results, survey, repeat=1):.4f}s"
+    )
+    engines = ["python"] + (["numpy"] if analytics.np is not None else [])
+    for engine in engines:
+        for extended in (False, True):
+            label = f"{engine} engine{' + extended' if extended else ''}:"
+            print(f"{label:27}{timed(engine_results, survey, engine, extended):.4f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure startup time and memory of a store holding many surveys.
+
+Usage:
+    python -m benchmarks.bench_models --surveys 100000
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generators import make_questions
+from src.models import Survey
+from src.storage import SurveyStorage, convert_snapshot
+
+
+def write_store(path: str, count: int, questions: int) -> None:
+    storage = SurveyStorage(storage_path=path)
+    with storage._surveys_lock:
+        for i in range(count):
+            survey = Survey(f"Survey {i}", "Synthetic")
+            for question in make_questions(questions):
+                survey.add_question(question)
+            survey.publish()
+            storage.surveys[survey.id] = survey
+            storage._index.add(survey.id, survey.created_at, survey.status)
+    storage.save_to_file()
+    storage.close()
+
+
+def load_store(path: str, lazy: bool = False) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    storage = SurveyStorage(storage_path=path, lazy=lazy)
+    seconds = time.perf_counter() - start
+    storage.close()
+    return seconds
+
+
+def store_memory(path: str) -> int:
+    gc.collect()
+    tracemalloc.start()
+    storage = SurveyStorage(storage_path=path)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    storage.close()
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--surveys", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "surveys.json")
+        write_store(path, args.surveys, args.questions)
+        print(f"surveys: {args.surveys} x {args.questions} questions")
+        print(f"snapshot size:              {os.path.getsize(path) / 1e6:.1f}MB")
+        print(f"startup (checksum trusted): {load_store(path):.3f}s")
+        memory = store_memory(path)
+        print(
+            f"memory held by the store:   {memory / 1e6:.1f}MB "
+            f"({memory / args.surveys:.0f} bytes/survey)"
+        )
+        binary_path = os.path.join(directory, "surveys.bin")
+        convert_snapshot(path, binary_path, "binary")
+        print(f"binary snapshot size:       {os.path.getsize(binary_path) / 1e6:.1f}MB")
+        print(f"startup (binary):           {load_store(binary_path):.3f}s")
+        print(f"startup (binary, lazy):     {load_store(binary_path, True):.3f}s")
+        os.remove(path + ".sha256")
+        print(f"startup (fully validated):  {load_store(path):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure per-submission validation cost on surveys with many questions.
+
+Usage:
+    python -m benchmarks.bench_validation --questions 10 100 500
+"""
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from src.models import (
+    MultipleChoiceQuestion,
+    ScaleQuestion,
+    Survey,
+    TextQuestion,
+)
+
+OPTIONS = [f"Option {i}" for i in range(20)]
+
+
+def build_survey(question_count: int) -> Survey:
+    survey = Survey("Benchmark")
+    for i in range(question_count):
+        kind = i % 3
+        if kind == 0:
+            survey.add_question(TextQuestion(f"Text {i}"))
+        elif kind == 1:
+            survey.add_question(MultipleChoiceQuestion(f"Choice {i}", OPTIONS))
+        else:
+            survey.add_question(ScaleQuestion(f"Scale {i}", 1, 10))
+    survey.publish()
+    return survey
+
+
+def build_answers(survey: Survey, count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(count):
+        answers = {}
+        for question in survey.questions:
+            if isinstance(question, MultipleChoiceQuestion):
+                answers[question.id] = rng.choice(OPTIONS)
+            elif isinstance(question, ScaleQuestion):
+                answers[question.id] = rng.randint(1, 10)
+            else:
+                answers[question.id] = "An answer"
+        batch.append(answers)
+    return batch
+
+
+def per_question_loop(survey: Survey, batch: List[Dict[str, Any]]) -> None:
+    # The pre-plan algorithm: a validate_answer call per question per submission.
+    for answers in batch:
+        for question in survey.questions:
+            if question.id not in answers:
+                raise ValueError(f"Missing answer for question {question.id}")
+            if not question.validate_answer(answers[question.id]):
+                raise ValueError(f"Invalid answer for question {question.id}")
+
+
+def compiled_plan(survey: Survey, batch: List[Dict[str, Any]]) -> None:
+    check = survey.validation_plan().error
+    for answers in batch:
+        error = check(answers)
+        if error is not None:
+            raise ValueError(error)
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--submissions", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"submissions: {args.submissions}")
+    for question_count in args.questions:
+        survey = build_survey(question_count)
+        batch = build_answers(survey, args.submissions)
+        for label, func in (
+            ("per-question", per_question_loop),
+            ("plan", compiled_plan),
+        ):
+            micros = timed(func, survey, batch) / args.submissions * 1e6
+            print(f"{question_count:5} questions, {label + ':':14}{micros:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
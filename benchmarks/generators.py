@@ -0,0 +1,75 @@
+"""
+Deterministic synthetic surveys and responses for the benchmarks.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from src.models import (
+    MultipleChoiceQuestion,
+    Question,
+    ScaleQuestion,
+    Survey,
+    TextQuestion,
+)
+
+OPTIONS = ["Very poor", "Poor", "Fair", "Good", "Excellent"]
+WORDS = ["fast", "slow", "clear", "confusing", "great", "fine", "needs work"]
+
+
+def make_questions(count: int) -> List[Question]:
+    """Return `count` questions cycling through choice, scale and text."""
+    questions: List[Question] = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            questions.append(MultipleChoiceQuestion(f"Choice {i}", OPTIONS))
+        elif kind == 1:
+            questions.append(ScaleQuestion(f"Scale {i}", 1, 10))
+        else:
+            questions.append(TextQuestion(f"Text {i}"))
+    return questions
+
+
+def make_survey(question_count: int = 6, title: str = "Benchmark") -> Survey:
+    """Return a published survey with `question_count` mixed questions."""
+    survey = Survey(title)
+    for question in make_questions(question_count):
+        survey.add_question(question)
+    survey.publish()
+    return survey
+
+
+def make_answers(survey: Survey, rng: random.Random) -> Dict[str, Any]:
+    """Return one valid answer dict for `survey`."""
+    answers: Dict[str, Any] = {}
+    for question in survey.questions:
+        if isinstance(question, MultipleChoiceQuestion):
+            answers[question.id] = rng.choice(question.options)
+        elif isinstance(question, ScaleQuestion):
+            answers[question.id] = rng.randint(question.min_value, question.max_value)
+        else:
+            answers[question.id] = " ".join(rng.sample(WORDS, 2))
+    return answers
+
+
+def make_responses(
+    survey: Survey, count: int, seed: int = 42
+) -> Iterator[Dict[str, Any]]:
+    """Yield `count` stored-format responses, one second apart."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "answers": make_answers(survey, rng),
+        }
+
+
+def fill_survey(survey: Survey, count: int, seed: int = 42) -> Survey:
+    """Replace the survey's responses with `count` synthetic ones."""
+    survey.restore_responses(make_responses(survey, count, seed))
+    return survey
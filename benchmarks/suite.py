@@ -0,0 +1,294 @@
+"""
+Benchmark suite covering storage, submissions, results, export and HTTP.
+
+Every run writes its measurements to a JSON file. Pass an earlier file to
+--compare to print the change for each measurement.
+
+Usage:
+    python -m benchmarks.suite --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.suite --compare baseline.json --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.generators import fill_survey, make_answers, make_survey
+from src import analytics, serialization
+from src.export import iter_csv
+from src.storage import SurveyStorage
+
+Result = Dict[str, Any]
+
+QUESTION_TYPES = [
+    ("multiple_choice", {"options": ["Very poor", "Poor", "Fair", "Good"]}),
+    ("scale", {"min_value": 1, "max_value": 10}),
+    ("text", {}),
+]
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_storage(size: int, questions: int, repeat: int) -> List[Result]:
+    """Time SurveyStorage.save_to_file and a fresh load of the same snapshot."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "surveys.json")
+        storage = SurveyStorage(storage_path=path)
+        survey = storage.create_survey("Benchmark")
+        for i in range(questions):
+            question_type, kwargs = QUESTION_TYPES[i % len(QUESTION_TYPES)]
+            storage.add_question_to_survey(survey.id, question_type, f"Q{i}", **kwargs)
+        storage.publish_survey(survey.id)
+        fill_survey(survey, size)
+        save = best_of(storage.save_to_file, repeat)
+        file_bytes = os.path.getsize(path)
+
+        def load() -> None:
+            SurveyStorage(storage_path=path).close()
+
+        load_seconds = best_of(load, repeat)
+        storage.close()
+    params = {"responses": size, "questions": questions}
+    return [
+        {"benchmark": "storage_save", **params, "seconds": save, "bytes": file_bytes},
+        {"benchmark": "storage_load", **params, "seconds": load_seconds},
+    ]
+
+
+def bench_add_response(count: int, questions: int, repeat: int) -> List[Result]:
+    """Throughput of validated single submissions into an in-memory survey."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        survey = make_survey(questions)
+        rng = random.Random(7)
+        batch = [make_answers(survey, rng) for _ in range(count)]
+        start = time.perf_counter()
+        for answers in batch:
+            survey.add_response(answers)
+        seconds = min(seconds, time.perf_counter() - start)
+    return [
+        {
+            "benchmark": "add_response",
+            "responses": count,
+            "questions": questions,
+            "seconds": seconds,
+            "ops_per_second": count / seconds,
+        }
+    ]
+
+
+def bench_results(size: int, questions: int, repeat: int) -> List[Result]:
+    """Cold get_results latency, plain and extended, at one response count."""
+    survey = fill_survey(make_survey(questions), size)
+    results = []
+    for extended in (False, True):
+
+        def cold_results() -> None:
+            # Reinstalling the store drops the cached aggregates.
+            survey.restore_responses(survey.responses)
+            survey.get_results(extended=extended)
+
+        results.append(
+            {
+                "benchmark": "get_results_extended" if extended else "get_results",
+                "responses": size,
+                "questions": questions,
+                "seconds": best_of(cold_results, repeat),
+            }
+        )
+    return results
+
+
+def bench_export(size: int, questions: int, repeat: int) -> List[Result]:
+    """Time and peak traced memory of streaming the survey as CSV."""
+    survey = fill_survey(make_survey(questions), size)
+    written = 0
+
+    def export() -> None:
+        nonlocal written
+        written = sum(len(chunk) for chunk in iter_csv(survey))
+
+    seconds = best_of(export, repeat)
+    tracemalloc.start()
+    export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return [
+        {
+            "benchmark": "csv_export",
+            "responses": size,
+            "questions": questions,
+            "seconds": seconds,
+            "bytes": written,
+            "peak_memory_bytes": peak,
+        }
+    ]
+
+
+def bench_http_submit(count: int, questions: int) -> List[Result]:
+    """Per-request latency of POST /responses through the Flask test client."""
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep the app's import-time storage out of the working directory.
+        settings = {
+            "SURVEY_STORAGE_BACKEND": "sqlite",
+            "SURVEY_SQLITE_PATH": os.path.join(directory, "import.db"),
+        }
+        saved = {name: os.environ.get(name) for name in settings}
+        os.environ.update(settings)
+        try:
+            import src.app
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+        previous = src.app.storage
+        storage = SurveyStorage(
+            storage_path=os.path.join(directory, "surveys.json"), journal=True
+        )
+        src.app.storage = storage
+        try:
+            client = src.app.app.test_client()
+            survey_id = client.post("/surveys", json={"title": "Bench"}).get_json()[
+                "id"
+            ]
+            for i in range(questions):
+                question_type, kwargs = QUESTION_TYPES[i % len(QUESTION_TYPES)]
+                client.post(
+                    f"/surveys/{survey_id}/questions",
+                    json={"type": question_type, "text": f"Q{i}", **kwargs},
+                )
+            client.post(f"/surveys/{survey_id}/publish")
+            survey = storage.get_survey(survey_id)
+            rng = random.Random(11)
+            latencies = []
+            for _ in range(count):
+                answers = make_answers(survey, rng)
+                body = {
+                    "responses": [
+                        {"question_id": qid, "answer": answer}
+                        for qid, answer in answers.items()
+                    ]
+                }
+                start = time.perf_counter()
+                response = client.post(f"/surveys/{survey_id}/responses", json=body)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 201:
+                    raise RuntimeError(f"Submission failed: {response.get_json()}")
+        finally:
+            src.app.storage = previous
+            storage.close()
+    latencies.sort()
+    return [
+        {
+            "benchmark": "http_submit",
+            "responses": count,
+            "questions": questions,
+            "seconds": sum(latencies),
+            "p50_seconds": latencies[len(latencies) // 2],
+            "p95_seconds": latencies[int(len(latencies) * 0.95)],
+            "p99_seconds": latencies[int(len(latencies) * 0.99)],
+            "mean_seconds": statistics.fmean(latencies),
+        }
+    ]
+
+
+def run_suite(
+    sizes: List[int], questions: int, submissions: int, repeat: int
+) -> Dict[str, Any]:
+    """Run every benchmark and return the results with run metadata."""
+    results: List[Result] = []
+    for size in sizes:
+        results += bench_storage(size, questions, repeat)
+        results += bench_results(size, questions, repeat)
+        results += bench_export(size, questions, repeat)
+    results += bench_add_response(submissions, questions, repeat)
+    results += bench_http_submit(submissions, questions)
+    return {"metadata": run_metadata(), "results": results}
+
+
+def run_metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "started_at": datetime.utcnow().isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "json_engine": serialization.serializer.name,
+        "analytics_engine": analytics.DEFAULT_ENGINE,
+    }
+
+
+def result_key(result: Result) -> Tuple[str, int, int]:
+    return result["benchmark"], result["responses"], result["questions"]
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> List[Tuple[Tuple[str, int, int], float, float, Optional[float]]]:
+    """Pair up measurements by benchmark and size; ratio is current/baseline."""
+    before = {result_key(r): r["seconds"] for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = result_key(result)
+        if key in before:
+            ratio = result["seconds"] / before[key] if before[key] else None
+            rows.append((key, before[key], result["seconds"], ratio))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--questions", type=int, default=6)
+    parser.add_argument("--submissions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier output file to compare against")
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, args.questions, args.submissions, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        label = f"{result['benchmark']} ({result['responses']} responses)"
+        print(f"{label:45}{result['seconds']:10.4f}s")
+    print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.compare}:")
+        for (name, size, _), old, new, ratio in compare(baseline, report):
+            change = f"{ratio:6.2f}x" if ratio is not None else "     -"
+            print(f"{name + f' ({size})':45}{old:10.4f}s{new:10.4f}s  {change}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import math
+import statistics
+from bisect import bisect_right
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.columnar import ChoiceColumn, ScaleColumn
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+DEFAULT_ENGINE = "numpy" if np is not None else "python"
+PERCENTILES = (10, 25, 50, 75, 90)
+MAX_HISTOGRAM_VALUES = 100
+HISTOGRAM_BINS = 10
+
+
+def _resolve_engine(engine: Optional[str]) -> str:
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ("numpy", "python"):
+        raise ValueError(f"Unknown analytics engine: {engine}")
+    if engine == "numpy" and np is None:
+        raise ValueError("The numpy analytics engine requires numpy to be installed")
+    return engine
+
+
+def mask_positions(mask: int, length: int, engine: Optional[str] = None):
+    """
+    Return the set bits of a row bitmask as sorted row positions.
+
+    Args:
+        mask: Bitmask with bit N set for every matching row N
+        length: Number of rows the mask covers
+        engine: "numpy" or "python"; defaults to numpy when it is installed
+
+    Returns:
+        A numpy index array or a list of ints, depending on the engine
+    """
+    raw = mask.to_bytes((length + 63) // 64 * 8, "little")
+    if _resolve_engine(engine) == "numpy":
+        bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little")
+        return np.flatnonzero(bits)
+    positions = []
+    for word_index, word in enumerate(array("Q", raw)):
+        base = word_index * 64
+        while word:
+            low = word & -word
+            positions.append(base + low.bit_length() - 1)
+            word ^= low
+    return positions
+
+
+def choice_counts(
+    column: ChoiceColumn,
+    engine: Optional[str] = None,
+    rows: Optional[Sequence[int]] = None,
+) -> List[int]:
+    """Count answers per option; placeholder rows use a code past the last option."""
+    engine = _resolve_engine(engine)
+    size = len(column.options)
+    if engine == "numpy":
+        codes = np.frombuffer(column.codes, dtype=column.codes.typecode)
+        if rows is not None:
+            codes = codes[np.asarray(rows, dtype=np.int64)]
+        return np.bincount(codes, minlength=size + 1)[:size].tolist()
+    if rows is None:
+        return [column.codes.count(code) for code in range(size)]
+    counts = [0] * (size + 1)
+    codes = column.codes
+    for row in rows:
+        counts[codes[row]] += 1
+    return counts[:size]
+
+
+def scale_values(
+    column: Optional[ScaleColumn],
+    skipped: List[int],
+    irregular: List[Any],
+    engine: Optional[str] = None,
+    rows: Optional[Sequence[int]] = None,
+):
+    """Return the numeric answers of a scale question as an array or list.
+
+    The first three arguments are the parts returned by ResponseStore.split_column;
+    `rows` restricts the answers to those rows.
+    """
+    extra = [v for v in irregular if isinstance(v, (int, float))]
+    if _resolve_engine(engine) == "numpy":
+        if column is None:
+            values = np.zeros(0, dtype=np.int64)
+        else:
+            values = np.frombuffer(column.values, dtype=column.values.typecode)
+            if rows is not None:
+                wanted = np.asarray(rows, dtype=np.int64)
+                if skipped:
+                    wanted = np.setdiff1d(wanted, skipped, assume_unique=True)
+                values = values[wanted]
+            elif skipped:
+                values = np.delete(values, skipped)
+        if extra:
+            values = np.concatenate([values.astype(np.float64), np.array(extra)])
+        return values
+    if column is None:
+        return extra
+    skip = set(skipped)
+    if rows is not None:
+        values = [column.values[i] for i in rows if i not in skip]
+    elif skip:
+        values = [v for i, v in enumerate(column.values) if i not in skip]
+    else:
+        values = list(column.values)
+    return values + extra
+
+
+def scale_summary(values) -> Tuple[int, Any, Any, Any]:
+    """Return count, sum, min and max of scale answers from either engine."""
+    if len(values) == 0:
+        return 0, 0, None, None
+    if np is not None and isinstance(values, np.ndarray):
+        total = values.sum(dtype=np.int64 if values.dtype.kind == "i" else None)
+        return len(values), total.item(), values.min().item(), values.max().item()
+    return len(values), sum(values), min(values), max(values)
+
+
+def scale_statistics(
+    values, min_value: int, max_value: int, engine: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Compute median, standard deviation, percentiles and a histogram.
+
+    Args:
+        values: Scale answers, as returned by scale_values
+        min_value: Lower bound of the scale
+        max_value: Upper bound of the scale
+        engine: "numpy" or "python"; defaults to numpy when it is installed
+
+    Returns:
+        Dict[str, Any]: The extended statistics for one scale question
+    """
+    engine = _resolve_engine(engine)
+    if len(values) == 0:
+        return {
+            "median": 0,
+            "std": 0,
+            "percentiles": {str(p): 0 for p in PERCENTILES},
+            "histogram": {},
+        }
+    if engine == "numpy":
+        values = np.asarray(values)
+        median = float(np.median(values))
+        std = float(values.std())
+        percentiles = np.percentile(values, PERCENTILES).tolist()
+    else:
+        ordered = sorted(values)
+        median = statistics.median(ordered)
+        std = statistics.pstdev(ordered)
+        percentiles = [_percentile(ordered, p) for p in PERCENTILES]
+    return {
+        "median": round(median, 2),
+        "std": round(std, 2),
+        "percentiles": {str(p): round(v, 2) for p, v in zip(PERCENTILES, percentiles)},
+        "histogram": _histogram(values, min_value, max_value, engine),
+    }
+
+
+def _percentile(ordered: List[Any], percent: float) -> float:
+    # Linear interpolation between closest ranks, matching numpy's default.
+    position = (len(ordered) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _histogram(values, min_value: int, max_value: int, engine: str) -> Dict[str, int]:
+    if max_value - min_value < MAX_HISTOGRAM_VALUES:
+        if engine == "numpy":
+            inside = values[(values >= min_value) & (values <= max_value)]
+            counts = np.bincount(
+                inside.astype(np.int64) - min_value,
+                minlength=max_value - min_value + 1,
+            ).tolist()
+        else:
+            counts = [0] * (max_value - min_value + 1)
+            for value in values:
+                if min_value <= value <= max_value:
+                    counts[int(value) - min_value] += 1
+        return {str(min_value + i): count for i, count in enumerate(counts)}
+    width = (max_value - min_value + 1) / HISTOGRAM_BINS
+    edges = [min_value + round(width * i) for i in range(HISTOGRAM_BINS + 1)]
+    if engine == "numpy":
+        counts = np.histogram(values, bins=edges)[0].tolist()
+    else:
+        counts = [0] * HISTOGRAM_BINS
+        for value in values:
+            if min_value <= value <= max_value:
+                counts[min(bisect_right(edges, value), HISTOGRAM_BINS) - 1] += 1
+    return {f"{edges[i]}-{edges[i + 1] - 1}": count for i, count in enumerate(counts)}
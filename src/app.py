@@ -1,14 +1,158 @@
-from flask import Flask, request, jsonify, send_file
-import csv
-import io
+from flask import Flask, Response, g, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from datetime import datetime
 import os
-from typing import Dict, Any
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from src import metrics, profiling, serialization
+from src.cache import SerializedCache
+from src.export import gzip_chunks, iter_csv
+from src.storage import decode_cursor, encode_cursor, get_storage
+from src.models import SURVEY_FIELDS, Survey, SurveyStatus
+
+
+class SerializerJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding through src.serialization.
+
+    Output keeps Flask's key sorting and fallbacks for dates, UUIDs and
+    dataclasses, and may contain pre-encoded Fragment values.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.encode(obj).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return serialization.loads(s)
+
+    def encode(self, obj: Any) -> bytes:
+        return serialization.serializer.dumps(
+            obj, sort_keys=self.sort_keys, default=self.default
+        )
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype=self.mimetype)
+
+
+def _is_reloader_parent() -> bool:
+    """
+    True in the process `python -m src.app` starts in debug mode.
+
+    That process only watches the source files and runs the server in a child
+    process, so it must not open the storage and take its lock.
+    """
+    return (
+        __name__ == "__main__"
+        and os.getenv("FLASK_DEBUG", "False").lower() == "true"
+        and os.getenv("WERKZEUG_RUN_MAIN") != "true"
+    )
 
-from src.storage import get_storage
-from src.models import SurveyStatus
 
 app = Flask(__name__)
-storage = get_storage()
+app.json = SerializerJSONProvider(app)
+storage = None if _is_reloader_parent() else get_storage()
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Unmatched paths share one label so bad URLs cannot grow the metric series or
+# the profiling routes.
+UNMATCHED_ROUTE = "<unmatched>"
+
+response_cache = SerializedCache()
+
+request_seconds = metrics.registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to returning its response headers.",
+    ["method", "route"],
+)
+requests_total = metrics.registry.counter(
+    "http_requests_total", "Requests handled.", ["method", "route", "status"]
+)
+request_errors_total = metrics.registry.counter(
+    "http_request_errors_total",
+    "Requests that ended in a 5xx response.",
+    ["method", "route"],
+)
+surveys_gauge = metrics.registry.gauge("surveys", "Surveys in storage.")
+responses_gauge = metrics.registry.gauge(
+    "survey_responses", "Responses across all surveys in storage."
+)
+storage_bytes_gauge = metrics.registry.gauge(
+    "storage_size_bytes", "Bytes the storage backend occupies on disk."
+)
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+    requested = request.headers.get("X-Profile") or request.args.get("profile")
+    route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+    session = profiling.profiler.session_for_request(
+        f"{request.method} {route}", requested
+    )
+    if session is not None:
+        g.profile_session = session
+    g.profile_token = profiling.start(session)
+
+
+@app.after_request
+def _record_request(response: Response) -> Response:
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        request_seconds.observe(
+            time.perf_counter() - started, method=request.method, route=route
+        )
+        requests_total.inc(
+            method=request.method, route=route, status=response.status_code
+        )
+        if response.status_code >= 500:
+            request_errors_total.inc(method=request.method, route=route)
+    session = g.pop("profile_session", None)
+    if session is not None:
+        # Written once the response is closed, after any streamed body.
+        response.headers["X-Profile-File"] = os.path.basename(session.path)
+        response.call_on_close(session.finish)
+    return response
+
+
+@app.teardown_request
+def _finish_profile(exc: Optional[BaseException]) -> None:
+    token = g.pop("profile_token", None)
+    if token is not None:
+        profiling.stop(token)
+
+
+def _cached_json(survey: Survey, view: Any, build: Callable[[], Any]) -> Response:
+    """
+    Serve a read-only view of a survey with a strong ETag.
+
+    A matching If-None-Match gets 304 Not Modified; otherwise the JSON body is
+    served from the cache while the survey is unchanged.
+    """
+    with survey.lock:
+        etag = survey.etag
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            body = response_cache.get_or_build(
+                (survey.id, etag, view), lambda: app.json.encode(build())
+            )
+            response = app.response_class(body, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    return response
+
+
+def _survey_json(survey: Survey, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Survey.to_dict with the questions taken from their pre-encoded fragment."""
+    if fields is None:
+        fields = SURVEY_FIELDS
+    data = survey.to_dict([f for f in fields if f != "questions"])
+    if "questions" in fields:
+        data["questions"] = survey.questions_fragment()
+    return data
 
 
 @app.route("/health", methods=["GET"])
@@ -16,6 +160,15 @@ def health_check():
     return jsonify({"status": "healthy"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    stats = storage.stats()
+    surveys_gauge.set(stats["surveys"])
+    responses_gauge.set(stats["responses"])
+    storage_bytes_gauge.set(stats["bytes"])
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route("/surveys", methods=["POST"])
 def create_survey():
     data = request.get_json()
@@ -25,16 +178,57 @@ def create_survey():
         survey = storage.create_survey(
             title=data["title"], description=data.get("description", "")
         )
-        return jsonify(survey.to_dict()), 201
+        return jsonify(_survey_json(survey)), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _parse_limit() -> int:
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("Limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
 @app.route("/surveys", methods=["GET"])
 def list_surveys():
-    surveys = storage.list_surveys()
+    try:
+        limit = _parse_limit()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    fields = None
+    if "fields" in request.args:
+        fields = [f for f in request.args["fields"].split(",") if f]
+        unknown = [f for f in fields if f not in SURVEY_FIELDS]
+        if unknown:
+            return jsonify({"error": f"Unknown fields: {', '.join(unknown)}"}), 400
+    try:
+        status = (
+            SurveyStatus(request.args["status"]) if "status" in request.args else None
+        )
+        if fields is not None and "questions" not in fields:
+            # Projections without questions may not need the surveys loaded.
+            summaries, next_cursor = storage.list_survey_summaries_page(
+                fields, status=status, cursor=request.args.get("cursor"), limit=limit
+            )
+        else:
+            surveys, next_cursor = storage.list_surveys_page(
+                status=status, cursor=request.args.get("cursor"), limit=limit
+            )
+            summaries = [_survey_json(s, fields) for s in surveys]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return (
-        jsonify({"surveys": [s.to_dict() for s in surveys], "count": len(surveys)}),
+        jsonify(
+            {
+                "surveys": summaries,
+                "count": len(summaries),
+                "next_cursor": next_cursor,
+            }
+        ),
         200,
     )
 
@@ -44,7 +238,7 @@ def get_survey(survey_id: str):
     survey = storage.get_survey(survey_id)
     if not survey:
         return jsonify({"error": "Survey not found"}), 404
-    return jsonify(survey.to_dict()), 200
+    return _cached_json(survey, "survey", lambda: _survey_json(survey))
 
 
 @app.route("/surveys/<survey_id>", methods=["DELETE"])
@@ -86,14 +280,13 @@ def get_questions(survey_id: str):
     survey = storage.get_survey(survey_id)
     if not survey:
         return jsonify({"error": "Survey not found"}), 404
-    return (
-        jsonify(
-            {
-                "questions": [q.to_dict() for q in survey.questions],
-                "count": len(survey.questions),
-            }
-        ),
-        200,
+    return _cached_json(
+        survey,
+        "questions",
+        lambda: {
+            "questions": survey.questions_fragment(),
+            "count": len(survey.questions),
+        },
     )
 
 
@@ -103,8 +296,7 @@ def publish_survey(survey_id: str):
     if not survey:
         return jsonify({"error": "Survey not found"}), 404
     try:
-        survey.publish()
-        storage.save_to_file()
+        storage.publish_survey(survey_id)
         return (
             jsonify(
                 {
@@ -130,8 +322,8 @@ def submit_response(survey_id: str):
         responses_dict = {}
         for resp in data["responses"]:
             responses_dict[resp["question_id"]] = resp["answer"]
-        response_id = survey.add_response(responses_dict)
-        storage.save_to_file()
+        durable = request.args.get("durable", "false").lower() == "true"
+        response_id = storage.add_response(survey_id, responses_dict, durable=durable)
         return (
             jsonify({"message": "Response submitted", "response_id": response_id}),
             201,
@@ -142,12 +334,125 @@ def submit_response(survey_id: str):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/surveys/<survey_id>/responses", methods=["GET"])
+def list_responses(survey_id: str):
+    survey = storage.get_survey(survey_id)
+    if not survey:
+        return jsonify({"error": "Survey not found"}), 404
+    try:
+        limit = _parse_limit()
+        after = None
+        if "cursor" in request.args:
+            timestamp, response_id = decode_cursor(request.args["cursor"])
+            after = (datetime.fromisoformat(timestamp), response_id)
+        since, until = (
+            datetime.fromisoformat(request.args[name]) if name in request.args else None
+            for name in ("since", "until")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    responses, last, has_more = survey.page_responses(
+        after=after, since=since, until=until, limit=limit
+    )
+    # An empty page keeps the caller's cursor so incremental pulls can resume.
+    next_cursor = request.args.get("cursor")
+    if last is not None:
+        next_cursor = encode_cursor(last[0].isoformat(), last[1])
+    return (
+        jsonify(
+            {
+                "responses": responses,
+                "count": len(responses),
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+            }
+        ),
+        200,
+    )
+
+
+def _answers_from_item(item: Any) -> Optional[Dict[str, Any]]:
+    try:
+        return {resp["question_id"]: resp["answer"] for resp in item["responses"]}
+    except (KeyError, TypeError):
+        return None
+
+
+@app.route("/surveys/<survey_id>/responses/bulk", methods=["POST"])
+def submit_responses_bulk(survey_id: str):
+    survey = storage.get_survey(survey_id)
+    if not survey:
+        return jsonify({"error": "Survey not found"}), 404
+    data = request.get_json()
+    if not data or not isinstance(data.get("items"), list):
+        return jsonify({"error": "Items are required"}), 400
+    try:
+        batch = [_answers_from_item(item) for item in data["items"]]
+        durable = request.args.get("durable", "false").lower() == "true"
+        results = storage.add_responses(survey_id, batch, durable=durable)
+        accepted = sum(1 for r in results if "response_id" in r)
+        return (
+            jsonify(
+                {
+                    "accepted": accepted,
+                    "rejected": len(results) - accepted,
+                    "results": results,
+                }
+            ),
+            200,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _parse_filters() -> Dict[str, List[str]]:
+    filters: Dict[str, List[str]] = {}
+    for value in request.args.getlist("filter"):
+        question_id, sep, option = value.partition(":")
+        if not sep or not question_id:
+            raise ValueError("Filters must look like <question_id>:<option>")
+        filters.setdefault(question_id, []).append(option)
+    return filters
+
+
 @app.route("/surveys/<survey_id>/results", methods=["GET"])
 def get_results(survey_id: str):
     survey = storage.get_survey(survey_id)
     if not survey:
         return jsonify({"error": "Survey not found"}), 404
-    return jsonify(survey.get_results()), 200
+    extended = request.args.get("stats", "") == "extended"
+    try:
+        filters = _parse_filters()
+        view = (
+            "results",
+            extended,
+            tuple(sorted((qid, tuple(opts)) for qid, opts in filters.items())),
+        )
+        return _cached_json(
+            survey,
+            view,
+            lambda: survey.get_results(extended=extended, filters=filters),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/surveys/<survey_id>/crosstab", methods=["GET"])
+def get_crosstab(survey_id: str):
+    survey = storage.get_survey(survey_id)
+    if not survey:
+        return jsonify({"error": "Survey not found"}), 404
+    if "row" not in request.args or "column" not in request.args:
+        return jsonify({"error": "Row and column question ids are required"}), 400
+    try:
+        crosstab = survey.crosstab(
+            request.args["row"], request.args["column"], filters=_parse_filters()
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(crosstab), 200
 
 
 @app.route("/surveys/<survey_id>/export", methods=["GET"])
@@ -157,24 +462,16 @@ def export_results(survey_id: str):
         return jsonify({"error": "Survey not found"}), 404
     if len(survey.responses) == 0:
         return jsonify({"error": "No responses to export"}), 400
-    output = io.StringIO()
-    writer = csv.writer(output)
-    header = ["response_id", "timestamp"]
-    header.extend([q.text for q in survey.questions])
-    writer.writerow(header)
-    for response in survey.responses:
-        row = [response["id"], response["timestamp"]]
-        for question in survey.questions:
-            answer = response["answers"].get(question.id, "")
-            row.append(answer)
-        writer.writerow(row)
-    output.seek(0)
-    return send_file(
-        io.BytesIO(output.getvalue().encode("utf-8")),
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"survey_{survey_id}_results.csv",
-    )
+    chunks = iter_csv(survey)
+    headers = {
+        "Content-Disposition": f"attachment; filename=survey_{survey_id}_results.csv",
+        "Vary": "Accept-Encoding",
+    }
+    if request.accept_encodings["gzip"] > 0:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    chunks = metrics.timed_iter(profiling.profile_iter(chunks), "export")
+    return Response(stream_with_context(chunks), mimetype="text/csv", headers=headers)
 
 
 @app.errorhandler(404)
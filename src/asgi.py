@@ -0,0 +1,177 @@
+"""ASGI entry point serving the same routes as src.app.
+
+Run it with any ASGI server, for example ``uvicorn src.asgi:application``.
+"""
+
+import asyncio
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.app import app as flask_app
+
+
+class AsgiApp:
+    """
+    ASGI adapter that runs a WSGI app's handlers off the event loop.
+
+    Request bodies are received and responses sent on the event loop, so a slow
+    client holds only a coroutine. Only the handler itself, including any
+    storage I/O it performs, runs in a bounded thread pool, and streamed
+    responses are pulled from it one chunk at a time. Thousands of connections
+    can therefore wait on the network while `max_workers` threads do the work.
+    """
+
+    def __init__(self, wsgi_app: Callable, max_workers: int = 32):
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="survey-asgi"
+            )
+        return self._executor
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope: Dict[str, Any], receive, send) -> None:
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        loop = asyncio.get_running_loop()
+        environ = self._environ(scope, bytes(body))
+        status, headers, chunks, iterator = await loop.run_in_executor(
+            self.executor, self._run, environ
+        )
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        try:
+            while iterator is not None:
+                chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+        finally:
+            if iterator is not None and hasattr(iterator, "close"):
+                await loop.run_in_executor(self.executor, iterator.close)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _run(
+        self, environ: Dict[str, Any]
+    ) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes], Optional[Iterable]]:
+        started: Dict[str, Any] = {}
+
+        def start_response(status: str, headers, exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+
+        # Streamed bodies are resumed on whichever pool thread is free, so the
+        # whole request runs in one context for Flask's context variables.
+        context = contextvars.copy_context()
+        result = context.run(self.wsgi_app, environ, start_response)
+        iterator = context.run(iter, result)
+        if any(name == b"content-length" for name, _ in started["headers"]):
+            # A complete body: collect it here rather than hop threads per chunk.
+            try:
+                chunks = context.run(list, iterator)
+            finally:
+                if hasattr(result, "close"):
+                    context.run(result.close)
+            return started["status"], started["headers"], chunks, None
+        stream = _Stream(context, iterator, result)
+        return started["status"], started["headers"], [], stream
+
+    def _environ(self, scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for raw_name, raw_value in scope.get("headers", []):
+            name = raw_name.decode("latin-1").upper().replace("-", "_")
+            value = raw_value.decode("latin-1")
+            if name == "CONTENT_TYPE":
+                environ["CONTENT_TYPE"] = value
+                continue
+            if name == "CONTENT_LENGTH":
+                environ["CONTENT_LENGTH"] = value
+                continue
+            key = "HTTP_" + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+class _Stream:
+    """Streamed WSGI body whose chunks are produced in the request's context."""
+
+    def __init__(self, context: contextvars.Context, iterator, result):
+        self._context = context
+        self._iterator = iterator
+        self._result = result
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return self._context.run(next, self._iterator)
+
+    def close(self) -> None:
+        if hasattr(self._result, "close"):
+            self._context.run(self._result.close)
+
+
+application = AsgiApp(
+    flask_app, max_workers=int(os.getenv("SURVEY_ASGI_THREADS", "32"))
+)
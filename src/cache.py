@@ -0,0 +1,39 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+
+class SerializedCache:
+    """
+    Least-recently-used cache of serialized response bodies.
+
+    Keys include the survey's ETag, so a mutated survey simply stops hitting its
+    old entries, which age out as new ones are added.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        """Return the cached body for `key`, calling `build` on a miss."""
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+        body = build()
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,418 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+_MISSING = object()
+
+
+def timestamp_micros(value: datetime) -> int:
+    """Return a datetime as microseconds since the epoch; aware values count as UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - EPOCH) // ONE_MICROSECOND
+
+
+def _int_typecode(low: int, high: int) -> str:
+    for typecode, bits in (("b", 8), ("h", 16), ("i", 32)):
+        limit = 1 << (bits - 1)
+        if -limit <= low and high < limit:
+            return typecode
+    return "q"
+
+
+class TextColumn:
+    """Text answers packed into one UTF-8 buffer with an offset per row."""
+
+    def __init__(self):
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def append(self, value: Any) -> bool:
+        if type(value) is not str:
+            self.append_placeholder()
+            return False
+        try:
+            encoded = value.encode("utf-8")
+        except UnicodeEncodeError:
+            self.append_placeholder()
+            return False
+        self.data += encoded
+        self.offsets.append(len(self.data))
+        return True
+
+    def append_placeholder(self) -> None:
+        self.offsets.append(len(self.data))
+
+    def get(self, index: int) -> str:
+        return self.data[self.offsets[index] : self.offsets[index + 1]].decode("utf-8")
+
+    def nbytes(self) -> int:
+        return len(self.offsets) * self.offsets.itemsize + len(self.data)
+
+
+class ChoiceColumn:
+    """Multiple-choice answers stored as indexes into the option list."""
+
+    def __init__(self, options: List[str]):
+        self.options = list(options)
+        self.codes = array("B" if len(options) < 255 else "I")
+        self._lookup: Dict[str, int] = {}
+        for code, option in enumerate(self.options):
+            self._lookup.setdefault(option, code)
+        self._placeholder = len(self.options)
+        # Inverted index: bit N of bitmaps[code] is set when row N chose that option.
+        self.bitmaps = [bytearray() for _ in self.options]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def append(self, value: Any) -> bool:
+        code = self._lookup.get(value) if type(value) is str else None
+        if code is None:
+            self.append_placeholder()
+            return False
+        row = len(self.codes)
+        bitmap = self.bitmaps[code]
+        byte = row >> 3
+        if byte >= len(bitmap):
+            bitmap.extend(bytes(max(byte + 1 - len(bitmap), len(bitmap) // 2, 64)))
+        bitmap[byte] |= 1 << (row & 7)
+        self.codes.append(code)
+        return True
+
+    def option_mask(self, option: str) -> int:
+        """Return the rows that chose `option` as an integer bitmask."""
+        code = self._lookup.get(option)
+        if code is None:
+            raise ValueError(f"Unknown option: {option}")
+        return int.from_bytes(self.bitmaps[code], "little")
+
+    def append_placeholder(self) -> None:
+        self.codes.append(self._placeholder)
+
+    def get(self, index: int) -> str:
+        return self.options[self.codes[index]]
+
+    def nbytes(self) -> int:
+        bitmaps = sum(len(bitmap) for bitmap in self.bitmaps)
+        return len(self.codes) * self.codes.itemsize + bitmaps
+
+
+class ScaleColumn:
+    """Scale answers stored in the narrowest integer array that fits the range."""
+
+    def __init__(self, min_value: int, max_value: int):
+        self.min_value = min_value
+        self.max_value = max_value
+        self.values = array(_int_typecode(min_value, max_value))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value: Any) -> bool:
+        if type(value) is not int or not self.min_value <= value <= self.max_value:
+            self.append_placeholder()
+            return False
+        self.values.append(value)
+        return True
+
+    def append_placeholder(self) -> None:
+        self.values.append(self.min_value)
+
+    def get(self, index: int) -> int:
+        return self.values[index]
+
+    def nbytes(self) -> int:
+        return len(self.values) * self.values.itemsize
+
+
+class ResponseStore:
+    """
+    Columnar storage for a survey's responses.
+
+    Response ids are kept as 16 raw UUID bytes, timestamps as microseconds since
+    the epoch and every question's answers in a typed column created by the
+    question itself. Anything that cannot be encoded exactly (a non-canonical id,
+    a missing answer, an answer to an unknown question) is kept per row in a
+    small override dict, so every stored response round-trips unchanged.
+
+    The store behaves like the list of response dicts it replaces: it supports
+    len(), indexing, slicing, iteration and append().
+    """
+
+    __slots__ = (
+        "_questions",
+        "_columns",
+        "_ids",
+        "_timestamps",
+        "_odd_ids",
+        "_odd_timestamps",
+        "_overrides",
+        "_time_order",
+    )
+
+    def __init__(self, questions: List[Any]):
+        self._questions = questions
+        self._columns: Dict[str, Any] = {}
+        self._ids = bytearray()
+        self._timestamps = array("q")
+        self._odd_ids: Dict[int, str] = {}
+        self._odd_timestamps: Dict[int, str] = {}
+        self._overrides: Dict[int, Dict[str, Any]] = {}
+        # Rows sorted by time_key; None while rows were appended in that order.
+        self._time_order: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("response index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self._row(index)
+
+    def append(self, response: Dict[str, Any]) -> None:
+        row = len(self)
+        self._append_id(row, response["id"])
+        self._append_timestamp(row, response["timestamp"])
+        answers = response["answers"]
+        overrides = {}
+        for question_id, column in self._columns.items():
+            if question_id not in answers:
+                column.append_placeholder()
+                overrides[question_id] = _MISSING
+        for question_id, value in answers.items():
+            column = self._columns.get(question_id)
+            if column is None:
+                column = self._create_column(question_id)
+            if column is None or not column.append(value):
+                overrides[question_id] = value
+        if overrides:
+            self._overrides[row] = overrides
+        self._index_time(row)
+
+    def extend(self, responses) -> None:
+        for response in responses:
+            self.append(response)
+
+    def response_id(self, index: int) -> str:
+        odd = self._odd_ids.get(index)
+        if odd is not None:
+            return odd
+        h = self._ids[index * 16 : index * 16 + 16].hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+    def iter_ids(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.response_id(index)
+
+    def timestamp(self, index: int) -> str:
+        odd = self._odd_timestamps.get(index)
+        if odd is not None:
+            return odd
+        return (EPOCH + self._timestamps[index] * ONE_MICROSECOND).isoformat()
+
+    def answer(self, index: int, question_id: str, default: Any = None) -> Any:
+        overrides = self._overrides.get(index)
+        if overrides is not None and question_id in overrides:
+            value = overrides[question_id]
+            return default if value is _MISSING else value
+        column = self._columns.get(question_id)
+        return default if column is None else column.get(index)
+
+    def column(self, question_id: str):
+        return self._columns.get(question_id)
+
+    def split_column(
+        self, question_id: str, rows: Optional[Sequence[int]] = None
+    ) -> Tuple[Any, List[int], List[Any]]:
+        """
+        Separate a question's packed column from its per-row exceptions.
+
+        Args:
+            question_id: The question whose column is wanted
+            rows: Only report exceptions among these rows; all rows if omitted
+
+        Returns:
+            Tuple of the typed column (None if no answer was ever stored), the rows
+            whose column slot is only a placeholder, and the answers stored outside
+            the column because they could not be encoded
+        """
+        wanted = None if rows is None or not self._overrides else set(rows)
+        skipped = []
+        irregular = []
+        for row, overrides in self._overrides.items():
+            if question_id in overrides and (wanted is None or row in wanted):
+                skipped.append(row)
+                value = overrides[question_id]
+                if value is not _MISSING:
+                    irregular.append(value)
+        skipped.sort()
+        return self._columns.get(question_id), skipped, irregular
+
+    def match_mask(self, filters: Dict[str, List[str]]) -> int:
+        """
+        Return the rows matching every filter as an integer bitmask.
+
+        Args:
+            filters: Accepted options per multiple-choice question id; a row
+                matches a question when it chose any of its listed options
+
+        Raises:
+            ValueError: If a filter names a question without an option index
+                or an option the question does not have
+        """
+        mask = (1 << len(self)) - 1
+        for question_id, options in filters.items():
+            column = self._columns.get(question_id)
+            if column is None:
+                column = self._create_index_column(question_id)
+            elif not isinstance(column, ChoiceColumn):
+                raise ValueError(f"Question {question_id} cannot be used as a filter")
+            question_mask = 0
+            for option in options:
+                question_mask |= column.option_mask(option)
+            mask &= question_mask
+        return mask
+
+    def time_key(self, index: int) -> Tuple[int, str]:
+        """Return the (timestamp in microseconds, response id) a row is ordered by.
+
+        Timestamps that are not ISO 8601 order as the epoch.
+        """
+        return self._timestamps[index], self.response_id(index)
+
+    def time_slice(
+        self,
+        after: Optional[Tuple[int, str]] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Return row positions in time_key order, found by binary search.
+
+        Args:
+            after: Only rows whose time_key is greater than this key
+            since: Only rows at or after this timestamp, in microseconds
+            until: Only rows before this timestamp, in microseconds
+            limit: Maximum number of rows returned
+
+        Returns:
+            List[int]: The matching row positions
+        """
+        order = range(len(self)) if self._time_order is None else self._time_order
+        start = 0
+        if after is not None:
+            start = bisect_right(order, after, key=self.time_key)
+        if since is not None:
+            start = max(start, bisect_left(order, (since, ""), key=self.time_key))
+        end = len(order)
+        if until is not None:
+            end = bisect_left(order, (until, ""), key=self.time_key)
+        if limit is not None:
+            end = min(end, start + limit)
+        return list(order[start:end])
+
+    def nbytes(self) -> int:
+        """Approximate size of the packed columns, excluding per-row overrides."""
+        return (
+            len(self._ids)
+            + len(self._timestamps) * self._timestamps.itemsize
+            + sum(column.nbytes() for column in self._columns.values())
+        )
+
+    def _row(self, index: int) -> Dict[str, Any]:
+        overrides = self._overrides.get(index)
+        if overrides is None:
+            answers = {qid: column.get(index) for qid, column in self._columns.items()}
+        else:
+            answers = {
+                qid: column.get(index)
+                for qid, column in self._columns.items()
+                if qid not in overrides
+            }
+            for question_id, value in overrides.items():
+                if value is not _MISSING:
+                    answers[question_id] = value
+        return {
+            "id": self.response_id(index),
+            "timestamp": self.timestamp(index),
+            "answers": answers,
+        }
+
+    def _append_id(self, row: int, response_id: str) -> None:
+        raw: Optional[bytes] = None
+        if isinstance(response_id, str) and len(response_id) == 36:
+            try:
+                raw = bytes.fromhex(response_id.replace("-", ""))
+            except ValueError:
+                raw = None
+        self._ids += raw if raw is not None and len(raw) == 16 else bytes(16)
+        if raw is None or len(raw) != 16 or self.response_id(row) != response_id:
+            self._odd_ids[row] = response_id
+
+    def _append_timestamp(self, row: int, timestamp: str) -> None:
+        micros = 0
+        try:
+            micros = (datetime.fromisoformat(timestamp) - EPOCH) // ONE_MICROSECOND
+            self._timestamps.append(micros)
+        except (TypeError, ValueError, OverflowError):
+            self._timestamps.append(0)
+        if self.timestamp(row) != timestamp:
+            self._odd_timestamps[row] = timestamp
+
+    def _index_time(self, row: int) -> None:
+        if self._time_order is not None:
+            insort(self._time_order, row, key=self.time_key)
+        elif row and self.time_key(row) < self.time_key(row - 1):
+            self._time_order = array("q", sorted(range(row + 1), key=self.time_key))
+
+    def _create_index_column(self, question_id: str):
+        # A question without stored answers still validates filters against its options.
+        for question in self._questions:
+            if question.id == question_id:
+                column = question.create_column()
+                if isinstance(column, ChoiceColumn):
+                    return column
+        raise ValueError(f"Question {question_id} cannot be used as a filter")
+
+    def _create_column(self, question_id: str):
+        factory: Optional[Callable[[], Any]] = None
+        for question in self._questions:
+            if question.id == question_id:
+                factory = question.create_column
+                break
+        if factory is None:
+            return None
+        column = factory()
+        rows = len(self) - 1
+        for row in range(rows):
+            column.append_placeholder()
+            self._overrides.setdefault(row, {})[question_id] = _MISSING
+        self._columns[question_id] = column
+        return column
@@ -0,0 +1,64 @@
+import csv
+import zlib
+from typing import Iterable, Iterator, List
+
+from src.models import Survey
+
+
+class _RowBuffer:
+    """File-like sink for csv.writer that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def write(self, data: str) -> None:
+        self._parts.append(data)
+
+    def drain(self) -> bytes:
+        data = "".join(self._parts).encode("utf-8")
+        self._parts.clear()
+        return data
+
+
+def iter_csv(survey: Survey, chunk_rows: int = 500) -> Iterator[bytes]:
+    """
+    Yield the survey's responses as CSV, `chunk_rows` rows per chunk.
+
+    Only responses stored before the export started are included, so concurrent
+    submissions do not change the row count mid-stream.
+
+    Args:
+        survey: The survey to export
+        chunk_rows: Number of CSV rows encoded per yielded chunk
+
+    Returns:
+        Iterator[bytes]: UTF-8 encoded CSV chunks
+    """
+    buffer = _RowBuffer()
+    writer = csv.writer(buffer)
+    questions = list(survey.questions)
+    header = ["response_id", "timestamp"]
+    header.extend([q.text for q in questions])
+    writer.writerow(header)
+    responses = survey.responses
+    total = len(responses)
+    for index in range(total):
+        row = [responses.response_id(index), responses.timestamp(index)]
+        for question in questions:
+            row.append(responses.answer(index, question.id, ""))
+        writer.writerow(row)
+        if (index + 1) % chunk_rows == 0:
+            yield buffer.drain()
+    tail = buffer.drain()
+    if tail:
+        yield tail
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a stream of chunks into a single gzip member without buffering it."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -1,8 +1,20 @@
 from datetime import datetime
 from enum import Enum
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterable, List, Dict, Any, Optional, Sequence, Tuple
+import threading
 import uuid
 
+from src import analytics, metrics, profiling, serialization
+from src.columnar import (
+    EPOCH,
+    ONE_MICROSECOND,
+    ChoiceColumn,
+    ResponseStore,
+    ScaleColumn,
+    TextColumn,
+    timestamp_micros,
+)
+
 
 class SurveyStatus(Enum):
     DRAFT = "draft"
@@ -16,7 +28,108 @@ class QuestionType(Enum):
     SCALE = "scale"
 
 
+class TextAggregate:
+    def __init__(self):
+        self.count = 0
+
+    def add(self, answer: Any) -> None:
+        self.count += 1
+
+    def load(
+        self,
+        store: ResponseStore,
+        question_id: str,
+        rows: Optional[Sequence[int]] = None,
+    ) -> None:
+        column, skipped, irregular = store.split_column(question_id, rows)
+        if column is not None:
+            self.count += (len(store) if rows is None else len(rows)) - len(skipped)
+        self.count += len(irregular)
+
+    def results(self) -> Dict[str, Any]:
+        return {"answer_count": self.count}
+
+
+class ChoiceAggregate:
+    def __init__(self, options: List[str]):
+        self.counts = {opt: 0 for opt in options}
+        self.total = 0
+
+    def add(self, answer: Any) -> None:
+        if answer in self.counts:
+            self.counts[answer] += 1
+        self.total += 1
+
+    def load(
+        self,
+        store: ResponseStore,
+        question_id: str,
+        rows: Optional[Sequence[int]] = None,
+    ) -> None:
+        column, skipped, irregular = store.split_column(question_id, rows)
+        if column is not None:
+            counts = analytics.choice_counts(column, rows=rows)
+            for option, count in zip(column.options, counts):
+                self.counts[option] += count
+            self.total += (len(store) if rows is None else len(rows)) - len(skipped)
+        self.total += len(irregular)
+
+    def results(self) -> Dict[str, Any]:
+        distribution = {}
+        for opt, count in self.counts.items():
+            distribution[opt] = {
+                "count": count,
+                "percentage": round(count / self.total * 100, 2) if self.total else 0,
+            }
+        return {"distribution": distribution}
+
+
+class ScaleAggregate:
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, answer: Any) -> None:
+        self.count += 1
+        self.total += answer
+        if self.min is None or answer < self.min:
+            self.min = answer
+        if self.max is None or answer > self.max:
+            self.max = answer
+
+    def load(
+        self,
+        store: ResponseStore,
+        question_id: str,
+        rows: Optional[Sequence[int]] = None,
+    ) -> None:
+        values = analytics.scale_values(
+            *store.split_column(question_id, rows), rows=rows
+        )
+        count, total, low, high = analytics.scale_summary(values)
+        if count:
+            self.count = count
+            self.total = total
+            self.min = low
+            self.max = high
+
+    def results(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"average": 0, "min": 0, "max": 0}
+        return {
+            "average": round(self.total / self.count, 2),
+            "min": self.min,
+            "max": self.max,
+        }
+
+
 class Question:
+    __slots__ = ("id", "type", "text")
+
+    question_type: QuestionType
+
     def __init__(
         self, question_type: QuestionType, text: str, question_id: Optional[str] = None
     ):
@@ -24,22 +137,64 @@ class Question:
         self.type = question_type
         self.text = text
 
+    @classmethod
+    def restore(cls, data: Dict[str, Any]) -> "Question":
+        """
+        Rebuild a question from its to_dict output without validating it.
+
+        Only for data this application wrote itself, such as a snapshot whose
+        checksum matched; anything else goes through the constructor.
+        """
+        question = cls.__new__(cls)
+        question.id = data["id"]
+        question.type = cls.question_type
+        question.text = data["text"]
+        question._restore_fields(data)
+        return question
+
+    def _restore_fields(self, data: Dict[str, Any]) -> None:
+        pass
+
     def to_dict(self) -> Dict[str, Any]:
         return {"id": self.id, "type": self.type.value, "text": self.text}
 
     def validate_answer(self, answer: Any) -> bool:
         raise NotImplementedError
 
+    def compile_validator(self) -> Callable[[Any], bool]:
+        """Return a standalone check equivalent to validate_answer for batch use."""
+        return self.validate_answer
+
+    def create_aggregate(self):
+        raise NotImplementedError
+
+    def create_column(self):
+        raise NotImplementedError
+
 
 class TextQuestion(Question):
+    __slots__ = ()
+
+    question_type = QuestionType.TEXT
+
     def __init__(self, text: str, question_id: Optional[str] = None):
         super().__init__(QuestionType.TEXT, text, question_id)
 
     def validate_answer(self, answer: Any) -> bool:
         return isinstance(answer, str) and len(answer.strip()) > 0
 
+    def create_aggregate(self) -> TextAggregate:
+        return TextAggregate()
+
+    def create_column(self) -> TextColumn:
+        return TextColumn()
+
 
 class MultipleChoiceQuestion(Question):
+    __slots__ = ("options",)
+
+    question_type = QuestionType.MULTIPLE_CHOICE
+
     def __init__(
         self, text: str, options: List[str], question_id: Optional[str] = None
     ):
@@ -48,6 +203,9 @@ class MultipleChoiceQuestion(Question):
             raise ValueError("Multiple choice question needs at least 2 options")
         self.options = options
 
+    def _restore_fields(self, data: Dict[str, Any]) -> None:
+        self.options = data["options"]
+
     def to_dict(self) -> Dict[str, Any]:
         data = super().to_dict()
         data["options"] = self.options
@@ -56,8 +214,22 @@ class MultipleChoiceQuestion(Question):
     def validate_answer(self, answer: Any) -> bool:
         return answer in self.options
 
+    def compile_validator(self) -> Callable[[Any], bool]:
+        options = frozenset(self.options)
+        return lambda answer: isinstance(answer, str) and answer in options
+
+    def create_aggregate(self) -> ChoiceAggregate:
+        return ChoiceAggregate(self.options)
+
+    def create_column(self) -> ChoiceColumn:
+        return ChoiceColumn(self.options)
+
 
 class ScaleQuestion(Question):
+    __slots__ = ("min_value", "max_value")
+
+    question_type = QuestionType.SCALE
+
     def __init__(
         self,
         text: str,
@@ -71,6 +243,10 @@ class ScaleQuestion(Question):
         self.min_value = min_value
         self.max_value = max_value
 
+    def _restore_fields(self, data: Dict[str, Any]) -> None:
+        self.min_value = data["min_value"]
+        self.max_value = data["max_value"]
+
     def to_dict(self) -> Dict[str, Any]:
         data = super().to_dict()
         data["min_value"] = self.min_value
@@ -80,112 +256,523 @@ class ScaleQuestion(Question):
     def validate_answer(self, answer: Any) -> bool:
         return isinstance(answer, int) and self.min_value <= answer <= self.max_value
 
+    def compile_validator(self) -> Callable[[Any], bool]:
+        low, high = self.min_value, self.max_value
+        return lambda answer: isinstance(answer, int) and low <= answer <= high
+
+    def create_aggregate(self) -> ScaleAggregate:
+        return ScaleAggregate()
+
+    def create_column(self) -> ScaleColumn:
+        return ScaleColumn(self.min_value, self.max_value)
+
+
+# Keyed by the stored type value, for restoring questions from trusted data.
+QUESTION_CLASSES = {
+    cls.question_type.value: cls
+    for cls in (TextQuestion, MultipleChoiceQuestion, ScaleQuestion)
+}
+
+
+class ValidationPlan:
+    """
+    Answer checks for a fixed list of questions, compiled once.
+
+    The built-in question types are grouped so a valid submission is checked
+    with inline frozenset lookups and precomputed bounds, without a call per
+    question; other types use their compile_validator. Only a rejected
+    submission is re-checked in question order to report its first error.
+    """
+
+    def __init__(self, questions: Sequence[Question]):
+        self.checks: Tuple[Tuple[str, Callable[[Any], bool]], ...] = tuple(
+            (q.id, q.compile_validator()) for q in questions
+        )
+        self.required = frozenset(question_id for question_id, _ in self.checks)
+        self._texts = tuple(q.id for q in questions if type(q) is TextQuestion)
+        self._choices = tuple(
+            (q.id, frozenset(q.options))
+            for q in questions
+            if type(q) is MultipleChoiceQuestion
+        )
+        self._scales = tuple(
+            (q.id, q.min_value, q.max_value)
+            for q in questions
+            if type(q) is ScaleQuestion
+        )
+        builtin = (TextQuestion, MultipleChoiceQuestion, ScaleQuestion)
+        self._others = tuple(
+            (q.id, is_valid)
+            for q, (_, is_valid) in zip(questions, self.checks)
+            if type(q) not in builtin
+        )
+
+    def error(self, answers: Any) -> Optional[str]:
+        """Return why `answers` is not a valid submission, or None if it is."""
+        if not isinstance(answers, dict):
+            return "Malformed response"
+        if len(answers) == len(self.checks) and self._accepts(answers):
+            return None
+        return self._first_error(answers)
+
+    def _accepts(self, answers: Dict[str, Any]) -> bool:
+        # A fast, conservative check: False may still be a valid submission
+        # (say, a str subclass), which _first_error then settles.
+        get = answers.get
+        for question_id in self._texts:
+            answer = get(question_id)
+            if type(answer) is not str or not answer.strip():
+                return False
+        for question_id, options in self._choices:
+            answer = get(question_id)
+            if type(answer) is not str or answer not in options:
+                return False
+        for question_id, low, high in self._scales:
+            answer = get(question_id)
+            if type(answer) is not int or not low <= answer <= high:
+                return False
+        for question_id, is_valid in self._others:
+            if question_id not in answers or not is_valid(answers[question_id]):
+                return False
+        return True
+
+    def _first_error(self, answers: Dict[str, Any]) -> Optional[str]:
+        for question_id, is_valid in self.checks:
+            answer = answers.get(question_id, _MISSING)
+            if answer is _MISSING:
+                return f"Missing answer for question {question_id}"
+            if not is_valid(answer):
+                return f"Invalid answer for question {question_id}"
+        if len(answers) != len(self.checks):
+            # Every question was answered, so the surplus keys are unknown.
+            unexpected = sorted(map(str, answers.keys() - self.required))
+            return f"Unexpected answer for question {unexpected[0]}"
+        return None
+
+
+_MISSING = object()
+
 
 class Survey:
+    __slots__ = (
+        "id",
+        "title",
+        "description",
+        "questions",
+        "status",
+        "created_at",
+        "responses",
+        "lock",
+        "version",
+        "_aggregates",
+        "_plan",
+        "_questions_json",
+        "_epoch",
+    )
+
     def __init__(
         self, title: str, description: str = "", survey_id: Optional[str] = None
     ):
-        self.id = survey_id or str(uuid.uuid4())
+        self._setup(
+            survey_id or str(uuid.uuid4()),
+            title,
+            description,
+            [],
+            SurveyStatus.DRAFT,
+            datetime.utcnow(),
+        )
+
+    @classmethod
+    def restore(
+        cls,
+        survey_id: str,
+        title: str,
+        description: str,
+        questions: List[Question],
+        status: SurveyStatus,
+        created_at: datetime,
+    ) -> "Survey":
+        """Rebuild a stored survey with its own id and creation time."""
+        survey = cls.__new__(cls)
+        survey._setup(survey_id, title, description, questions, status, created_at)
+        return survey
+
+    def _setup(
+        self,
+        survey_id: str,
+        title: str,
+        description: str,
+        questions: List[Question],
+        status: SurveyStatus,
+        created_at: datetime,
+    ) -> None:
+        self.id = survey_id
         self.title = title
         self.description = description
-        self.questions: List[Question] = []
-        self.status = SurveyStatus.DRAFT
-        self.created_at = datetime.utcnow()
-        self.responses: List[Dict[str, Any]] = []
+        self.questions = questions
+        self.status = status
+        self.created_at = created_at
+        self.responses = ResponseStore(self.questions)
+        self.lock = threading.RLock()
+        self._aggregates: Optional[Dict[str, Any]] = None
+        self._plan: Optional[ValidationPlan] = None
+        self._questions_json: Optional[serialization.Fragment] = None
+        # Bumped by every mutation; with the random epoch it identifies one
+        # state of this in-memory survey, which is what ETags are built from.
+        # The epoch is drawn on first use, so loading a store does not pay
+        # for one per survey.
+        self.version = 0
+        self._epoch: Optional[str] = None
+
+    @property
+    def etag(self) -> str:
+        """Unquoted strong entity tag for the current state of the survey."""
+        epoch = self._epoch
+        if epoch is None:
+            with self.lock:
+                if self._epoch is None:
+                    self._epoch = uuid.uuid4().hex[:12]
+                epoch = self._epoch
+        return f"{epoch}-{self.version}"
 
     def add_question(self, question: Question) -> None:
-        if self.status != SurveyStatus.DRAFT:
-            raise ValueError("Cannot modify published survey")
-        self.questions.append(question)
+        with self.lock:
+            if self.status != SurveyStatus.DRAFT:
+                raise ValueError("Cannot modify published survey")
+            self.questions.append(question)
+            self._aggregates = None
+            self._plan = None
+            self._questions_json = None
+            self.version += 1
 
     def remove_question(self, question_id: str) -> bool:
-        if self.status != SurveyStatus.DRAFT:
-            raise ValueError("Cannot modify published survey")
-
-        for i, q in enumerate(self.questions):
-            if q.id == question_id:
-                self.questions.pop(i)
-                return True
-        return False
+        with self.lock:
+            if self.status != SurveyStatus.DRAFT:
+                raise ValueError("Cannot modify published survey")
+
+            for i, q in enumerate(self.questions):
+                if q.id == question_id:
+                    self.questions.pop(i)
+                    self._aggregates = None
+                    self._plan = None
+                    self._questions_json = None
+                    self.version += 1
+                    return True
+            return False
 
     def publish(self) -> None:
-        if len(self.questions) == 0:
-            raise ValueError("Cannot publish survey without questions")
-        self.status = SurveyStatus.PUBLISHED
-
+        with self.lock:
+            if len(self.questions) == 0:
+                raise ValueError("Cannot publish survey without questions")
+            self.status = SurveyStatus.PUBLISHED
+            self._plan = ValidationPlan(self.questions)
+            self.version += 1
+
+    def questions_fragment(self) -> serialization.Fragment:
+        """The questions' to_dict list as JSON, encoded once per question change."""
+        fragment = self._questions_json
+        if fragment is None:
+            with self.lock:
+                if self._questions_json is None:
+                    self._questions_json = serialization.fragment(
+                        [q.to_dict() for q in self.questions]
+                    )
+                fragment = self._questions_json
+        return fragment
+
+    def validation_plan(self) -> ValidationPlan:
+        """Return the compiled answer checks, building them if not yet compiled."""
+        plan = self._plan
+        if plan is None:
+            with self.lock:
+                if self._plan is None:
+                    self._plan = ValidationPlan(self.questions)
+                plan = self._plan
+        return plan
+
+    @profiling.profiled("add_response")
     def add_response(self, responses: Dict[str, Any]) -> str:
+        response_data = self.create_response(responses)
+        self.append_response(response_data)
+        return response_data["id"]
+
+    @profiling.profiled("create_response")
+    def create_response(self, responses: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate answers and build a response record without storing it."""
         if self.status != SurveyStatus.PUBLISHED:
             raise ValueError("Survey must be published to accept responses")
 
-        for question in self.questions:
-            if question.id not in responses:
-                raise ValueError(f"Missing answer for question {question.id}")
-            if not question.validate_answer(responses[question.id]):
-                raise ValueError(f"Invalid answer for question {question.id}")
-
-        response_id = str(uuid.uuid4())
-        response_data = {
-            "id": response_id,
+        error = self.validation_plan().error(responses)
+        if error is not None:
+            raise ValueError(error)
+
+        return {
+            "id": str(uuid.uuid4()),
             "timestamp": datetime.utcnow().isoformat(),
             "answers": responses,
         }
-        self.responses.append(response_data)
-        return response_id
 
-    def get_results(self) -> Dict[str, Any]:
-        results = {
-            "survey_id": self.id,
-            "title": self.title,
-            "response_count": len(self.responses),
-            "questions": [],
-        }
+    def create_responses(
+        self, batch: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Validate a batch of answer dicts in one pass without storing them.
 
-        for question in self.questions:
-            q_results = {
-                "question_id": question.id,
-                "text": question.text,
-                "type": question.type.value,
+        Args:
+            batch: Answer dicts keyed by question id, one per response
+
+        Returns:
+            Tuple of the valid response records and one result per batch item,
+            holding either its "response_id" or an "error" message
+
+        Raises:
+            ValueError: If the survey is not published
+        """
+        if self.status != SurveyStatus.PUBLISHED:
+            raise ValueError("Survey must be published to accept responses")
+
+        check = self.validation_plan().error
+        timestamp = datetime.utcnow().isoformat()
+        records = []
+        results = []
+        for index, answers in enumerate(batch):
+            error = check(answers)
+            if error is not None:
+                results.append({"index": index, "error": error})
+                continue
+            record = {
+                "id": str(uuid.uuid4()),
+                "timestamp": timestamp,
+                "answers": answers,
             }
+            records.append(record)
+            results.append({"index": index, "response_id": record["id"]})
+        return records, results
+
+    def add_responses(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        records, results = self.create_responses(batch)
+        self.append_responses(records)
+        return results
 
-            answers = [r["answers"][question.id] for r in self.responses]
-
-            if question.type == QuestionType.TEXT:
-                q_results["answer_count"] = len(answers)
-
-            elif question.type == QuestionType.MULTIPLE_CHOICE:
-                distribution = {}
-                for opt in question.options:
-                    count = answers.count(opt)
-                    distribution[opt] = {
-                        "count": count,
-                        "percentage": (
-                            round(count / len(answers) * 100, 2) if answers else 0
-                        ),
-                    }
-                q_results["distribution"] = distribution
-
-            elif question.type == QuestionType.SCALE:
-                if answers:
-                    q_results["average"] = round(sum(answers) / len(answers), 2)
-                    q_results["min"] = min(answers)
-                    q_results["max"] = max(answers)
-                else:
-                    q_results["average"] = 0
-                    q_results["min"] = 0
-                    q_results["max"] = 0
-
-            results["questions"].append(q_results)
+    def append_responses(self, records: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            for response_data in records:
+                self.append_response(response_data)
+
+    def append_response(self, response_data: Dict[str, Any]) -> None:
+        """Store an already validated response and fold it into the aggregates."""
+        with self.lock:
+            self.responses.append(response_data)
+            if self._aggregates is not None:
+                self._aggregate_response(response_data)
+            self.version += 1
+
+    def restore_responses(self, responses) -> None:
+        """Replace the stored responses with a ResponseStore or iterable of dicts."""
+        with self.lock:
+            if not isinstance(responses, ResponseStore):
+                store = ResponseStore(self.questions)
+                store.extend(responses)
+                responses = store
+            self.responses = responses
+            self._aggregates = None
+            self.version += 1
+
+    def _aggregate_response(self, response_data: Dict[str, Any]) -> None:
+        answers = response_data["answers"]
+        for question_id, aggregate in self._aggregates.items():
+            if question_id in answers:
+                aggregate.add(answers[question_id])
+
+    def _get_aggregates(self) -> Dict[str, Any]:
+        if self._aggregates is None:
+            self._aggregates = self._load_aggregates()
+        return self._aggregates
+
+    def _load_aggregates(self, rows: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        aggregates = {}
+        for question in self.questions:
+            aggregate = question.create_aggregate()
+            aggregate.load(self.responses, question.id, rows)
+            aggregates[question.id] = aggregate
+        return aggregates
+
+    def match_responses(self, filters: Dict[str, List[str]]):
+        """
+        Return the positions of responses matching every filter.
+
+        Args:
+            filters: Accepted options per multiple-choice question id
+
+        Returns:
+            Sorted response positions, as a numpy array or a list of ints
+
+        Raises:
+            ValueError: If a filter does not name a multiple-choice question
+                and one of its options
+        """
+        with self.lock:
+            mask = self.responses.match_mask(filters)
+            return analytics.mask_positions(mask, len(self.responses))
+
+    def page_responses(
+        self,
+        after: Optional[Tuple[datetime, str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[datetime, str]], bool]:
+        """
+        Return stored responses in (timestamp, id) order, one page at a time.
+
+        Args:
+            after: The position returned with the previous page
+            since: Only responses at or after this time
+            until: Only responses before this time
+            limit: Maximum number of responses on the page
+
+        Returns:
+            Tuple of the responses, the position after the last of them (None on
+            an empty page) and whether more responses follow
+        """
+        with self.lock:
+            store = self.responses
+            rows = store.time_slice(
+                after=None if after is None else (timestamp_micros(after[0]), after[1]),
+                since=None if since is None else timestamp_micros(since),
+                until=None if until is None else timestamp_micros(until),
+                limit=limit + 1,
+            )
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            page = [store[row] for row in rows]
+            if not rows:
+                return page, None, False
+            micros, response_id = store.time_key(rows[-1])
+            return page, (EPOCH + micros * ONE_MICROSECOND, response_id), has_more
+
+    @metrics.timed("get_results")
+    @profiling.profiled("get_results")
+    def get_results(
+        self,
+        extended: bool = False,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Dict[str, Any]:
+        with self.lock:
+            rows = None
+            if filters:
+                rows = self.match_responses(filters)
+                aggregates = self._load_aggregates(rows)
+            else:
+                aggregates = self._get_aggregates()
+            results = {
+                "survey_id": self.id,
+                "title": self.title,
+                "response_count": len(self.responses) if rows is None else len(rows),
+                "questions": [],
+            }
+            if filters:
+                results["filters"] = filters
+
+            for question in self.questions:
+                q_results = {
+                    "question_id": question.id,
+                    "text": question.text,
+                    "type": question.type.value,
+                }
+                q_results.update(aggregates[question.id].results())
+                if extended and question.type == QuestionType.SCALE:
+                    values = analytics.scale_values(
+                        *self.responses.split_column(question.id, rows), rows=rows
+                    )
+                    q_results.update(
+                        analytics.scale_statistics(
+                            values, question.min_value, question.max_value
+                        )
+                    )
+                results["questions"].append(q_results)
 
         return results
 
-    def to_dict(self) -> Dict[str, Any]:
+    def crosstab(
+        self,
+        row_question_id: str,
+        column_question_id: str,
+        filters: Optional[Dict[str, List[str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Break one question's results down by the options of another.
+
+        Args:
+            row_question_id: Multiple-choice question whose options form the rows
+            column_question_id: Question aggregated within each row
+            filters: Optional filters applied before splitting into rows
+
+        Returns:
+            Dict[str, Any]: Response count and column question results per option
+
+        Raises:
+            ValueError: If either question is unknown or the row question is not
+                multiple choice
+        """
+        questions = {q.id: q for q in self.questions}
+        row_question = questions.get(row_question_id)
+        column_question = questions.get(column_question_id)
+        if row_question is None or column_question is None:
+            raise ValueError("Unknown question in crosstab")
+        if row_question.type != QuestionType.MULTIPLE_CHOICE:
+            raise ValueError("Crosstab rows must be a multiple choice question")
+
+        with self.lock:
+            base_mask = self.responses.match_mask(filters or {})
+            cells = {}
+            for option in row_question.options:
+                mask = base_mask & self.responses.match_mask(
+                    {row_question_id: [option]}
+                )
+                rows = analytics.mask_positions(mask, len(self.responses))
+                aggregate = column_question.create_aggregate()
+                aggregate.load(self.responses, column_question_id, rows)
+                cells[option] = {"count": len(rows)}
+                cells[option].update(aggregate.results())
+
         return {
-            "id": self.id,
-            "title": self.title,
-            "description": self.description,
-            "status": self.status.value,
-            "question_count": len(self.questions),
-            "response_count": len(self.responses),
-            "created_at": self.created_at.isoformat(),
-            "questions": [q.to_dict() for q in self.questions],
+            "survey_id": self.id,
+            "row_question_id": row_question_id,
+            "column_question_id": column_question_id,
+            "filters": filters or {},
+            "rows": cells,
         }
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Serialize the survey.
+
+        Args:
+            fields: Only compute and include these keys; all keys if omitted
+
+        Raises:
+            ValueError: If a requested field does not exist
+        """
+        if fields is None:
+            fields = SURVEY_FIELDS
+        data = {}
+        for field in fields:
+            getter = _SURVEY_FIELD_GETTERS.get(field)
+            if getter is None:
+                raise ValueError(f"Unknown survey field: {field}")
+            data[field] = getter(self)
+        return data
+
+
+_SURVEY_FIELD_GETTERS: Dict[str, Callable[[Survey], Any]] = {
+    "id": lambda s: s.id,
+    "title": lambda s: s.title,
+    "description": lambda s: s.description,
+    "status": lambda s: s.status.value,
+    "question_count": lambda s: len(s.questions),
+    "response_count": lambda s: len(s.responses),
+    "created_at": lambda s: s.created_at.isoformat(),
+    "questions": lambda s: [q.to_dict() for q in s.questions],
+}
+SURVEY_FIELDS = tuple(_SURVEY_FIELD_GETTERS)
@@ -0,0 +1,280 @@
+"""
+Opt-in profiling of the hot paths: validation, results, persistence and export.
+
+Hot paths are marked with the `profiled` decorator or wrapped with
+`profile_iter`. They run unprofiled unless a ProfileSession is active. A
+session starts for a single request, when the request asks for it and
+SURVEY_PROFILE_REQUESTS allows that, or for a sampled share of all work when
+SURVEY_PROFILE is on. A finished session writes one file to
+SURVEY_PROFILE_DIR:
+    pstats      cProfile statistics, for `python -m pstats <file>` or snakeviz
+    collapsed   "frame;frame;frame microseconds" lines, for flamegraph.pl or
+                speedscope
+"""
+
+import contextvars
+import cProfile
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+FORMATS = ("pstats", "collapsed")
+
+# Unset outside a request; None in a request or hot path that is running
+# unprofiled, so the calls nested in it do not roll for a session of their own.
+_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session"
+)
+
+
+class StackTracer:
+    """
+    Deterministic tracer recording the time spent in each distinct call stack.
+
+    Stacks start at the frame where tracing was enabled, so each one reads from
+    the profiled hot path downwards.
+    """
+
+    def __init__(self):
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self._stack: Tuple[str, ...] = ()
+        self._last = 0
+
+    def enable(self) -> None:
+        self._stack = ()
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._event)
+
+    def disable(self) -> None:
+        sys.setprofile(None)
+        self._charge(time.perf_counter_ns())
+
+    def collapsed(self) -> str:
+        lines = [
+            f"{';'.join(stack)} {max(1, nanos // 1000)}"
+            for stack, nanos in sorted(self.stacks.items())
+            if stack
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def _charge(self, now: int) -> None:
+        if self._stack:
+            self.stacks[self._stack] = (
+                self.stacks.get(self._stack, 0) + now - self._last
+            )
+        self._last = now
+
+    def _event(self, frame, event: str, arg: Any) -> None:
+        self._charge(time.perf_counter_ns())
+        if event == "call":
+            code = frame.f_code
+            location = f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+            self._stack += (f"{code.co_name} ({location})".replace(";", ":"),)
+        elif event == "c_call":
+            name = getattr(arg, "__qualname__", None) or repr(arg)
+            self._stack += (name.replace(";", ":"),)
+        elif self._stack and event in ("return", "c_return", "c_exception"):
+            self._stack = self._stack[:-1]
+        # Exclude the tracer's own bookkeeping from the next charge.
+        self._last = time.perf_counter_ns()
+
+
+class ProfileSession:
+    """Profiles every hot path that runs while it is active, into one file."""
+
+    def __init__(self, label: str, output_format: str, directory: str):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format: {output_format}")
+        safe_label = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "profile"
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        extension = "pstats" if output_format == "pstats" else "collapsed"
+        self.path = os.path.join(
+            directory, f"{stamp}-{safe_label}-{uuid.uuid4().hex[:8]}.{extension}"
+        )
+        self.output_format = output_format
+        self._profiler = (
+            cProfile.Profile() if output_format == "pstats" else StackTracer()
+        )
+        self._depth = 0
+        self._recorded = False
+        self._lock = threading.Lock()
+
+    def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        # Only the outermost hot path toggles the profiler; nested ones are
+        # already being recorded.
+        with self._lock:
+            outermost = self._depth == 0
+            self._depth += 1
+        if outermost:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler owns this interpreter; run unprofiled.
+                outermost = False
+        token = _session.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _session.reset(token)
+            if outermost:
+                self._profiler.disable()
+                self._recorded = True
+            with self._lock:
+                self._depth -= 1
+
+    def finish(self) -> Optional[str]:
+        """Write the profile; return its path, or None if nothing ran."""
+        if not self._recorded:
+            return None
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.output_format == "pstats":
+            self._profiler.dump_stats(self.path)
+        else:
+            with open(self.path, "w") as f:
+                f.write(self._profiler.collapsed())
+        return self.path
+
+
+class Profiler:
+    """
+    Decides when to profile, from environment-style settings.
+
+    Args:
+        enabled: Profile a sampled share of all requests and hot-path calls
+        sample_rate: Share profiled when `enabled`, from 0 to 1
+        allow_requests: Let a request ask to be profiled
+        directory: Where profile files are written
+        output_format: Default format, "pstats" or "collapsed"
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        sample_rate: float = 1.0,
+        allow_requests: bool = False,
+        directory: str = "profiles",
+        output_format: str = "pstats",
+    ):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format: {output_format}")
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.allow_requests = allow_requests
+        self.directory = directory
+        self.output_format = output_format
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            enabled=os.getenv("SURVEY_PROFILE", "False").lower() == "true",
+            sample_rate=float(os.getenv("SURVEY_PROFILE_SAMPLE", "1.0")),
+            allow_requests=os.getenv("SURVEY_PROFILE_REQUESTS", "False").lower()
+            == "true",
+            directory=os.getenv("SURVEY_PROFILE_DIR", "profiles"),
+            output_format=os.getenv("SURVEY_PROFILE_FORMAT", "pstats"),
+        )
+
+    def sampled(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def session_for_request(
+        self, label: str, requested: Optional[str]
+    ) -> Optional[ProfileSession]:
+        """
+        Return a session for a request, or None to leave it unprofiled.
+
+        Args:
+            label: Names the request in the output file name
+            requested: The request's own profiling flag: a format name, or any
+                other non-empty value for the default format
+        """
+        if requested and self.allow_requests:
+            output_format = requested if requested in FORMATS else self.output_format
+            return ProfileSession(label, output_format, self.directory)
+        if self.sampled():
+            return ProfileSession(label, self.output_format, self.directory)
+        return None
+
+
+profiler = Profiler.from_env()
+
+
+def start(session: Optional[ProfileSession]) -> contextvars.Token:
+    """
+    Make `session` record the hot paths run in this context.
+
+    A None session marks the context as a request left unprofiled, so its hot
+    paths are not sampled one by one.
+    """
+    return _session.set(session)
+
+
+def stop(token: contextvars.Token) -> None:
+    """
+    Stop recording into the session started with `token`.
+
+    Iterators already wrapped by profile_iter keep recording into it; call the
+    session's finish() once they are exhausted to write the profile.
+    """
+    _session.reset(token)
+
+
+def profiled(operation: str) -> Callable[[Callable], Callable]:
+    """Decorator marking a hot path; records it into the active session."""
+
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                session = _session.get()
+            except LookupError:
+                # Work outside a request, such as a background flush, is
+                # sampled once at its outermost hot path.
+                if not profiler.sampled():
+                    token = _session.set(None)
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        _session.reset(token)
+                session = ProfileSession(
+                    operation, profiler.output_format, profiler.directory
+                )
+                try:
+                    return session.run(func, *args, **kwargs)
+                finally:
+                    session.finish()
+            if session is not None:
+                return session.run(func, *args, **kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def profile_iter(chunks: Iterable[Any]) -> Iterator[Any]:
+    """
+    Wrap `chunks` so producing each one is recorded into the active session.
+
+    The session is captured now, so a response body streamed after the request
+    handler has returned is still recorded.
+    """
+    session = _session.get(None)
+    if session is None:
+        return iter(chunks)
+    return _profiled_chunks(session, iter(chunks))
+
+
+def _profiled_chunks(session: ProfileSession, iterator: Iterator[Any]):
+    sentinel = object()
+    while True:
+        chunk = session.run(next, iterator, sentinel)
+        if chunk is sentinel:
+            return
+        yield chunk
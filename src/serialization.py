@@ -0,0 +1,168 @@
+"""
+JSON encoding shared by the storage backends and the API responses.
+
+The encoder is orjson when it is installed and the standard library otherwise;
+SURVEY_JSON_ENGINE=json forces the standard library. Both produce compact
+UTF-8 bytes and accept Fragment values, which are spliced into the output
+as-is so parts that rarely change are encoded only once.
+"""
+
+import json
+import os
+import re
+import uuid
+from typing import Any, Callable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class Fragment:
+    """Already encoded JSON that dumps copies into its output verbatim."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class JsonSerializer:
+    """Serializer backed by the standard library json module."""
+
+    name = "json"
+
+    def __init__(self):
+        # A Fragment is encoded as this marker and then replaced; the random
+        # token keeps ordinary strings from ever matching it.
+        self._token = uuid.uuid4().hex
+        self._marker = re.compile(
+            rb'"\\u0000' + self._token.encode("ascii") + rb':(\d+)\\u0000"'
+        )
+
+    def dumps(
+        self,
+        obj: Any,
+        sort_keys: bool = False,
+        default: Optional[Callable[[Any], Any]] = None,
+    ) -> bytes:
+        """
+        Encode `obj` as compact UTF-8 JSON.
+
+        Args:
+            obj: The value to encode; may contain Fragment values
+            sort_keys: Emit object keys in sorted order
+            default: Called for values the encoder cannot handle
+
+        Raises:
+            TypeError: If a value cannot be encoded
+        """
+        fragments: List[Fragment] = []
+
+        def hook(value: Any) -> Any:
+            if isinstance(value, Fragment):
+                fragments.append(value)
+                return f"\x00{self._token}:{len(fragments) - 1}\x00"
+            if default is not None:
+                return default(value)
+            raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+        data = self._encode(obj, sort_keys, hook)
+        if fragments:
+            data = self._marker.sub(lambda m: fragments[int(m.group(1))].data, data)
+        return data
+
+    def loads(self, data: Any) -> Any:
+        """Decode JSON from bytes or str; raises json.JSONDecodeError."""
+        return json.loads(data)
+
+    def fragment(self, obj: Any) -> Fragment:
+        """Encode `obj` once, with sorted keys, for reuse inside later output."""
+        return Fragment(self.dumps(obj, sort_keys=True))
+
+    def _encode(self, obj: Any, sort_keys: bool, hook: Callable) -> bytes:
+        text = json.dumps(
+            obj,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            sort_keys=sort_keys,
+            default=hook,
+        )
+        try:
+            return text.encode("utf-8")
+        except UnicodeEncodeError:
+            # Lone surrogates have no UTF-8 form; escaping everything keeps
+            # them as \ud800-style escapes that decode back to the same text.
+            return json.dumps(
+                obj, separators=(",", ":"), sort_keys=sort_keys, default=hook
+            ).encode("ascii")
+
+
+class OrjsonSerializer(JsonSerializer):
+    """
+    Serializer backed by orjson.
+
+    Values orjson rejects but the json module accepts, such as integers wider
+    than 64 bits or strings with lone surrogates, fall back to the json module.
+    """
+
+    name = "orjson"
+
+    def loads(self, data: Any) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+    def _encode(self, obj: Any, sort_keys: bool, hook: Callable) -> bytes:
+        option = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=hook, option=option)
+        except orjson.JSONEncodeError:
+            return super()._encode(obj, sort_keys, hook)
+
+
+def get_serializer(name: Optional[str] = None) -> JsonSerializer:
+    """
+    Create a serializer by engine name.
+
+    Args:
+        name: "orjson" or "json"; defaults to SURVEY_JSON_ENGINE, then to
+            orjson when it is installed
+
+    Raises:
+        ValueError: If the engine is unknown or orjson is not installed
+    """
+    if name is None:
+        name = os.getenv("SURVEY_JSON_ENGINE") or (
+            "orjson" if orjson is not None else "json"
+        )
+    if name == "json":
+        return JsonSerializer()
+    if name == "orjson":
+        if orjson is None:
+            raise ValueError("The orjson engine requires the orjson package")
+        return OrjsonSerializer()
+    raise ValueError(f"Unknown JSON engine: {name}")
+
+
+serializer = get_serializer()
+
+
+def dumps(obj: Any) -> bytes:
+    return serializer.dumps(obj)
+
+
+def loads(data: Any) -> Any:
+    return serializer.loads(data)
+
+
+def fragment(obj: Any) -> Fragment:
+    return serializer.fragment(obj)
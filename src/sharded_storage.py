@@ -0,0 +1,429 @@
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+
+from src import serialization
+from src.models import Survey, Question, SurveyStatus
+from src.storage import (
+    BaseStorage,
+    ProcessLock,
+    StorageError,
+    SurveyIndex,
+    atomic_write,
+)
+
+
+class ShardedSurveyStorage(BaseStorage):
+    """
+    Storage backend keeping each survey in its own files under one directory.
+
+    Layout under `root`:
+        manifest.jsonl               a log of every survey's id, creation time
+                                     and status, one line per change
+        surveys/<id>.json            a survey's metadata and questions
+        responses/<id>/<n>.jsonl     the survey's responses, one JSON object per
+                                     line, in segments of `segment_size` lines
+
+    A change to one survey rewrites or appends to that survey's files only, so
+    writes to different surveys never serialize each other's data, and deleting
+    a survey removes its files. Creating, publishing or deleting a survey
+    appends one line to the manifest, which is rewritten only once it holds
+    `compact_every` lines more than there are surveys. The manifest lets surveys
+    be listed without reading them. Each survey is loaded on first access, and
+    beyond `max_loaded` surveys the least recently used ones without a change
+    in progress are dropped from memory again.
+
+    One process owns the whole directory: the manifest and the cached surveys
+    are not shared, so a second process opening `root` fails on its lock.
+    Splitting the shards between worker processes is not supported; use the
+    sqlite backend to serve one store from several processes.
+    """
+
+    def __init__(
+        self,
+        root: str = "surveys_data",
+        segment_size: int = 10000,
+        max_loaded: int = 1000,
+        compact_every: int = 1000,
+    ):
+        self.root = root
+        self.segment_size = segment_size
+        self.max_loaded = max_loaded
+        self.compact_every = compact_every
+        self.manifest_path = os.path.join(root, "manifest.jsonl")
+        self._surveys_dir = os.path.join(root, "surveys")
+        self._responses_dir = os.path.join(root, "responses")
+        os.makedirs(self._surveys_dir, exist_ok=True)
+        os.makedirs(self._responses_dir, exist_ok=True)
+        # _lock guards the index, the cache and the manifest; each Survey's own
+        # lock orders the writes to that survey's files.
+        self._lock = threading.RLock()
+        self._index = SurveyIndex()
+        # Loaded surveys, least recently used first, and the ones with a change
+        # in progress, which must not be dropped and loaded again meanwhile.
+        self._cache: Dict[str, Survey] = OrderedDict()
+        self._pinned: Dict[str, int] = {}
+        self._manifest_lines = 0
+        # Current response segment of each survey that has been loaded or
+        # counted: (number, line count).
+        self._segments: Dict[str, Tuple[int, int]] = {}
+        self._process_lock = ProcessLock(os.path.join(root, ".lock"))
+        self._load_manifest()
+
+    def create_survey(self, title: str, description: str = "") -> Survey:
+        self._process_lock.check()
+        survey = Survey(title=title, description=description)
+        with self._lock:
+            self._write_survey_file(survey)
+            self._index.add(survey.id, survey.created_at, survey.status)
+            self._cache[survey.id] = survey
+            self._segments[survey.id] = (0, 0)
+            self._log_manifest(survey.id)
+            self._evict()
+        return survey
+
+    def get_survey(self, survey_id: str) -> Optional[Survey]:
+        self._process_lock.check()
+        with self._lock:
+            survey = self._cache.get(survey_id)
+            if survey is not None:
+                self._cache.move_to_end(survey_id)
+                return survey
+            if survey_id not in self._index:
+                return None
+            survey = self._load_survey(survey_id)
+            self._cache[survey_id] = survey
+            self._evict()
+            return survey
+
+    def list_surveys(self) -> List[Survey]:
+        surveys = [self.get_survey(survey_id) for survey_id in self._index]
+        return [s for s in surveys if s is not None]
+
+    def list_surveys_page(
+        self,
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Survey], Optional[str]]:
+        self._process_lock.check()
+        with self._lock:
+            survey_ids, next_cursor = self._index.page(status, cursor, limit)
+        surveys = [self.get_survey(survey_id) for survey_id in survey_ids]
+        return [s for s in surveys if s is not None], next_cursor
+
+    def delete_survey(self, survey_id: str) -> bool:
+        self._process_lock.check()
+        with self._lock:
+            if survey_id not in self._index:
+                return False
+            # The survey file marks existence, so it goes first.
+            os.remove(self._survey_path(survey_id))
+            shutil.rmtree(self._segment_dir(survey_id), ignore_errors=True)
+            self._index.remove(survey_id)
+            self._cache.pop(survey_id, None)
+            self._segments.pop(survey_id, None)
+            self._log_manifest(survey_id)
+        return True
+
+    def add_question_to_survey(
+        self, survey_id: str, question_type: str, text: str, **kwargs
+    ) -> Question:
+        with self._updating(survey_id) as survey:
+            question = self._create_question(question_type, text, **kwargs)
+            with survey.lock:
+                survey.add_question(question)
+                self._write_survey_file(survey)
+        return question
+
+    def publish_survey(self, survey_id: str) -> Survey:
+        with self._updating(survey_id) as survey:
+            with survey.lock:
+                survey.publish()
+                self._write_survey_file(survey)
+            with self._lock:
+                self._index.set_status(survey.id, survey.status)
+                self._log_manifest(survey.id)
+        return survey
+
+    def add_response(
+        self, survey_id: str, answers: Dict[str, Any], durable: bool = False
+    ) -> str:
+        with self._updating(survey_id) as survey:
+            response = survey.create_response(answers)
+            with survey.lock:
+                self._append_responses(survey, [response], durable)
+                survey.append_response(response)
+        return response["id"]
+
+    def add_responses(
+        self, survey_id: str, batch: List[Dict[str, Any]], durable: bool = False
+    ) -> List[Dict[str, Any]]:
+        with self._updating(survey_id) as survey:
+            records, results = survey.create_responses(batch)
+            if not records:
+                return results
+            with survey.lock:
+                self._append_responses(survey, records, durable)
+                survey.append_responses(records)
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            survey_ids = list(self._index)
+            segments = dict(self._segments)
+        responses = 0
+        for survey_id in survey_ids:
+            if survey_id not in segments:
+                segments[survey_id] = self._count_segments(survey_id)
+                with self._lock:
+                    # Counted once; appends keep the entry current from here.
+                    if survey_id in self._index:
+                        self._segments.setdefault(survey_id, segments[survey_id])
+            number, count = segments[survey_id]
+            responses += number * self.segment_size + count
+        size = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                try:
+                    size += os.path.getsize(os.path.join(directory, name))
+                except OSError:
+                    pass  # Removed since it was listed.
+        return {"surveys": len(survey_ids), "responses": responses, "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._process_lock.close()
+
+    @contextmanager
+    def _updating(self, survey_id: str) -> Iterator[Survey]:
+        """Yield a survey for a change, keeping it cached until the change is made.
+
+        Raises:
+            ValueError: If the survey does not exist
+        """
+        with self._lock:
+            survey = self.get_survey(survey_id)
+            if not survey:
+                raise ValueError(f"Survey {survey_id} not found")
+            self._pinned[survey_id] = self._pinned.get(survey_id, 0) + 1
+        try:
+            yield survey
+        finally:
+            with self._lock:
+                self._pinned[survey_id] -= 1
+                if not self._pinned[survey_id]:
+                    del self._pinned[survey_id]
+
+    def _evict(self) -> None:
+        # Every change is on disk once made, so any survey can be dropped except
+        # the one just requested and those with a change in progress.
+        excess = len(self._cache) - self.max_loaded
+        if excess <= 0:
+            return
+        evictable = [
+            survey_id
+            for survey_id in list(self._cache)[:-1]
+            if survey_id not in self._pinned
+        ]
+        for survey_id in evictable[:excess]:
+            del self._cache[survey_id]
+
+    def _survey_path(self, survey_id: str) -> str:
+        return os.path.join(self._surveys_dir, survey_id + ".json")
+
+    def _segment_dir(self, survey_id: str) -> str:
+        return os.path.join(self._responses_dir, survey_id)
+
+    def _segment_path(self, survey_id: str, number: int) -> str:
+        return os.path.join(self._segment_dir(survey_id), f"{number:08d}.jsonl")
+
+    def _write_survey_file(self, survey: Survey) -> None:
+        data = {
+            "id": survey.id,
+            "title": survey.title,
+            "description": survey.description,
+            "status": survey.status.value,
+            "created_at": survey.created_at.isoformat(),
+            "questions": survey.questions_fragment(),
+        }
+        atomic_write(self._survey_path(survey.id), serialization.dumps(data))
+
+    def _manifest_line(self, survey_id: str) -> bytes:
+        indexed = self._index.get(survey_id)
+        if indexed is None:
+            return serialization.dumps({"id": survey_id, "deleted": True}) + b"\n"
+        created_at, status = indexed
+        entry = {
+            "id": survey_id,
+            "created_at": created_at.isoformat(),
+            "status": status.value,
+        }
+        return serialization.dumps(entry) + b"\n"
+
+    def _log_manifest(self, survey_id: str) -> None:
+        """
+        Append a survey's current index entry, or its removal, to the manifest.
+
+        The survey files are the source of truth and the manifest is rebuilt
+        from them after a crash, so the append is not fsynced.
+        """
+        with open(self.manifest_path, "ab") as f:
+            f.write(self._manifest_line(survey_id))
+        self._manifest_lines += 1
+        if self._manifest_lines - len(self._index) >= self.compact_every:
+            self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        """Rewrite the manifest with one line per survey."""
+        atomic_write(
+            self.manifest_path,
+            b"".join(self._manifest_line(survey_id) for survey_id in self._index),
+        )
+        self._manifest_lines = len(self._index)
+
+    def _append_responses(
+        self, survey: Survey, records: List[Dict[str, Any]], durable: bool
+    ) -> None:
+        os.makedirs(self._segment_dir(survey.id), exist_ok=True)
+        number, count = self._segments.get(survey.id, (0, 0))
+        position = 0
+        while position < len(records):
+            if count >= self.segment_size:
+                number, count = number + 1, 0
+            chunk = records[position : position + self.segment_size - count]
+            with open(self._segment_path(survey.id, number), "ab") as f:
+                f.write(b"".join(serialization.dumps(r) + b"\n" for r in chunk))
+                f.flush()
+                if durable:
+                    os.fsync(f.fileno())
+            count += len(chunk)
+            position += len(chunk)
+        self._segments[survey.id] = (number, count)
+
+    def _count_segments(self, survey_id: str) -> Tuple[int, int]:
+        """(number, line count) of a survey's last segment, read from disk."""
+        directory = self._segment_dir(survey_id)
+        try:
+            names = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return 0, 0
+        if not names:
+            return 0, 0
+        with open(os.path.join(directory, names[-1]), "rb") as f:
+            count = f.read().count(b"\n")
+        return int(names[-1].split(".")[0]), count
+
+    def _load_manifest(self) -> None:
+        """
+        Build the listing index by replaying the manifest.
+
+        The survey files decide which surveys exist: a survey missing from the
+        manifest (a crash after its file was written) is read from its file, and
+        an entry without a file (a crash during a delete) is dropped. A manifest
+        that needed either repair, or has a line that cannot be read, is
+        rewritten.
+        """
+        entries: Dict[str, Dict[str, Any]] = {}
+        changed = False
+        lines: List[bytes] = []
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "rb") as f:
+                lines = f.read().split(b"\n")
+            # A complete manifest ends with a newline, leaving an empty last part.
+            changed = lines.pop() != b""
+        for line in lines:
+            try:
+                entry = serialization.loads(line)
+                if entry.get("deleted"):
+                    entries.pop(entry["id"], None)
+                else:
+                    entries[entry["id"]] = entry
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+                changed = True
+        self._manifest_lines = len(lines)
+        survey_ids = [
+            name[: -len(".json")]
+            for name in os.listdir(self._surveys_dir)
+            if name.endswith(".json")
+        ]
+        changed = changed or len(entries) != len(survey_ids)
+        indexed = []
+        for survey_id in survey_ids:
+            entry = entries.get(survey_id)
+            if entry is None:
+                entry = self._read_survey_file(survey_id)
+                changed = True
+            try:
+                created_at = datetime.fromisoformat(entry["created_at"])
+                status = SurveyStatus(entry["status"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise StorageError(f"Error loading survey {survey_id}: {e}") from e
+            indexed.append((created_at, survey_id, status))
+        # In creation order, as list_surveys follows the order surveys were added.
+        for created_at, survey_id, status in sorted(indexed):
+            self._index.add(survey_id, created_at, status)
+        if changed:
+            self._write_manifest()
+
+    def _read_survey_file(self, survey_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._survey_path(survey_id), "rb") as f:
+                return serialization.loads(f.read())
+        except (OSError, json.JSONDecodeError) as e:
+            raise StorageError(f"Error loading survey {survey_id}: {e}") from e
+
+    def _load_survey(self, survey_id: str) -> Survey:
+        data = self._read_survey_file(survey_id)
+        try:
+            survey = Survey.restore(
+                data["id"],
+                data["title"],
+                data["description"],
+                [
+                    self._restore_question(q_data)
+                    for q_data in data.get("questions", [])
+                ],
+                SurveyStatus(data["status"]),
+                datetime.fromisoformat(data["created_at"]),
+            )
+            survey.restore_responses(self._read_responses(survey))
+        except (KeyError, TypeError, ValueError) as e:
+            raise StorageError(f"Error loading survey {survey_id}: {e}") from e
+        indexed = self._index.get(survey_id)
+        if indexed is not None and indexed[1] != survey.status:
+            # A crash between writing the survey file and the manifest.
+            self._index.set_status(survey_id, survey.status)
+            self._log_manifest(survey_id)
+        return survey
+
+    def _read_responses(self, survey: Survey) -> List[Dict[str, Any]]:
+        directory = self._segment_dir(survey.id)
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        responses = []
+        number, count = 0, 0
+        for name in names:
+            number = int(name.split(".")[0])
+            path = os.path.join(directory, name)
+            with open(path, "rb") as f:
+                payload = f.read()
+            end = payload.rfind(b"\n") + 1
+            if end < len(payload):
+                # A torn final line from an interrupted append; drop it so the
+                # next append starts on a fresh line.
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+                payload = payload[:end]
+            lines = payload.splitlines()
+            for line in lines:
+                response = serialization.loads(line)
+                self._validate_stored_response(survey, response)
+                responses.append(response)
+            count = len(lines)
+        self._segments[survey.id] = (number, count)
+        return responses
@@ -0,0 +1,272 @@
+"""
+Snapshot file formats for SurveyStorage.
+
+    json     One JSON document, {"saved_at": ..., "surveys": [...]}, readable by
+             any tool and used for import and export. A full load parses the
+             whole file.
+    binary   A versioned, self-indexing layout meant to be memory-mapped. Opening
+             it reads only the directory at the end of the file; each survey is
+             decoded when it is first needed.
+
+Both formats hold every survey as the same compact JSON record, so converting
+between them copies records without encoding them again.
+
+Binary layout, all integers little-endian:
+    header      magic b"SURVEYS\\0", format version (u16), reserved (u16),
+                survey count (u32), saved_at in microseconds since the epoch
+                (i64), directory offset (u64), directory length (u64),
+                directory CRC-32 (u32)
+    records     the survey records, back to back
+    directory   per survey: record offset (u64), record length (u32), response
+                count (u32), question count (u32), created_at in microseconds
+                since the epoch (i64), status code (u8), record SHA-256 (32
+                bytes), id length (u16), title length (u16), then the UTF-8 id
+                and title
+
+Usage:
+    python -m src.snapshot surveys_data.json surveys_data.bin --format binary
+"""
+
+import argparse
+import hashlib
+import mmap
+import struct
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from src import serialization
+from src.columnar import EPOCH, ONE_MICROSECOND, timestamp_micros
+
+FORMATS = ("json", "binary")
+MAGIC = b"SURVEYS\x00"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHHIqQQI")
+_ENTRY = struct.Struct("<QIIIqB32sHH")
+# Fixed codes, so the format does not depend on the order of SurveyStatus.
+_STATUS_CODES = {"draft": 0, "published": 1, "closed": 2}
+_STATUSES = {code: status for status, code in _STATUS_CODES.items()}
+
+# One survey: its index entry ("id", "title", "created_at", "status",
+# "questions" and "responses", the last two being counts) and its encoded
+# record.
+Record = Tuple[Dict[str, Any], bytes]
+
+
+def detect_format(path: str) -> str:
+    """Return "binary" if `path` starts with the binary magic, else "json"."""
+    with open(path, "rb") as f:
+        return "binary" if f.read(len(MAGIC)) == MAGIC else "json"
+
+
+def encode(
+    records: List[Record], saved_at: datetime, snapshot_format: str
+) -> Tuple[bytes, List[Dict[str, Any]]]:
+    """
+    Lay out a snapshot file.
+
+    Args:
+        records: The surveys to write, in order
+        saved_at: Stored in the snapshot header
+        snapshot_format: "json" or "binary"
+
+    Returns:
+        Tuple of the file contents and the index: each record's entry extended
+        with the "offset", "length" and "sha256" of its record in the file
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if snapshot_format == "json":
+        return _encode_json(records, saved_at)
+    if snapshot_format == "binary":
+        return _encode_binary(records, saved_at)
+    raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+
+
+def _encode_json(
+    records: List[Record], saved_at: datetime
+) -> Tuple[bytes, List[Dict[str, Any]]]:
+    header = serialization.dumps({"saved_at": saved_at.isoformat()})
+    parts = [header[:-1] + b',"surveys":[\n']
+    offset = len(parts[0])
+    index = []
+    for entry, chunk in records:
+        if index:
+            parts.append(b",\n")
+            offset += 2
+        index.append(_located(entry, offset, chunk, hashlib.sha256(chunk).hexdigest()))
+        parts.append(chunk)
+        offset += len(chunk)
+    parts.append(b"\n]}")
+    return b"".join(parts), index
+
+
+def _encode_binary(
+    records: List[Record], saved_at: datetime
+) -> Tuple[bytes, List[Dict[str, Any]]]:
+    parts = [b""]
+    directory = []
+    offset = _HEADER.size
+    index = []
+    for entry, chunk in records:
+        digest = hashlib.sha256(chunk).digest()
+        survey_id = entry["id"].encode("utf-8")
+        title = entry["title"].encode("utf-8")
+        directory.append(
+            _ENTRY.pack(
+                offset,
+                len(chunk),
+                entry["responses"],
+                entry["questions"],
+                timestamp_micros(datetime.fromisoformat(entry["created_at"])),
+                _STATUS_CODES[entry["status"]],
+                digest,
+                len(survey_id),
+                len(title),
+            )
+        )
+        directory.append(survey_id)
+        directory.append(title)
+        index.append(_located(entry, offset, chunk, digest.hex()))
+        parts.append(chunk)
+        offset += len(chunk)
+    directory_bytes = b"".join(directory)
+    parts[0] = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        0,
+        len(index),
+        timestamp_micros(saved_at),
+        offset,
+        len(directory_bytes),
+        zlib.crc32(directory_bytes),
+    )
+    parts.append(directory_bytes)
+    return b"".join(parts), index
+
+
+def _located(
+    entry: Dict[str, Any], offset: int, chunk: bytes, sha256: str
+) -> Dict[str, Any]:
+    return {**entry, "offset": offset, "length": len(chunk), "sha256": sha256}
+
+
+class MappedFile:
+    """A whole file mapped read-only into memory."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._map[offset : offset + length]
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class BinarySnapshot(MappedFile):
+    """
+    A binary snapshot mapped into memory, with its directory already read.
+
+    Attributes:
+        saved_at: When the snapshot was written
+        index: One entry per survey, in file order, shaped like the index
+            returned by encode
+
+    Raises:
+        ValueError: If the file is not a complete binary snapshot of a
+            supported version
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        try:
+            self.saved_at, self.index = self._read_directory()
+        except (struct.error, KeyError, UnicodeDecodeError) as e:
+            self.close()
+            raise ValueError(f"Corrupt snapshot directory: {e}") from e
+        except ValueError:
+            self.close()
+            raise
+
+    def _read_directory(self) -> Tuple[datetime, List[Dict[str, Any]]]:
+        size = len(self._map)
+        if size < _HEADER.size:
+            raise ValueError("Truncated snapshot header")
+        magic, version, _, count, saved_at, dir_offset, dir_length, crc = (
+            _HEADER.unpack_from(self._map, 0)
+        )
+        if magic != MAGIC:
+            raise ValueError("Not a binary survey snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        if dir_offset + dir_length != size:
+            raise ValueError("Truncated snapshot")
+        directory = self._map[dir_offset:size]
+        if zlib.crc32(directory) != crc:
+            raise ValueError("Snapshot directory checksum mismatch")
+        index = []
+        position = 0
+        for _ in range(count):
+            (
+                offset,
+                length,
+                responses,
+                questions,
+                created_at,
+                status,
+                digest,
+                id_length,
+                title_length,
+            ) = _ENTRY.unpack_from(directory, position)
+            position += _ENTRY.size
+            survey_id = directory[position : position + id_length].decode("utf-8")
+            position += id_length
+            title = directory[position : position + title_length].decode("utf-8")
+            position += title_length
+            if offset < _HEADER.size or offset + length > dir_offset:
+                raise ValueError(f"Record of survey {survey_id} is out of bounds")
+            index.append(
+                {
+                    "id": survey_id,
+                    "title": title,
+                    "created_at": (EPOCH + created_at * ONE_MICROSECOND).isoformat(),
+                    "status": _STATUSES[status],
+                    "questions": questions,
+                    "responses": responses,
+                    "offset": offset,
+                    "length": length,
+                    "sha256": digest.hex(),
+                }
+            )
+        if position != dir_length:
+            raise ValueError("Snapshot directory length mismatch")
+        return EPOCH + saved_at * ONE_MICROSECOND, index
+
+
+def main() -> None:
+    from src.storage import convert_snapshot
+
+    parser = argparse.ArgumentParser(
+        description="Convert a survey snapshot between the JSON and binary formats."
+    )
+    parser.add_argument("source", help="Snapshot to read, in either format")
+    parser.add_argument("target", help="File to write")
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="Format to write; defaults to the one the source is not in",
+    )
+    args = parser.parse_args()
+    snapshot_format = args.format or (
+        "json" if detect_format(args.source) == "binary" else "binary"
+    )
+    count = convert_snapshot(args.source, args.target, snapshot_format)
+    print(f"wrote {count} surveys to {args.target} ({snapshot_format})")
+
+
+if __name__ == "__main__":
+    main()
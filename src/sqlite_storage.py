@@ -0,0 +1,455 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional, Dict, Any, Tuple
+
+from src import serialization
+from src.models import Survey, Question, SurveyStatus
+from src.storage import BaseStorage, decode_cursor, encode_cursor
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS surveys (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_surveys_created ON surveys (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_surveys_status ON surveys (status, created_at, id);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY,
+    survey_id TEXT NOT NULL REFERENCES surveys (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    text TEXT NOT NULL,
+    options TEXT,
+    min_value INTEGER,
+    max_value INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_questions_survey ON questions (survey_id, position);
+
+CREATE TABLE IF NOT EXISTS responses (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    survey_id TEXT NOT NULL REFERENCES surveys (id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL,
+    answers TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_survey ON responses (survey_id, seq);
+"""
+
+# The SQL computing each Survey.to_dict field other than "questions".
+SUMMARY_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "status": "status",
+    "question_count": "(SELECT COUNT(*) FROM questions WHERE survey_id = surveys.id)",
+    "response_count": "(SELECT COUNT(*) FROM responses WHERE survey_id = surveys.id)",
+    "created_at": "created_at",
+}
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Storage backend keeping surveys, questions and responses in SQLite tables.
+
+    Nothing is loaded at startup: a survey is read from the database the first
+    time it is requested and cached afterwards, and every mutation writes only
+    the rows of the survey it touches. Beyond `max_loaded` cached surveys, the
+    least recently used ones without a change in progress are dropped again.
+
+    Several processes can share one database. SQLite's data_version tells when
+    another connection has committed; a cached survey then catches up on the
+    status, questions and responses added since it was last read. Writes run in
+    IMMEDIATE transactions that catch up first, so no other process can commit
+    in between.
+    """
+
+    def __init__(
+        self, db_path: str = "surveys.db", timeout: float = 30.0, max_loaded: int = 1000
+    ):
+        self.db_path = db_path
+        self.max_loaded = max_loaded
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        # Cached surveys, least recently used first, and the ones with a change
+        # in progress, which must stay cached until their write is made.
+        self._cache: Dict[str, Survey] = OrderedDict()
+        self._pinned: Dict[str, int] = {}
+        # Per cached survey: the data_version it was read at and its last seq.
+        self._synced: Dict[str, Tuple[int, int]] = {}
+
+    def create_survey(self, title: str, description: str = "") -> Survey:
+        survey = Survey(title=title, description=description)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO surveys (id, title, description, status, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    survey.id,
+                    survey.title,
+                    survey.description,
+                    survey.status.value,
+                    survey.created_at.isoformat(),
+                ),
+            )
+            self._cache[survey.id] = survey
+            self._synced[survey.id] = (self._data_version(), 0)
+            self._evict()
+        return survey
+
+    def get_survey(self, survey_id: str) -> Optional[Survey]:
+        with self._lock:
+            if survey_id not in self._cache:
+                survey = self._load_survey(survey_id)
+                self._evict()
+                return survey
+            self._cache.move_to_end(survey_id)
+            if self._synced[survey_id][0] != self._data_version():
+                return self._sync(survey_id)
+            return self._cache[survey_id]
+
+    def list_surveys(self) -> List[Survey]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM surveys ORDER BY created_at, id"
+            ).fetchall()
+        surveys = [self.get_survey(row["id"]) for row in rows]
+        return [s for s in surveys if s is not None]
+
+    def list_surveys_page(
+        self,
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Survey], Optional[str]]:
+        rows, next_cursor = self._page(["id"], status, cursor, limit)
+        surveys = [self.get_survey(row["id"]) for row in rows]
+        return [s for s in surveys if s is not None], next_cursor
+
+    def list_survey_summaries_page(
+        self,
+        fields: List[str],
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of survey projections, read by SQL without loading rows."""
+        if "questions" in fields:
+            return super().list_survey_summaries_page(fields, status, cursor, limit)
+        unknown = [f for f in fields if f not in SUMMARY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown survey field: {unknown[0]}")
+        rows, next_cursor = self._page(
+            [f"{SUMMARY_COLUMNS[f]} AS {f}" for f in fields], status, cursor, limit
+        )
+        return [{f: row[f] for f in fields} for row in rows], next_cursor
+
+    def delete_survey(self, survey_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM surveys WHERE id = ?", (survey_id,)
+            )
+            self._forget(survey_id)
+        return cursor.rowcount > 0
+
+    def add_question_to_survey(
+        self, survey_id: str, question_type: str, text: str, **kwargs
+    ) -> Question:
+        with self._updating(survey_id) as survey:
+            question = self._create_question(question_type, text, **kwargs)
+            q_data = self._question_to_data(question)
+            with self._write(survey), survey.lock:
+                survey.add_question(question)
+                position = len(survey.questions) - 1
+                self._conn.execute(
+                    "INSERT INTO questions (id, survey_id, position, type, text,"
+                    " options, min_value, max_value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        question.id,
+                        survey.id,
+                        position,
+                        q_data["type"],
+                        q_data["text"],
+                        json.dumps(q_data["options"]) if "options" in q_data else None,
+                        q_data.get("min_value"),
+                        q_data.get("max_value"),
+                    ),
+                )
+        return question
+
+    def publish_survey(self, survey_id: str) -> Survey:
+        with self._updating(survey_id) as survey, self._write(survey):
+            survey.publish()
+            self._conn.execute(
+                "UPDATE surveys SET status = ? WHERE id = ?",
+                (survey.status.value, survey.id),
+            )
+        return survey
+
+    def add_response(
+        self, survey_id: str, answers: Dict[str, Any], durable: bool = False
+    ) -> str:
+        with self._updating(survey_id) as survey:
+            response = survey.create_response(answers)
+            with self._write(survey, durable):
+                cursor = self._conn.execute(
+                    "INSERT INTO responses (id, survey_id, timestamp, answers)"
+                    " VALUES (?, ?, ?, ?)",
+                    (
+                        response["id"],
+                        survey.id,
+                        response["timestamp"],
+                        serialization.dumps(response["answers"]).decode("utf-8"),
+                    ),
+                )
+                survey.append_response(response)
+                self._synced[survey.id] = (
+                    self._synced[survey.id][0],
+                    cursor.lastrowid,
+                )
+        return response["id"]
+
+    def add_responses(
+        self, survey_id: str, batch: List[Dict[str, Any]], durable: bool = False
+    ) -> List[Dict[str, Any]]:
+        with self._updating(survey_id) as survey:
+            records, results = survey.create_responses(batch)
+            if not records:
+                return results
+            with self._write(survey, durable):
+                self._conn.executemany(
+                    "INSERT INTO responses (id, survey_id, timestamp, answers)"
+                    " VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            r["id"],
+                            survey.id,
+                            r["timestamp"],
+                            serialization.dumps(r["answers"]).decode("utf-8"),
+                        )
+                        for r in records
+                    ],
+                )
+                survey.append_responses(records)
+                (last_seq,) = self._conn.execute(
+                    "SELECT last_insert_rowid()"
+                ).fetchone()
+                self._synced[survey.id] = (self._synced[survey.id][0], last_seq)
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _page(
+        self,
+        columns: List[str],
+        status: Optional[SurveyStatus],
+        cursor: Optional[str],
+        limit: int,
+    ) -> Tuple[List[sqlite3.Row], Optional[str]]:
+        """Select `columns` of one page of surveys, and the next page's cursor."""
+        clauses = []
+        params: List[Any] = []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status.value)
+        if cursor is not None:
+            clauses.append("(created_at, id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)}, id AS page_id,"
+                f" created_at AS page_created_at FROM surveys{where}"
+                " ORDER BY created_at, id LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["page_created_at"], rows[-1]["page_id"])
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @contextmanager
+    def _updating(self, survey_id: str) -> Iterator[Survey]:
+        """Yield a survey for a change, keeping it cached until the change is made.
+
+        Raises:
+            ValueError: If the survey does not exist
+        """
+        with self._lock:
+            survey = self.get_survey(survey_id)
+            if not survey:
+                raise ValueError(f"Survey {survey_id} not found")
+            self._pinned[survey_id] = self._pinned.get(survey_id, 0) + 1
+        try:
+            yield survey
+        finally:
+            with self._lock:
+                self._pinned[survey_id] -= 1
+                if not self._pinned[survey_id]:
+                    del self._pinned[survey_id]
+
+    def _evict(self) -> None:
+        # Every change is committed once made, so any survey can be dropped
+        # except the one just requested and those with a change in progress.
+        excess = len(self._cache) - self.max_loaded
+        if excess <= 0:
+            return
+        evictable = [
+            survey_id
+            for survey_id in list(self._cache)[:-1]
+            if survey_id not in self._pinned
+        ]
+        for survey_id in evictable[:excess]:
+            self._forget(survey_id)
+
+    @contextmanager
+    def _write(self, survey: Survey, durable: bool = False) -> Iterator[None]:
+        """Run one write transaction on a survey, first catching up on it.
+
+        With synchronous=NORMAL a WAL commit survives a crash of the process
+        but not of the machine; a `durable` transaction is committed with
+        synchronous=FULL, which fsyncs the WAL before returning.
+
+        Raises:
+            ValueError: If another process deleted the survey
+        """
+        with self._lock:
+            if durable:
+                self._conn.execute("PRAGMA synchronous=FULL")
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if survey.id in self._cache and self._sync(survey.id) is None:
+                        raise ValueError(f"Survey {survey.id} not found")
+                    yield
+                except BaseException:
+                    self._conn.rollback()
+                    raise
+                self._conn.commit()
+            finally:
+                if durable:
+                    self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _forget(self, survey_id: str) -> None:
+        self._cache.pop(survey_id, None)
+        self._synced.pop(survey_id, None)
+
+    def _sync(self, survey_id: str) -> Optional[Survey]:
+        """Apply other processes' changes to a cached survey; None if deleted."""
+        version = self._data_version()
+        survey = self._cache[survey_id]
+        row = self._conn.execute(
+            "SELECT status FROM surveys WHERE id = ?", (survey_id,)
+        ).fetchone()
+        if row is None:
+            self._forget(survey_id)
+            return None
+        _, last_seq = self._synced[survey_id]
+        with survey.lock:
+            # Questions can only be added to drafts, so add them before the status.
+            for q_row in self._conn.execute(
+                "SELECT * FROM questions WHERE survey_id = ? AND position >= ?"
+                " ORDER BY position",
+                (survey_id, len(survey.questions)),
+            ):
+                survey.add_question(self._restore_question(self._question_row(q_row)))
+            status = SurveyStatus(row["status"])
+            if survey.status != status:
+                survey.status = status
+                survey.version += 1
+            records = []
+            for r_row in self._conn.execute(
+                "SELECT seq, id, timestamp, answers FROM responses"
+                " WHERE survey_id = ? AND seq > ? ORDER BY seq",
+                (survey_id, last_seq),
+            ):
+                records.append(self._response_row(r_row))
+                last_seq = r_row["seq"]
+            survey.append_responses(records)
+        self._synced[survey_id] = (version, last_seq)
+        return survey
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            surveys = self._conn.execute("SELECT COUNT(*) FROM surveys").fetchone()[0]
+            responses = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[
+                0
+            ]
+        paths = [self.db_path + suffix for suffix in ("", "-wal", "-shm")]
+        return {
+            "surveys": surveys,
+            "responses": responses,
+            "bytes": sum(os.path.getsize(p) for p in paths if os.path.exists(p)),
+        }
+
+    def _response_row(self, r_row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": r_row["id"],
+            "timestamp": r_row["timestamp"],
+            "answers": serialization.loads(r_row["answers"]),
+        }
+
+    def _load_survey(self, survey_id: str) -> Optional[Survey]:
+        version = self._data_version()
+        row = self._conn.execute(
+            "SELECT id, title, description, status, created_at FROM surveys"
+            " WHERE id = ?",
+            (survey_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        questions = [
+            self._restore_question(self._question_row(q_row))
+            for q_row in self._conn.execute(
+                "SELECT * FROM questions WHERE survey_id = ? ORDER BY position",
+                (survey_id,),
+            )
+        ]
+        survey = Survey.restore(
+            row["id"],
+            row["title"],
+            row["description"],
+            questions,
+            SurveyStatus(row["status"]),
+            datetime.fromisoformat(row["created_at"]),
+        )
+        records = []
+        last_seq = 0
+        for r_row in self._conn.execute(
+            "SELECT seq, id, timestamp, answers FROM responses"
+            " WHERE survey_id = ? ORDER BY seq",
+            (survey_id,),
+        ):
+            records.append(self._response_row(r_row))
+            last_seq = r_row["seq"]
+        survey.restore_responses(records)
+        self._cache[survey_id] = survey
+        self._synced[survey_id] = (version, last_seq)
+        return survey
+
+    def _question_row(self, q_row: sqlite3.Row) -> Dict[str, Any]:
+        q_data = {"id": q_row["id"], "type": q_row["type"], "text": q_row["text"]}
+        if q_row["options"] is not None:
+            q_data["options"] = json.loads(q_row["options"])
+        if q_row["min_value"] is not None:
+            q_data["min_value"] = q_row["min_value"]
+            q_data["max_value"] = q_row["max_value"]
+        return q_data
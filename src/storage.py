@@ -1,8 +1,27 @@
+import atexit
+import base64
+import gc
+import hashlib
 import json
+import logging
 import os
-from typing import List, Optional, Dict, Any
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - file locking is POSIX-only
+    fcntl = None
+
+from src import metrics, profiling, serialization, snapshot
 from src.models import (
     Survey,
     Question,
@@ -11,44 +30,436 @@ from src.models import (
     ScaleQuestion,
     QuestionType,
     SurveyStatus,
+    QUESTION_CLASSES,
 )
 
+logger = logging.getLogger(__name__)
 
-class SurveyStorage:
-    def __init__(self, storage_path: str = "surveys_data.json"):
-        self.storage_path = storage_path
-        self.surveys: Dict[str, Survey] = {}
-        self.load_from_file()
 
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """
+    Suspend cyclic garbage collection while building many long-lived objects.
+
+    Loading a large store allocates millions of containers, each allocation
+    counting towards the next collection, and every full collection walks all
+    of the objects restored so far.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class StorageError(Exception):
+    """Raised when persisted survey data cannot be read back safely."""
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    Replace `path` with `data` so readers see either the old or the new file.
+
+    The data is written to a temporary file in the same directory, fsynced and
+    renamed over the target; the directory is fsynced so the rename survives a
+    crash.
+
+    Args:
+        path: Destination file
+        data: Complete new file contents
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_snapshot(
+    path: str, records: List[snapshot.Record], snapshot_format: str
+) -> List[Dict[str, Any]]:
+    """
+    Write a snapshot file and, for JSON, the sidecars that describe it.
+
+    A JSON snapshot gets a SHA-256 checksum file, which lets the next load skip
+    re-validation, and an index file for lazy loading. A binary snapshot holds
+    both in its own directory.
+
+    Returns:
+        The index of the written file, as returned by snapshot.encode
+    """
+    payload, index = snapshot.encode(records, datetime.utcnow(), snapshot_format)
+    atomic_write(path, payload)
+    checksum_path, index_path = path + ".sha256", path + ".index"
+    if snapshot_format == "binary":
+        # Left over from a JSON snapshot at the same path.
+        for sidecar in (checksum_path, index_path):
+            if os.path.exists(sidecar):
+                os.unlink(sidecar)
+        return index
+    # Written second: a crash in between leaves a stale checksum, which only
+    # sends the next load down the fully validated path.
+    atomic_write(checksum_path, hashlib.sha256(payload).hexdigest().encode("ascii"))
+    # The index names the exact file it describes, so a crash before it is
+    # replaced only makes the next lazy start load eagerly.
+    stat = os.stat(path)
+    atomic_write(
+        index_path,
+        serialization.dumps(
+            {
+                "snapshot": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+                "surveys": index,
+            }
+        ),
+    )
+    return index
+
+
+def convert_snapshot(source: str, target: str, snapshot_format: str) -> int:
+    """
+    Write the store at `source` to `target` as a snapshot in `snapshot_format`.
+
+    The source is opened as a SurveyStorage, so it is validated exactly as at
+    startup, its journal is included and a process still serving it makes the
+    conversion fail. Records are copied without re-encoding where possible.
+
+    Returns:
+        The number of surveys written
+
+    Raises:
+        StorageError: If the source is in use or holds invalid data
+        ValueError: If the format is unknown
+    """
+    if snapshot_format not in snapshot.FORMATS:
+        raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+    storage = SurveyStorage(
+        storage_path=source, lazy=snapshot.detect_format(source) == "binary"
+    )
+    try:
+        return storage.export_snapshot(target, snapshot_format)
+    finally:
+        storage.close()
+
+
+def encode_cursor(timestamp: str, item_id: str) -> str:
+    """Encode a (timestamp, id) listing position as an opaque, URL-safe cursor."""
+    raw = json.dumps([timestamp, item_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        Tuple of the ISO timestamp and id of the last item seen
+
+    Raises:
+        ValueError: If the cursor is malformed or its timestamp carries a UTC
+            offset; stored timestamps are naive UTC and cannot be compared
+            with one
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, item_id = json.loads(raw)
+        parsed = datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(item_id, str) or parsed.tzinfo is not None:
+        raise ValueError("Invalid cursor")
+    return timestamp, item_id
+
+
+# Survey.to_dict fields held by a snapshot index entry, by the key holding each.
+_INDEX_KEYS = {
+    "id": "id",
+    "title": "title",
+    "status": "status",
+    "created_at": "created_at",
+    "question_count": "questions",
+    "response_count": "responses",
+}
+
+
+# The lock files this process holds, by real path: [owning pid, file, users].
+# fcntl locks belong to the process, so storages opened on the same path in one
+# process share a single lock, released when the last of them closes.
+_held_locks: Dict[str, List[Any]] = {}
+_held_locks_guard = threading.Lock()
+
+
+class ProcessLock:
+    """
+    An exclusive lock on `path`, held for the lifetime of a file-backed storage.
+
+    File-backed storage keeps its data in memory and rewrites the files from
+    there, so a second process using the same files would silently overwrite
+    the first one's changes. Holding this lock makes it fail at startup instead.
+
+    POSIX locks are not inherited across fork, so a worker forked from the
+    process that opened the storage (gunicorn --preload) would share its files
+    without holding the lock; check() refuses to serve such a worker.
+
+    Raises:
+        StorageError: If another process holds the lock
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pid = os.getpid()
+        self._key = os.path.realpath(path)
+        self._closed = False
+        with _held_locks_guard:
+            held = _held_locks.get(self._key)
+            if held is not None and held[0] == self.pid:
+                held[2] += 1
+                return
+            _held_locks[self._key] = [self.pid, self._acquire(path), 1]
+
+    @staticmethod
+    def _acquire(path: str):
+        if fcntl is None:  # pragma: no cover
+            return None
+        lock_file = open(path, "a")
+        try:
+            fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            lock_file.close()
+            raise StorageError(
+                f"{path} is held by another process; use the sqlite backend to share"
+                " storage between processes"
+            ) from e
+        return lock_file
+
+    def check(self) -> None:
+        """
+        Raise StorageError if this is not the process that took the lock.
+
+        Raises:
+            StorageError: In a process forked after the storage was opened
+        """
+        if os.getpid() != self.pid:
+            raise StorageError(
+                f"{self.path} was locked by process {self.pid}, which this process"
+                " was forked from; open the storage in each worker after forking"
+                " (gunicorn --preload is not supported)"
+            )
+
+    def close(self) -> None:
+        """Stop using the lock, releasing it with its last user; idempotent."""
+        if self._closed or os.getpid() != self.pid:
+            return
+        self._closed = True
+        with _held_locks_guard:
+            held = _held_locks.get(self._key)
+            if held is None or held[0] != self.pid:
+                return
+            held[2] -= 1
+            if not held[2]:
+                del _held_locks[self._key]
+                if held[1] is not None:
+                    held[1].close()
+
+
+class SurveyIndex:
+    """Survey ids kept sorted by (created_at, id), overall and per status."""
+
+    def __init__(self):
+        self._order: List[Tuple[datetime, str]] = []
+        self._by_status: Dict[SurveyStatus, List[Tuple[datetime, str]]] = {
+            status: [] for status in SurveyStatus
+        }
+        self._entries: Dict[str, Tuple[datetime, SurveyStatus]] = {}
+
+    def __contains__(self, survey_id: str) -> bool:
+        return survey_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def get(self, survey_id: str) -> Optional[Tuple[datetime, SurveyStatus]]:
+        return self._entries.get(survey_id)
+
+    def items(self) -> List[Tuple[str, Tuple[datetime, SurveyStatus]]]:
+        return list(self._entries.items())
+
+    def add(self, survey_id: str, created_at: datetime, status: SurveyStatus) -> None:
+        key = (created_at, survey_id)
+        insort(self._order, key)
+        insort(self._by_status[status], key)
+        self._entries[survey_id] = (created_at, status)
+
+    def remove(self, survey_id: str) -> None:
+        created_at, status = self._entries.pop(survey_id)
+        key = (created_at, survey_id)
+        for keys in (self._order, self._by_status[status]):
+            index = bisect_right(keys, key) - 1
+            if index >= 0 and keys[index] == key:
+                del keys[index]
+
+    def set_status(self, survey_id: str, status: SurveyStatus) -> None:
+        created_at, _ = self._entries[survey_id]
+        self.remove(survey_id)
+        self.add(survey_id, created_at, status)
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def page(
+        self,
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        Return one page of survey ids and the cursor of the next page.
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        keys = self._order if status is None else self._by_status[status]
+        start = 0
+        if cursor is not None:
+            created_at, survey_id = decode_cursor(cursor)
+            start = bisect_right(keys, (datetime.fromisoformat(created_at), survey_id))
+        page = keys[start : start + limit]
+        if not page or start + limit >= len(keys):
+            return [survey_id for _, survey_id in page], None
+        created_at, survey_id = page[-1]
+        return [key[1] for key in page], encode_cursor(
+            created_at.isoformat(), survey_id
+        )
+
+
+class BaseStorage(ABC):
+    """Interface implemented by every survey storage backend."""
+
+    @abstractmethod
     def create_survey(self, title: str, description: str = "") -> Survey:
-        survey = Survey(title=title, description=description)
-        self.surveys[survey.id] = survey
-        self.save_to_file()
-        return survey
+        pass
 
+    @abstractmethod
     def get_survey(self, survey_id: str) -> Optional[Survey]:
-        return self.surveys.get(survey_id)
+        pass
 
+    @abstractmethod
     def list_surveys(self) -> List[Survey]:
-        return list(self.surveys.values())
+        pass
+
+    @abstractmethod
+    def list_surveys_page(
+        self,
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Survey], Optional[str]]:
+        """
+        Return one page of surveys ordered by creation time.
 
+        Args:
+            status: Only list surveys with this status
+            cursor: The next_cursor of the previous page; the first page if omitted
+            limit: Maximum number of surveys on the page
+
+        Returns:
+            Tuple of the surveys and the cursor of the next page, or None on the
+            last page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+
+    def list_survey_summaries_page(
+        self,
+        fields: List[str],
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Return one page like list_surveys_page, with only `fields` of each survey.
+
+        Backends override this to answer projections from their listing
+        metadata instead of loading every survey on the page.
+
+        Returns:
+            Tuple of the surveys' Survey.to_dict(fields) and the next cursor
+
+        Raises:
+            ValueError: If the cursor is malformed or a field does not exist
+        """
+        surveys, next_cursor = self.list_surveys_page(status, cursor, limit)
+        return [s.to_dict(fields) for s in surveys], next_cursor
+
+    @abstractmethod
     def delete_survey(self, survey_id: str) -> bool:
-        if survey_id in self.surveys:
-            del self.surveys[survey_id]
-            self.save_to_file()
-            return True
-        return False
+        pass
 
+    @abstractmethod
     def add_question_to_survey(
         self, survey_id: str, question_type: str, text: str, **kwargs
     ) -> Question:
-        survey = self.get_survey(survey_id)
-        if not survey:
-            raise ValueError(f"Survey {survey_id} not found")
-        question = self._create_question(question_type, text, **kwargs)
-        survey.add_question(question)
-        self.save_to_file()
-        return question
+        pass
+
+    @abstractmethod
+    def publish_survey(self, survey_id: str) -> Survey:
+        pass
+
+    @abstractmethod
+    def add_response(
+        self, survey_id: str, answers: Dict[str, Any], durable: bool = False
+    ) -> str:
+        pass
+
+    @abstractmethod
+    def add_responses(
+        self, survey_id: str, batch: List[Dict[str, Any]], durable: bool = False
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    def flush(self) -> Future:
+        """Return a future resolved once every accepted change is persisted."""
+        future: Future = Future()
+        future.set_result(None)
+        return future
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return totals for monitoring.
+
+        Returns:
+            Dict with the number of "surveys", their "responses" and the
+            "bytes" the backend occupies on disk
+        """
+        surveys = self.list_surveys()
+        return {
+            "surveys": len(surveys),
+            "responses": sum(len(s.responses) for s in surveys),
+            "bytes": 0,
+        }
 
     def _create_question(self, question_type: str, text: str, **kwargs) -> Question:
         q_type = QuestionType(question_type)
@@ -64,57 +475,39 @@ class SurveyStorage:
         else:
             raise ValueError(f"Unknown question type: {question_type}")
 
-    def save_to_file(self) -> None:
-        data = {"surveys": [], "saved_at": datetime.utcnow().isoformat()}
-        for survey in self.surveys.values():
-            survey_data = {
-                "id": survey.id,
-                "title": survey.title,
-                "description": survey.description,
-                "status": survey.status.value,
-                "created_at": survey.created_at.isoformat(),
-                "questions": [],
-                "responses": survey.responses,
-            }
-            for question in survey.questions:
-                q_data = {
-                    "id": question.id,
-                    "type": question.type.value,
-                    "text": question.text,
-                }
-                if isinstance(question, MultipleChoiceQuestion):
-                    q_data["options"] = question.options
-                elif isinstance(question, ScaleQuestion):
-                    q_data["min_value"] = question.min_value
-                    q_data["max_value"] = question.max_value
-                survey_data["questions"].append(q_data)
-            data["surveys"].append(survey_data)
-        with open(self.storage_path, "w") as f:
-            json.dump(data, f, indent=2)
+    def _question_to_data(self, question: Question) -> Dict[str, Any]:
+        q_data = {
+            "id": question.id,
+            "type": question.type.value,
+            "text": question.text,
+        }
+        if isinstance(question, MultipleChoiceQuestion):
+            q_data["options"] = question.options
+        elif isinstance(question, ScaleQuestion):
+            q_data["min_value"] = question.min_value
+            q_data["max_value"] = question.max_value
+        return q_data
 
-    def load_from_file(self) -> None:
-        if not os.path.exists(self.storage_path):
-            return
-        try:
-            with open(self.storage_path, "r") as f:
-                data = json.load(f)
-            for survey_data in data.get("surveys", []):
-                survey = Survey(
-                    title=survey_data["title"],
-                    description=survey_data["description"],
-                    survey_id=survey_data["id"],
+    def _validate_stored_response(
+        self, survey: Survey, response: Dict[str, Any]
+    ) -> None:
+        if not isinstance(response["id"], str) or not isinstance(
+            response["timestamp"], str
+        ):
+            raise ValueError(f"Malformed response in survey {survey.id}")
+        answers = response["answers"]
+        for question_id, is_valid in survey.validation_plan().checks:
+            if question_id in answers and not is_valid(answers[question_id]):
+                raise ValueError(
+                    f"Invalid stored answer for question {question_id} "
+                    f"in response {response['id']}"
                 )
-                survey.status = SurveyStatus(survey_data["status"])
-                survey.created_at = datetime.fromisoformat(survey_data["created_at"])
-                survey.responses = survey_data.get("responses", [])
-                for q_data in survey_data.get("questions", []):
-                    question = self._restore_question(q_data)
-                    survey.questions.append(question)
-                self.surveys[survey.id] = survey
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            print(f"Error loading data: {e}")
 
-    def _restore_question(self, q_data: Dict[str, Any]) -> Question:
+    def _restore_question(
+        self, q_data: Dict[str, Any], trusted: bool = False
+    ) -> Question:
+        if trusted:
+            return QUESTION_CLASSES[q_data["type"]].restore(q_data)
         q_type = QuestionType(q_data["type"])
         if q_type == QuestionType.TEXT:
             return TextQuestion(text=q_data["text"], question_id=q_data["id"])
@@ -133,11 +526,783 @@ class SurveyStorage:
             raise ValueError(f"Unknown question type: {q_data['type']}")
 
 
+class SurveyStorage(BaseStorage):
+    """
+    Storage backend keeping every survey in one snapshot file.
+
+    The snapshot is written in `snapshot_format`: "json", with an index sidecar
+    recording where every survey sits in the file, or "binary", which carries
+    that index itself (see src.snapshot). Either format is read regardless of
+    the setting, so changing it converts the store at its next save.
+
+    With `lazy=True` only the index is read at startup; a survey is parsed the
+    first time it is requested, and once more than `max_loaded` surveys are in
+    memory the least recently used ones without unsaved changes are dropped
+    again.
+    """
+
+    def __init__(
+        self,
+        storage_path: str = "surveys_data.json",
+        journal: bool = False,
+        compact_every: int = 1000,
+        flush_interval_ms: Optional[int] = None,
+        flush_every_ops: int = 100,
+        lazy: bool = False,
+        max_loaded: int = 1000,
+        snapshot_format: str = "json",
+    ):
+        if snapshot_format not in snapshot.FORMATS:
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        self.storage_path = storage_path
+        self.journal_path = storage_path + ".journal"
+        self.checksum_path = storage_path + ".sha256"
+        self.index_path = storage_path + ".index"
+        self.journal = journal
+        self.compact_every = compact_every
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_every_ops = flush_every_ops
+        self.lazy = lazy
+        self.max_loaded = max_loaded
+        self.snapshot_format = snapshot_format
+        # The surveys in memory, least recently used first in lazy mode.
+        self.surveys: Dict[str, Survey] = OrderedDict()
+        # _surveys_lock guards the surveys dict; each Survey guards its own state;
+        # _write_lock makes a single thread at a time write the snapshot or journal.
+        self._surveys_lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        self._journal_file = None
+        self._journal_entries = 0
+        # Group-commit state, shared with the flusher thread under _flush_cond.
+        self._flush_cond = threading.Condition()
+        self._pending_ops = 0
+        self._pending_lines: List[bytes] = []
+        self._snapshot_dirty = False
+        self._flush_waiters: List[Future] = []
+        self._closing = False
+        self._flusher = None
+        # Every survey, loaded or not, sorted for paginated listing.
+        self._index = SurveyIndex()
+        # Lazy mode: where each survey sits in the mapped snapshot file, and the
+        # surveys changed since that snapshot, which must stay in memory.
+        self._catalog: Dict[str, Dict[str, Any]] = {}
+        self._snapshot_file: Optional[snapshot.MappedFile] = None
+        self._dirty: set = set()
+        self._pinned: Dict[str, int] = {}
+        self._process_lock = ProcessLock(storage_path + ".lock")
+        self.load_from_file()
+        if flush_interval_ms is not None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="survey-storage-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def create_survey(self, title: str, description: str = "") -> Survey:
+        self._process_lock.check()
+        survey = Survey(title=title, description=description)
+        with self._surveys_lock:
+            self.surveys[survey.id] = survey
+            self._index.add(survey.id, survey.created_at, survey.status)
+        self._persist(survey.id)
+        return survey
+
+    def get_survey(self, survey_id: str) -> Optional[Survey]:
+        self._process_lock.check()
+        if not self.lazy:
+            return self.surveys.get(survey_id)
+        with self._surveys_lock:
+            survey = self.surveys.get(survey_id)
+            if survey is not None:
+                self.surveys.move_to_end(survey_id)
+                return survey
+            if survey_id not in self._catalog:
+                return None
+            survey = self._hydrate(survey_id)
+            self.surveys[survey_id] = survey
+            self._evict()
+            return survey
+
+    def list_surveys(self) -> List[Survey]:
+        """Return every survey; in lazy mode this loads each one in turn."""
+        self._process_lock.check()
+        with self._surveys_lock:
+            if not self.lazy:
+                return list(self.surveys.values())
+            surveys = [self.get_survey(survey_id) for survey_id in self._index]
+        return [s for s in surveys if s is not None]
+
+    def list_surveys_page(
+        self,
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Survey], Optional[str]]:
+        self._process_lock.check()
+        with self._surveys_lock:
+            survey_ids, next_cursor = self._index.page(status, cursor, limit)
+            surveys = [self.get_survey(survey_id) for survey_id in survey_ids]
+        return [s for s in surveys if s is not None], next_cursor
+
+    def list_survey_summaries_page(
+        self,
+        fields: List[str],
+        status: Optional[SurveyStatus] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Return one page of survey projections.
+
+        In lazy mode a survey that is not loaded is answered from its snapshot
+        index entry when that holds every field, so listing neither loads it nor
+        pushes other surveys out of memory.
+        """
+        self._process_lock.check()
+        keys = [_INDEX_KEYS.get(field) for field in fields]
+        with self._surveys_lock:
+            survey_ids, next_cursor = self._index.page(status, cursor, limit)
+            summaries = []
+            for survey_id in survey_ids:
+                survey = self.surveys.get(survey_id)
+                entry = self._catalog.get(survey_id)
+                if survey is None and entry is not None:
+                    if all(key in entry for key in keys):
+                        summaries.append(
+                            {field: entry[key] for field, key in zip(fields, keys)}
+                        )
+                        continue
+                    survey = self.get_survey(survey_id)
+                if survey is not None:
+                    summaries.append(survey.to_dict(fields))
+        return summaries, next_cursor
+
+    def delete_survey(self, survey_id: str) -> bool:
+        self._process_lock.check()
+        with self._surveys_lock:
+            if survey_id not in self._index:
+                return False
+            self.surveys.pop(survey_id, None)
+            self._catalog.pop(survey_id, None)
+            self._index.remove(survey_id)
+        self._persist(survey_id)
+        return True
+
+    def add_question_to_survey(
+        self, survey_id: str, question_type: str, text: str, **kwargs
+    ) -> Question:
+        with self._updating(survey_id) as survey:
+            question = self._create_question(question_type, text, **kwargs)
+            survey.add_question(question)
+            self._persist(survey.id)
+        return question
+
+    def publish_survey(self, survey_id: str) -> Survey:
+        with self._updating(survey_id) as survey:
+            survey.publish()
+            with self._surveys_lock:
+                self._index.set_status(survey.id, survey.status)
+            self._persist(survey.id)
+        return survey
+
+    @profiling.profiled("add_response")
+    def add_response(
+        self, survey_id: str, answers: Dict[str, Any], durable: bool = False
+    ) -> str:
+        with self._updating(survey_id) as survey:
+            response = survey.create_response(answers)
+            self._commit_responses(survey, [response], durable)
+        if durable:
+            self.flush().result()
+        return response["id"]
+
+    @profiling.profiled("add_responses")
+    def add_responses(
+        self, survey_id: str, batch: List[Dict[str, Any]], durable: bool = False
+    ) -> List[Dict[str, Any]]:
+        with self._updating(survey_id) as survey:
+            records, results = survey.create_responses(batch)
+            if not records:
+                return results
+            self._commit_responses(survey, records, durable)
+        if durable:
+            self.flush().result()
+        return results
+
+    def flush(self) -> Future:
+        future: Future = Future()
+        if self._flusher is None:
+            future.set_result(None)
+            return future
+        with self._flush_cond:
+            self._flush_waiters.append(future)
+            self._flush_cond.notify()
+        return future
+
+    def _hydrate(self, survey_id: str) -> Survey:
+        return self._decode_record(
+            self._catalog[survey_id], self._read_chunk(survey_id)
+        )
+
+    def _decode_record(self, entry: Dict[str, Any], chunk: bytes) -> Survey:
+        """Restore one survey record, trusting it if it matches its SHA-256."""
+        trusted = hashlib.sha256(chunk).hexdigest() == entry["sha256"]
+        try:
+            return self._restore_survey(serialization.loads(chunk), trusted)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise StorageError(
+                f"Error loading survey {entry['id']} from {self.storage_path}: {e}"
+            ) from e
+
+    @contextmanager
+    def _updating(self, survey_id: str) -> Iterator[Survey]:
+        """Yield a survey for a change, keeping it loaded until the change is saved.
+
+        Raises:
+            ValueError: If the survey does not exist
+        """
+        self._process_lock.check()
+        if not self.lazy:
+            survey = self.surveys.get(survey_id)
+            if not survey:
+                raise ValueError(f"Survey {survey_id} not found")
+            yield survey
+            return
+        with self._surveys_lock:
+            survey = self.get_survey(survey_id)
+            if not survey:
+                raise ValueError(f"Survey {survey_id} not found")
+            self._pinned[survey_id] = self._pinned.get(survey_id, 0) + 1
+        try:
+            yield survey
+        finally:
+            with self._surveys_lock:
+                self._pinned[survey_id] -= 1
+                if not self._pinned[survey_id]:
+                    del self._pinned[survey_id]
+
+    def _evict(self) -> None:
+        # Only surveys identical to their snapshot copy can be dropped, and never
+        # the one just requested or one with a change in progress.
+        excess = len(self.surveys) - self.max_loaded
+        if excess <= 0:
+            return
+        evictable = [
+            survey_id
+            for survey_id in list(self.surveys)[:-1]
+            if survey_id in self._catalog
+            and survey_id not in self._dirty
+            and survey_id not in self._pinned
+        ]
+        for survey_id in evictable[:excess]:
+            del self.surveys[survey_id]
+
+    def _commit_responses(
+        self, survey: Survey, records: List[Dict[str, Any]], durable: bool = False
+    ) -> None:
+        """
+        Persist validated responses, then add them to the survey.
+
+        Snapshots are always fsynced; journal lines only when `durable`.
+
+        If they cannot be encoded or written the survey is left unchanged, so
+        memory never holds a response the client was told had failed. In
+        group-commit mode they are encoded and queued first; the flusher takes
+        the write lock before it snapshots memory, so they are in the survey by
+        then.
+        """
+        with self._write_lock:
+            lines = None
+            if self.journal:
+                lines = [self._journal_line(survey.id, r) for r in records]
+            if self._flusher is not None:
+                survey.append_responses(records)
+                self._persist(survey.id, lines)
+                return
+            if self.lazy:
+                with self._surveys_lock:
+                    self._dirty.add(survey.id)
+            if lines is None:
+                self.save_to_file({survey.id: records})
+                survey.append_responses(records)
+                return
+            self._write_journal(lines, fsync=durable)
+            survey.append_responses(records)
+            # Only now, so the compacted snapshot holds these responses.
+            self._compact_if_due()
+
+    def _persist(
+        self, survey_id: str, journal_lines: Optional[List[bytes]] = None
+    ) -> None:
+        """Persist a change now, or queue it for the flusher in group-commit mode."""
+        if self.lazy:
+            with self._surveys_lock:
+                self._dirty.add(survey_id)
+        if self._flusher is None:
+            if journal_lines is None:
+                self.save_to_file()
+            else:
+                self._write_journal(journal_lines)
+                self._compact_if_due()
+            return
+        with self._flush_cond:
+            if journal_lines is None:
+                self._snapshot_dirty = True
+                self._pending_ops += 1
+            else:
+                self._pending_lines.extend(journal_lines)
+                self._pending_ops += len(journal_lines)
+            if self._pending_ops >= self.flush_every_ops:
+                self._flush_cond.notify()
+
+    def _flush_loop(self) -> None:
+        timeout = self.flush_interval_ms / 1000
+        failed = False
+        while True:
+            with self._flush_cond:
+                if failed:
+                    # Back off for a full interval instead of retrying a failing
+                    # write at once; only a flush() or close() cuts it short.
+                    retry_at = time.monotonic() + timeout
+                    while not self._closing and not self._flush_waiters:
+                        remaining = retry_at - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._flush_cond.wait(remaining)
+                elif not self._closing and not self._flush_waiters:
+                    if self._pending_ops < self.flush_every_ops:
+                        self._flush_cond.wait(timeout)
+                closing = self._closing
+            try:
+                self._flush_pending()
+                failed = False
+            except Exception:
+                # The waiters were given the error; keep flushing later changes.
+                logger.exception("Error flushing survey data")
+                failed = True
+            if closing:
+                return
+
+    def _flush_pending(self) -> None:
+        with self._flush_cond:
+            lines = self._pending_lines
+            snapshot_dirty = self._snapshot_dirty
+            waiters = self._flush_waiters
+            self._pending_lines = []
+            self._snapshot_dirty = False
+            self._flush_waiters = []
+            self._pending_ops = 0
+        try:
+            if snapshot_dirty:
+                # The snapshot is built from memory, so it covers queued lines too.
+                self.save_to_file()
+            elif lines:
+                self._write_journal(lines, fsync=True)
+                self._compact_if_due()
+        except Exception as e:
+            with self._flush_cond:
+                self._pending_lines[:0] = lines
+                self._snapshot_dirty = self._snapshot_dirty or snapshot_dirty
+                self._pending_ops += len(lines) + int(snapshot_dirty)
+            for future in waiters:
+                future.set_exception(e)
+            raise
+        for future in waiters:
+            future.set_result(None)
+
+    def _journal_line(self, survey_id: str, response: Dict[str, Any]) -> bytes:
+        return serialization.dumps({"survey_id": survey_id, "response": response})
+
+    def _write_journal(self, lines: List[bytes], fsync: bool = False) -> None:
+        """Append lines to the journal; see _compact_if_due."""
+        with self._write_lock:
+            # Binary, as the lines are already UTF-8 whatever the locale.
+            if self._journal_file is None:
+                self._journal_file = open(self.journal_path, "ab")
+            self._journal_file.write(b"".join(line + b"\n" for line in lines))
+            self._journal_file.flush()
+            if fsync:
+                os.fsync(self._journal_file.fileno())
+            self._journal_entries += len(lines)
+
+    def _compact_if_due(self) -> None:
+        """Fold the journal into a new snapshot every `compact_every` entries."""
+        with self._write_lock:
+            if self._journal_entries >= self.compact_every:
+                self.save_to_file()
+
+    @metrics.timed("save_to_file")
+    @profiling.profiled("save_to_file")
+    def save_to_file(
+        self, pending: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ) -> None:
+        """
+        Write a snapshot of every survey.
+
+        Args:
+            pending: Responses per survey id to write after the ones in memory,
+                for callers adding them only once they are on disk
+        """
+        self._process_lock.check()
+        # Holding the write lock while the snapshot is built means a response is
+        # either captured here or journaled after the journal is truncated below.
+        with self._write_lock:
+            # Surveys changed from here on stay marked for the next save.
+            with self._surveys_lock:
+                saving, self._dirty = self._dirty, set()
+            try:
+                records = self._snapshot_records(pending or {})
+                index = write_snapshot(self.storage_path, records, self.snapshot_format)
+                if self.lazy:
+                    self._open_catalog(index)
+            except BaseException:
+                # Not saved, so they must not be evicted.
+                with self._surveys_lock:
+                    self._dirty |= saving
+                raise
+            self._truncate_journal()
+
+    def export_snapshot(self, path: str, snapshot_format: str) -> int:
+        """
+        Write the current state to `path` in either snapshot format.
+
+        Returns:
+            The number of surveys written
+        """
+        with self._write_lock:
+            records = self._snapshot_records()
+            write_snapshot(path, records, snapshot_format)
+        return len(records)
+
+    def _snapshot_records(
+        self, pending: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ) -> List[snapshot.Record]:
+        """Encode every survey; surveys not in memory are copied from the snapshot."""
+        with self._surveys_lock:
+            entries = [
+                (survey_id, meta, self.surveys.get(survey_id))
+                for survey_id, meta in self._index.items()
+            ]
+            chunks = [
+                self._read_chunk(survey_id) if survey is None else None
+                for survey_id, _, survey in entries
+            ]
+        records = []
+        for (survey_id, (created_at, status), survey), chunk in zip(entries, chunks):
+            if chunk is None:
+                data = self._survey_to_data(survey)
+                if pending and survey_id in pending:
+                    data["responses"] += pending[survey_id]
+                chunk = serialization.dumps(data)
+                title = data["title"]
+                question_count = len(survey.questions)
+                response_count = len(data["responses"])
+            else:
+                copied = self._catalog[survey_id]
+                title = copied["title"]
+                question_count = copied["questions"]
+                response_count = copied["responses"]
+            entry = {
+                "id": survey_id,
+                "title": title,
+                "created_at": created_at.isoformat(),
+                "status": status.value,
+                "questions": question_count,
+                "responses": response_count,
+            }
+            records.append((entry, chunk))
+        return records
+
+    def _read_chunk(self, survey_id: str) -> bytes:
+        entry = self._catalog[survey_id]
+        return self._snapshot_file.read(entry["offset"], entry["length"])
+
+    def _open_catalog(
+        self,
+        index: List[Dict[str, Any]],
+        snapshot_file: Optional[snapshot.MappedFile] = None,
+    ) -> None:
+        if snapshot_file is None:
+            snapshot_file = snapshot.MappedFile(self.storage_path)
+        with self._surveys_lock:
+            if self._snapshot_file is not None:
+                self._snapshot_file.close()
+            self._snapshot_file = snapshot_file
+            self._catalog = {
+                entry["id"]: entry for entry in index if entry["id"] in self._index
+            }
+            self._evict()
+
+    def _survey_to_data(self, survey: Survey) -> Dict[str, Any]:
+        with survey.lock:
+            return {
+                "id": survey.id,
+                "title": survey.title,
+                "description": survey.description,
+                "status": survey.status.value,
+                "created_at": survey.created_at.isoformat(),
+                # Encoded once per change to the questions, not on every save.
+                "questions": survey.questions_fragment(),
+                "responses": list(survey.responses),
+            }
+
+    def _truncate_journal(self) -> None:
+        # The snapshot now holds every journaled response, so start a new journal.
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, "w").close()
+        self._journal_entries = 0
+
+    def close(self) -> None:
+        if self._flusher is not None:
+            with self._flush_cond:
+                self._closing = True
+                self._flush_cond.notify()
+            self._flusher.join()
+            self._flusher = None
+        with self._write_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if self._snapshot_file is not None:
+                self._snapshot_file.close()
+                self._snapshot_file = None
+            self._process_lock.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._surveys_lock:
+            responses = 0
+            for survey_id in self._index:
+                survey = self.surveys.get(survey_id)
+                if survey is not None:
+                    responses += len(survey.responses)
+                else:
+                    entry = self._catalog.get(survey_id, {})
+                    responses += entry.get("responses", 0)
+            surveys = len(self._index)
+        paths = (self.storage_path, self.journal_path, self.index_path)
+        return {
+            "surveys": surveys,
+            "responses": responses,
+            "bytes": sum(os.path.getsize(p) for p in paths if os.path.exists(p)),
+        }
+
+    @metrics.timed("load_from_file")
+    def load_from_file(self) -> None:
+        with _gc_paused():
+            if (
+                os.path.exists(self.storage_path)
+                and snapshot.detect_format(self.storage_path) == "binary"
+            ):
+                self._load_binary()
+                self._replay_journal()
+                return
+            if self.lazy and self._load_index():
+                self._replay_journal()
+                return
+            self._load_snapshot()
+            self._replay_journal()
+        if self.lazy and self.surveys:
+            # Write a snapshot with an index so these surveys can be evicted.
+            self.save_to_file()
+
+    def _load_index(self) -> bool:
+        """Read the snapshot index; False if it is missing or out of date."""
+        if not os.path.exists(self.index_path) or not os.path.exists(self.storage_path):
+            return False
+        try:
+            with open(self.index_path, "rb") as f:
+                index = serialization.loads(f.read())
+            stat = os.stat(self.storage_path)
+            snapshot = index["snapshot"]
+            if (snapshot["size"], snapshot["mtime_ns"]) != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                return False
+            for entry in index["surveys"]:
+                self._index.add(
+                    entry["id"],
+                    datetime.fromisoformat(entry["created_at"]),
+                    SurveyStatus(entry["status"]),
+                )
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            self._index.clear()
+            return False
+        self._open_catalog(index["surveys"])
+        return True
+
+    def _load_binary(self) -> None:
+        """
+        Open a binary snapshot; decode every survey now unless in lazy mode.
+
+        Each record is trusted when it matches its SHA-256 in the directory.
+
+        Raises:
+            StorageError: If the snapshot is unreadable or holds invalid data
+        """
+        try:
+            mapped = snapshot.BinarySnapshot(self.storage_path)
+        except (OSError, ValueError) as e:
+            raise StorageError(f"Error loading {self.storage_path}: {e}") from e
+        for entry in mapped.index:
+            self._index.add(
+                entry["id"],
+                datetime.fromisoformat(entry["created_at"]),
+                SurveyStatus(entry["status"]),
+            )
+        if self.lazy:
+            self._open_catalog(mapped.index, mapped)
+            return
+        try:
+            for entry in mapped.index:
+                self.surveys[entry["id"]] = self._decode_record(
+                    entry, mapped.read(entry["offset"], entry["length"])
+                )
+        finally:
+            mapped.close()
+
+    def _load_snapshot(self) -> None:
+        """
+        Load the snapshot, validating it unless its checksum matches.
+
+        A snapshot whose SHA-256 matches the checksum written alongside it is
+        known to be one this class wrote, so its questions and responses are
+        restored without re-validating them.
+
+        Raises:
+            StorageError: If the snapshot is unreadable or holds invalid data
+        """
+        if not os.path.exists(self.storage_path):
+            return
+        with open(self.storage_path, "rb") as f:
+            payload = f.read()
+        if not payload:
+            return
+        trusted = self._read_checksum() == hashlib.sha256(payload).hexdigest()
+        try:
+            data = serialization.loads(payload)
+            for survey_data in data.get("surveys", []):
+                survey = self._restore_survey(survey_data, trusted)
+                self.surveys[survey.id] = survey
+                self._index.add(survey.id, survey.created_at, survey.status)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise StorageError(f"Error loading {self.storage_path}: {e}") from e
+
+    def _read_checksum(self) -> Optional[str]:
+        if not os.path.exists(self.checksum_path):
+            return None
+        with open(self.checksum_path, "r") as f:
+            return f.read().strip()
+
+    def _restore_survey(self, survey_data: Dict[str, Any], trusted: bool) -> Survey:
+        survey = Survey.restore(
+            survey_data["id"],
+            survey_data["title"],
+            survey_data["description"],
+            [
+                self._restore_question(q_data, trusted)
+                for q_data in survey_data.get("questions", [])
+            ],
+            SurveyStatus(survey_data["status"]),
+            datetime.fromisoformat(survey_data["created_at"]),
+        )
+        responses = survey_data.get("responses", [])
+        if not trusted:
+            for response in responses:
+                self._validate_stored_response(survey, response)
+        survey.restore_responses(responses)
+        return survey
+
+    def _replay_journal(self) -> None:
+        """Re-apply responses journaled after the last snapshot.
+
+        Responses already present in the snapshot are skipped, so a crash between
+        writing a snapshot and truncating the journal does not duplicate them. A
+        torn final line from an interrupted append is dropped.
+
+        Raises:
+            StorageError: If any other line is unreadable or holds an invalid
+                response
+        """
+        if not os.path.exists(self.journal_path):
+            return
+        seen: Dict[str, set] = {}
+        torn_at = None
+        with open(self.journal_path, "rb") as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = serialization.loads(line)
+                    survey_id = entry["survey_id"]
+                    response = entry["response"]
+                    response_id = response["id"]
+                except (KeyError, TypeError, ValueError) as e:
+                    # ValueError covers JSONDecodeError and a torn UTF-8 sequence.
+                    if f.read(1):
+                        raise StorageError(
+                            f"Error in line {number} of {self.journal_path}: {e}"
+                        ) from e
+                    torn_at = f.tell() - len(line)
+                    break
+                survey = self.get_survey(survey_id)
+                if survey is None:
+                    continue
+                if self.lazy:
+                    # Only in the journal until the next snapshot: keep it loaded.
+                    self._dirty.add(survey_id)
+                if survey_id not in seen:
+                    seen[survey_id] = set(survey.responses.iter_ids())
+                if response_id in seen[survey_id]:
+                    continue
+                try:
+                    self._validate_stored_response(survey, response)
+                except (KeyError, TypeError, ValueError) as e:
+                    raise StorageError(
+                        f"Error in line {number} of {self.journal_path}: {e}"
+                    ) from e
+                seen[survey_id].add(response_id)
+                survey.append_response(response)
+                self._journal_entries += 1
+        if torn_at is not None:
+            # Drop it so the next append starts on a fresh line.
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(torn_at)
+
+
 _storage = None
 
 
-def get_storage() -> SurveyStorage:
+def get_storage() -> BaseStorage:
     global _storage
     if _storage is None:
-        _storage = SurveyStorage()
+        backend = os.getenv("SURVEY_STORAGE_BACKEND", "json").lower()
+        if backend == "json":
+            journal = os.getenv("SURVEY_JOURNAL", "True").lower() == "true"
+            flush_interval_ms = os.getenv("SURVEY_FLUSH_INTERVAL_MS")
+            _storage = SurveyStorage(
+                journal=journal,
+                flush_interval_ms=int(flush_interval_ms) if flush_interval_ms else None,
+                flush_every_ops=int(os.getenv("SURVEY_FLUSH_EVERY_OPS", "100")),
+                lazy=os.getenv("SURVEY_LAZY_LOAD", "False").lower() == "true",
+                max_loaded=int(os.getenv("SURVEY_MAX_LOADED", "1000")),
+                snapshot_format=os.getenv("SURVEY_SNAPSHOT_FORMAT", "json").lower(),
+            )
+        elif backend == "sharded":
+            from src.sharded_storage import ShardedSurveyStorage
+
+            _storage = ShardedSurveyStorage(
+                os.getenv("SURVEY_SHARDED_PATH", "surveys_data"),
+                max_loaded=int(os.getenv("SURVEY_MAX_LOADED", "1000")),
+            )
+        elif backend == "sqlite":
+            from src.sqlite_storage import SQLiteStorage
+
+            _storage = SQLiteStorage(
+                os.getenv("SURVEY_SQLITE_PATH", "surveys.db"),
+                max_loaded=int(os.getenv("SURVEY_MAX_LOADED", "1000")),
+            )
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        atexit.register(_storage.close)
     return _storage
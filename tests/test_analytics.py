@@ -0,0 +1,166 @@
+import pytest
+
+from src import analytics
+from src.models import Survey, MultipleChoiceQuestion, ScaleQuestion, TextQuestion
+
+ENGINES = ["python"] + (["numpy"] if analytics.np is not None else [])
+
+
+def _survey(values, low=1, high=10):
+    s = Survey("Analytics")
+    color = MultipleChoiceQuestion("Color", ["Red", "Blue", "Green"])
+    rating = ScaleQuestion("Rating", low, high)
+    s.add_question(color)
+    s.add_question(rating)
+    s.publish()
+    for i, value in enumerate(values):
+        s.add_response({color.id: ["Red", "Blue", "Green"][i % 3], rating.id: value})
+    return s, color, rating
+
+
+class TestEngines:
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_choice_counts(self, engine):
+        s, color, _ = _survey(range(1, 8))
+        column = s.responses.column(color.id)
+        assert analytics.choice_counts(column, engine) == [3, 2, 2]
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_scale_statistics(self, engine):
+        s, _, rating = _survey([1, 2, 2, 3, 4, 10])
+        values = analytics.scale_values(*s.responses.split_column(rating.id), engine)
+        assert analytics.scale_summary(values) == (6, 22, 1, 10)
+        stats = analytics.scale_statistics(values, 1, 10, engine)
+        assert stats["median"] == 2.5
+        assert stats["std"] == 2.98
+        assert stats["percentiles"] == {
+            "10": 1.5,
+            "25": 2.0,
+            "50": 2.5,
+            "75": 3.75,
+            "90": 7.0,
+        }
+        assert stats["histogram"]["2"] == 2
+        assert sum(stats["histogram"].values()) == 6
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_wide_scale_uses_bins(self, engine):
+        s, _, rating = _survey([0, 99, 100, 550, 999, 1000], low=0, high=1000)
+        values = analytics.scale_values(*s.responses.split_column(rating.id), engine)
+        histogram = analytics.scale_statistics(values, 0, 1000, engine)["histogram"]
+        assert len(histogram) == analytics.HISTOGRAM_BINS
+        assert histogram["0-99"] == 2
+        assert list(histogram.items())[-1] == ("901-1000", 2)
+        assert sum(histogram.values()) == 6
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_empty_statistics(self, engine):
+        values = analytics.scale_values(None, [], [], engine)
+        assert analytics.scale_summary(values) == (0, 0, None, None)
+        assert analytics.scale_statistics(values, 1, 5, engine)["median"] == 0
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            analytics.choice_counts(None, "fortran")
+
+
+class TestExtendedResults:
+    def test_extended_results_keep_base_shape(self):
+        s, _, _ = _survey([5, 6, 7])
+        base = s.get_results()
+        extended = s.get_results(extended=True)
+        assert extended["questions"][0] == base["questions"][0]
+        scale = extended["questions"][1]
+        assert scale["average"] == 6
+        assert scale["median"] == 6
+        assert "histogram" in scale and "percentiles" in scale
+
+    def test_aggregates_loaded_from_columns_skip_irregular_rows(self):
+        s = Survey("Legacy")
+        name = TextQuestion("Name")
+        rating = ScaleQuestion("Rating", 1, 5)
+        s.add_question(name)
+        s.add_question(rating)
+        s.restore_responses(
+            [
+                {"id": "a", "timestamp": "", "answers": {name.id: "Ann", rating.id: 4}},
+                {"id": "b", "timestamp": "", "answers": {rating.id: 2}},
+                {"id": "c", "timestamp": "", "answers": {name.id: 7, rating.id: 2.5}},
+            ]
+        )
+        results = s.get_results()
+        assert results["questions"][0]["answer_count"] == 2
+        assert results["questions"][1]["average"] == 2.83
+        assert results["questions"][1]["min"] == 2
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_mask_positions(self, engine):
+        rows = [0, 5, 63, 64, 65, 200]
+        mask = sum(1 << row for row in rows)
+        assert list(analytics.mask_positions(mask, 201, engine)) == rows
+        assert list(analytics.mask_positions(0, 10, engine)) == []
+
+    @pytest.mark.parametrize("engine", ENGINES)
+    def test_counts_and_values_for_rows(self, engine):
+        s, color, rating = _survey([1, 2, 3, 4, 5, 6])
+        rows = [1, 3, 4]
+        column = s.responses.column(color.id)
+        assert analytics.choice_counts(column, engine, rows) == [1, 2, 0]
+        values = analytics.scale_values(
+            *s.responses.split_column(rating.id, rows), engine, rows
+        )
+        assert list(values) == [2, 4, 5]
+
+
+class TestFilteredResults:
+    def _survey(self):
+        s = Survey("Filtered")
+        plan = MultipleChoiceQuestion("Plan", ["Free", "Pro"])
+        region = MultipleChoiceQuestion("Region", ["EU", "US"])
+        rating = ScaleQuestion("Rating", 1, 5)
+        for q in (plan, region, rating):
+            s.add_question(q)
+        s.publish()
+        rows = [
+            ("Free", "EU", 2),
+            ("Pro", "EU", 5),
+            ("Pro", "US", 4),
+            ("Free", "US", 1),
+            ("Pro", "EU", 3),
+        ]
+        for p, r, v in rows:
+            s.add_response({plan.id: p, region.id: r, rating.id: v})
+        return s, plan, region, rating
+
+    def test_filtered_results(self):
+        s, plan, region, rating = self._survey()
+        results = s.get_results(filters={plan.id: ["Pro"]})
+        assert results["response_count"] == 3
+        assert results["filters"] == {plan.id: ["Pro"]}
+        assert results["questions"][1]["distribution"]["EU"]["count"] == 2
+        assert results["questions"][2]["average"] == 4
+        both = s.get_results(filters={plan.id: ["Pro"], region.id: ["EU"]})
+        assert both["response_count"] == 2
+        assert both["questions"][2]["min"] == 3
+        assert s.get_results()["response_count"] == 5
+
+    def test_filtered_extended_statistics(self):
+        s, plan, _, _ = self._survey()
+        results = s.get_results(extended=True, filters={plan.id: ["Free"]})
+        assert results["questions"][2]["median"] == 1.5
+
+    def test_crosstab(self):
+        s, plan, region, rating = self._survey()
+        table = s.crosstab(plan.id, rating.id)
+        assert table["rows"]["Free"] == {"count": 2, "average": 1.5, "min": 1, "max": 2}
+        assert table["rows"]["Pro"]["average"] == 4
+        filtered = s.crosstab(plan.id, region.id, filters={region.id: ["US"]})
+        assert filtered["rows"]["Pro"]["distribution"]["US"]["count"] == 1
+        assert filtered["rows"]["Pro"]["count"] == 1
+
+    def test_crosstab_requires_choice_rows(self):
+        s, plan, _, rating = self._survey()
+        with pytest.raises(ValueError):
+            s.crosstab(rating.id, plan.id)
+        with pytest.raises(ValueError):
+            s.crosstab("missing", plan.id)
@@ -1,24 +1,117 @@
 import pytest
+import asyncio
+import gzip
 import json
 import tempfile
 import os
+import pstats
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
 
+from werkzeug.wrappers import Response
+
+from src import metrics, profiling
 from src.app import app
-from src.storage import SurveyStorage, get_storage
+from src.asgi import AsgiApp
+from src.models import Survey
+from src.storage import SurveyStorage, encode_cursor, get_storage
+
+
+class AsgiTestClient:
+    """Drives an ASGI app with the subset of Flask's test client API used here."""
+
+    def __init__(self, asgi_app):
+        self.asgi_app = asgi_app
+
+    def get(self, path, **kwargs):
+        return self.open("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.open("POST", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.open("DELETE", path, **kwargs)
+
+    def open(self, method, path, data=None, content_type=None, headers=None):
+        body = data.encode("utf-8") if isinstance(data, str) else data or b""
+        raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in (headers or {}).items()
+        ]
+        if content_type is not None:
+            raw_headers.append((b"content-type", content_type.encode("latin-1")))
+        raw_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "query_string": query.encode("latin-1"),
+            "root_path": "",
+            "headers": raw_headers,
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+        return asyncio.run(self._request(scope, body))
+
+    async def _request(self, scope, body):
+        # Deliver the body in two messages to exercise reassembly.
+        incoming = [
+            {"type": "http.request", "body": body[:1], "more_body": True},
+            {"type": "http.request", "body": body[1:], "more_body": False},
+        ]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await self.asgi_app(scope, receive, send)
+        start = sent[0]
+        assert start["type"] == "http.response.start"
+        assert not sent[-1]["more_body"]
+        chunks = [message["body"] for message in sent[1:]]
+        if not any(name == b"content-length" for name, _ in start["headers"]):
+            # Sent without a length: hand it over as a stream, like Flask does.
+            chunks = iter(chunks)
+        return Response(
+            chunks,
+            status=start["status"],
+            headers=[
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in start["headers"]
+            ],
+        )
 
 
-@pytest.fixture
-def client():
+@pytest.fixture(params=["wsgi", "asgi"])
+def client(request):
     temp_file = tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json")
     temp_file.close()
     app.config["TESTING"] = True
     import src.app
 
     src.app.storage = SurveyStorage(storage_path=temp_file.name)
-    with app.test_client() as client:
-        yield client
-    if os.path.exists(temp_file.name):
-        os.unlink(temp_file.name)
+    if request.param == "asgi":
+        asgi_app = AsgiApp(app, max_workers=4)
+        yield AsgiTestClient(asgi_app)
+        asgi_app.executor.shutdown(wait=True)
+    else:
+        with app.test_client() as client:
+            yield client
+    for suffix in ("", ".sha256", ".index", ".lock"):
+        path = temp_file.name + suffix
+        if os.path.exists(path):
+            os.unlink(path)
 
 
 class TestHealthCheck:
@@ -209,3 +302,580 @@ class TestSurveyWorkflow:
         assert results_response.status_code == 200
         results = json.loads(results_response.data)
         assert results["response_count"] == 1
+
+
+class TestExportEndpoint:
+    def _survey_with_response(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Export"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        q_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "text", "text": "Name"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        client.post(
+            f"/surveys/{survey_id}/responses",
+            data=json.dumps({"responses": [{"question_id": q_id, "answer": "Ann"}]}),
+            content_type="application/json",
+        )
+        return survey_id
+
+    def test_export_streams_csv(self, client):
+        survey_id = self._survey_with_response(client)
+        response = client.get(f"/surveys/{survey_id}/export")
+        assert response.status_code == 200
+        assert response.mimetype == "text/csv"
+        assert response.is_streamed
+        assert "attachment" in response.headers["Content-Disposition"]
+        lines = response.data.decode("utf-8").splitlines()
+        assert lines[0] == "response_id,timestamp,Name"
+        assert lines[1].endswith(",Ann")
+
+    def test_export_gzip(self, client):
+        survey_id = self._survey_with_response(client)
+        response = client.get(
+            f"/surveys/{survey_id}/export", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data).startswith(b"response_id,timestamp")
+
+    @pytest.mark.parametrize(
+        "accept_encoding", ["gzip;q=0", "identity", "gzip;q=0, *;q=0.5"]
+    )
+    def test_export_respects_refused_gzip(self, client, accept_encoding):
+        survey_id = self._survey_with_response(client)
+        response = client.get(
+            f"/surveys/{survey_id}/export",
+            headers={"Accept-Encoding": accept_encoding},
+        )
+        assert "Content-Encoding" not in response.headers
+        assert response.data.startswith(b"response_id,timestamp")
+
+    def test_export_without_responses(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Empty"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        assert client.get(f"/surveys/{survey_id}/export").status_code == 400
+
+
+class TestBulkEndpoint:
+    def _published_survey(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Kiosk"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        q_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "scale", "text": "Rate"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        return survey_id, q_id
+
+    def test_bulk_upload(self, client):
+        survey_id, q_id = self._published_survey(client)
+        items = [{"responses": [{"question_id": q_id, "answer": v}]} for v in (1, 9, 5)]
+        items.append({"answers": []})
+        response = client.post(
+            f"/surveys/{survey_id}/responses/bulk",
+            data=json.dumps({"items": items}),
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["accepted"] == 2
+        assert data["rejected"] == 2
+        assert data["results"][3]["error"] == "Malformed response"
+        results = json.loads(client.get(f"/surveys/{survey_id}/results").data)
+        assert results["response_count"] == 2
+
+    def test_bulk_requires_items(self, client):
+        survey_id, _ = self._published_survey(client)
+        response = client.post(
+            f"/surveys/{survey_id}/responses/bulk",
+            data=json.dumps({"responses": []}),
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+
+    def test_bulk_unknown_survey(self, client):
+        response = client.post(
+            "/surveys/missing/responses/bulk",
+            data=json.dumps({"items": []}),
+            content_type="application/json",
+        )
+        assert response.status_code == 404
+
+
+class TestFilteredResultsEndpoints:
+    def _survey(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Segments"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        plan_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps(
+                    {"type": "multiple_choice", "text": "Plan", "options": ["A", "B"]}
+                ),
+                content_type="application/json",
+            ).data
+        )["id"]
+        rating_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "scale", "text": "Rate"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        for plan, rating in (("A", 1), ("B", 4), ("B", 5)):
+            client.post(
+                f"/surveys/{survey_id}/responses",
+                data=json.dumps(
+                    {
+                        "responses": [
+                            {"question_id": plan_id, "answer": plan},
+                            {"question_id": rating_id, "answer": rating},
+                        ]
+                    }
+                ),
+                content_type="application/json",
+            )
+        return survey_id, plan_id, rating_id
+
+    def test_filtered_results(self, client):
+        survey_id, plan_id, _ = self._survey(client)
+        response = client.get(f"/surveys/{survey_id}/results?filter={plan_id}:B")
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["response_count"] == 2
+        assert data["questions"][1]["average"] == 4.5
+
+    def test_bad_filter(self, client):
+        survey_id, plan_id, _ = self._survey(client)
+        assert (
+            client.get(f"/surveys/{survey_id}/results?filter=nocolon").status_code
+            == 400
+        )
+        response = client.get(f"/surveys/{survey_id}/results?filter={plan_id}:Z")
+        assert response.status_code == 400
+
+    def test_crosstab(self, client):
+        survey_id, plan_id, rating_id = self._survey(client)
+        response = client.get(
+            f"/surveys/{survey_id}/crosstab?row={plan_id}&column={rating_id}"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["rows"]["B"]["count"] == 2
+        assert data["rows"]["A"]["max"] == 1
+
+    def test_crosstab_errors(self, client):
+        survey_id, plan_id, rating_id = self._survey(client)
+        assert client.get(f"/surveys/{survey_id}/crosstab").status_code == 400
+        response = client.get(
+            f"/surveys/{survey_id}/crosstab?row={rating_id}&column={plan_id}"
+        )
+        assert response.status_code == 400
+        assert client.get("/surveys/missing/crosstab").status_code == 404
+
+
+class TestSurveyListing:
+    def _create(self, client, count):
+        for i in range(count):
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": f"Survey {i}"}),
+                content_type="application/json",
+            )
+
+    def test_cursor_pagination(self, client):
+        self._create(client, 5)
+        titles, cursor = [], None
+        while True:
+            url = "/surveys?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = json.loads(client.get(url).data)
+            assert data["count"] == len(data["surveys"]) <= 2
+            titles += [s["title"] for s in data["surveys"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert titles == [f"Survey {i}" for i in range(5)]
+
+    def test_status_filter_and_fields(self, client):
+        self._create(client, 2)
+        response = client.get("/surveys?status=published")
+        assert json.loads(response.data)["surveys"] == []
+        response = client.get("/surveys?status=draft&fields=id,title")
+        surveys = json.loads(response.data)["surveys"]
+        assert len(surveys) == 2
+        assert set(surveys[0]) == {"id", "title"}
+
+    def test_bad_parameters(self, client):
+        assert client.get("/surveys?limit=0").status_code == 400
+        assert client.get("/surveys?limit=ten").status_code == 400
+        assert client.get("/surveys?status=archived").status_code == 400
+        assert client.get("/surveys?fields=id,secret").status_code == 400
+        assert client.get("/surveys?cursor=garbage").status_code == 400
+        aware = encode_cursor("2020-01-01T00:00:00+00:00", "x")
+        assert client.get(f"/surveys?cursor={aware}").status_code == 400
+
+
+class TestResponseListing:
+    def _survey(self, client, count):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Raw"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        question_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "text", "text": "Name?"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        ids = []
+        for i in range(count):
+            response = client.post(
+                f"/surveys/{survey_id}/responses",
+                data=json.dumps(
+                    {"responses": [{"question_id": question_id, "answer": str(i)}]}
+                ),
+                content_type="application/json",
+            )
+            ids.append(json.loads(response.data)["response_id"])
+        return survey_id, question_id, ids
+
+    def test_incremental_pull(self, client):
+        survey_id, question_id, ids = self._survey(client, 3)
+        data = json.loads(client.get(f"/surveys/{survey_id}/responses?limit=2").data)
+        assert [r["id"] for r in data["responses"]] == ids[:2]
+        assert data["has_more"]
+        cursor = data["next_cursor"]
+        data = json.loads(
+            client.get(f"/surveys/{survey_id}/responses?cursor={cursor}").data
+        )
+        assert [r["id"] for r in data["responses"]] == ids[2:]
+        assert not data["has_more"]
+        cursor = data["next_cursor"]
+        data = json.loads(
+            client.get(f"/surveys/{survey_id}/responses?cursor={cursor}").data
+        )
+        assert data["responses"] == [] and data["next_cursor"] == cursor
+        client.post(
+            f"/surveys/{survey_id}/responses",
+            data=json.dumps(
+                {"responses": [{"question_id": question_id, "answer": "new"}]}
+            ),
+            content_type="application/json",
+        )
+        data = json.loads(
+            client.get(f"/surveys/{survey_id}/responses?cursor={cursor}").data
+        )
+        assert [r["answers"][question_id] for r in data["responses"]] == ["new"]
+
+    def test_time_range(self, client):
+        survey_id, _, ids = self._survey(client, 2)
+        data = json.loads(
+            client.get(f"/surveys/{survey_id}/responses?until=2000-01-01T00:00:00").data
+        )
+        assert data["count"] == 0
+        data = json.loads(
+            client.get(f"/surveys/{survey_id}/responses?since=2000-01-01T00:00:00").data
+        )
+        assert data["count"] == 2
+
+    def test_bad_parameters(self, client):
+        survey_id, _, _ = self._survey(client, 1)
+        url = f"/surveys/{survey_id}/responses"
+        assert client.get(f"{url}?since=yesterday").status_code == 400
+        assert client.get(f"{url}?cursor=garbage").status_code == 400
+        assert client.get(f"{url}?limit=-1").status_code == 400
+        assert client.get("/surveys/missing/responses").status_code == 404
+
+
+class TestConditionalGet:
+    def _survey(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Cached"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        question_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "scale", "text": "Rate"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        return survey_id, question_id
+
+    @pytest.mark.parametrize("suffix", ["", "/questions", "/results"])
+    def test_etag_and_not_modified(self, client, suffix):
+        survey_id, _ = self._survey(client)
+        url = f"/surveys/{survey_id}{suffix}"
+        first = client.get(url)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        again = client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.data == b""
+        assert again.headers["ETag"] == etag
+        assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_submission_invalidates(self, client):
+        survey_id, question_id = self._survey(client)
+        url = f"/surveys/{survey_id}/results"
+        first = client.get(url)
+        client.post(
+            f"/surveys/{survey_id}/responses",
+            data=json.dumps({"responses": [{"question_id": question_id, "answer": 4}]}),
+            content_type="application/json",
+        )
+        second = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 200
+        assert second.headers["ETag"] != first.headers["ETag"]
+        assert json.loads(second.data)["response_count"] == 1
+
+    def test_repeated_reads_are_served_from_cache(self, client, monkeypatch):
+        survey_id, _ = self._survey(client)
+        calls = []
+        original = Survey.get_results
+        monkeypatch.setattr(
+            Survey,
+            "get_results",
+            lambda self, **kw: calls.append(kw) or original(self, **kw),
+        )
+        url = f"/surveys/{survey_id}/results"
+        bodies = {client.get(url).data for _ in range(3)}
+        client.get(url + "?stats=extended")
+        assert len(bodies) == 1
+        assert len(calls) == 2
+
+
+class TestAsgiLifespan:
+    def test_startup_and_shutdown(self):
+        asgi_app = AsgiApp(app, max_workers=1)
+        asgi_app.executor
+        incoming = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(asgi_app({"type": "lifespan"}, receive, send))
+        assert [m["type"] for m in sent] == [
+            "lifespan.startup.complete",
+            "lifespan.shutdown.complete",
+        ]
+        assert asgi_app._executor is None
+
+    def test_unsupported_scope(self):
+        with pytest.raises(ValueError):
+            asyncio.run(AsgiApp(app)({"type": "websocket"}, None, None))
+
+
+class TestMetricsEndpoint:
+    def _sample(self, text, prefix):
+        for line in text.splitlines():
+            if line.startswith(prefix + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    def test_metrics(self, client):
+        route = 'method="POST",route="/surveys"'
+        before = client.get("/metrics").data.decode()
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Metrics"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.get("/no/such/path")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        text = response.data.decode()
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        count = f"http_request_duration_seconds_count{{{route}}}"
+        assert self._sample(text, count) == self._sample(before, count) + 1
+        created = f'http_requests_total{{{route},status="201"}}'
+        assert self._sample(text, created) == self._sample(before, created) + 1
+        assert 'route="<unmatched>",status="404"' in text
+        assert "surveys 1" in text.splitlines()
+        assert self._sample(text, "storage_size_bytes") > 0
+        assert 'operation="save_to_file"' in text
+        assert survey_id
+
+    def test_export_is_timed(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Export"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        question_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "text", "text": "Name"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        client.post(
+            f"/surveys/{survey_id}/responses",
+            data=json.dumps(
+                {"responses": [{"question_id": question_id, "answer": "Ann"}]}
+            ),
+            content_type="application/json",
+        )
+        before = metrics.operation_seconds.count(operation="export")
+        client.get(f"/surveys/{survey_id}/export").data
+        assert metrics.operation_seconds.count(operation="export") == before + 1
+        text = client.get("/metrics").data.decode()
+        assert "survey_responses 1" in text.splitlines()
+
+
+class TestProfiling:
+    def _survey_with_response(self, client):
+        survey_id = json.loads(
+            client.post(
+                "/surveys",
+                data=json.dumps({"title": "Profiled"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        question_id = json.loads(
+            client.post(
+                f"/surveys/{survey_id}/questions",
+                data=json.dumps({"type": "scale", "text": "Rate"}),
+                content_type="application/json",
+            ).data
+        )["id"]
+        client.post(f"/surveys/{survey_id}/publish")
+        client.post(
+            f"/surveys/{survey_id}/responses",
+            data=json.dumps({"responses": [{"question_id": question_id, "answer": 4}]}),
+            content_type="application/json",
+        )
+        return survey_id
+
+    def test_requests_cannot_profile_unless_allowed(
+        self, client, tmp_path, monkeypatch
+    ):
+        monkeypatch.setattr(
+            profiling, "profiler", profiling.Profiler(directory=str(tmp_path))
+        )
+        survey_id = self._survey_with_response(client)
+        response = client.get(
+            f"/surveys/{survey_id}/results", headers={"X-Profile": "1"}
+        )
+        assert "X-Profile-File" not in response.headers
+        assert os.listdir(tmp_path) == []
+
+    def test_profile_results_by_header(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            profiling,
+            "profiler",
+            profiling.Profiler(allow_requests=True, directory=str(tmp_path)),
+        )
+        survey_id = self._survey_with_response(client)
+        response = client.get(
+            f"/surveys/{survey_id}/results?extended=true",
+            headers={"X-Profile": "collapsed"},
+        )
+        assert response.status_code == 200
+        response.close()
+        path = tmp_path / response.headers["X-Profile-File"]
+        assert path.suffix == ".collapsed"
+        assert "get_results (models.py:" in path.read_text()
+
+    def test_profile_export_by_query_flag(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            profiling,
+            "profiler",
+            profiling.Profiler(allow_requests=True, directory=str(tmp_path)),
+        )
+        survey_id = self._survey_with_response(client)
+        response = client.get(f"/surveys/{survey_id}/export?profile=1")
+        assert response.data.startswith(b"response_id")
+        response.close()
+        stats = pstats.Stats(str(tmp_path / response.headers["X-Profile-File"]))
+        assert any(name == "iter_csv" for _, _, name in stats.stats)
+
+
+@pytest.mark.integration
+class TestDevelopmentServer:
+    def test_debug_server_starts_with_the_reloader(self, tmp_path):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = {
+            **os.environ,
+            "PYTHONPATH": root,
+            "FLASK_DEBUG": "true",
+            "FLASK_PORT": str(port),
+            "SURVEY_STORAGE_BACKEND": "json",
+        }
+        env.pop("WERKZEUG_RUN_MAIN", None)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src.app"],
+            cwd=tmp_path,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    with urllib.request.urlopen(
+                        f"http://127.0.0.1:{port}/health", timeout=1
+                    ) as response:
+                        assert response.status == 200
+                        break
+                except OSError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        pytest.fail(server.stderr.read().decode(errors="replace"))
+                    time.sleep(0.2)
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+            server.stderr.close()
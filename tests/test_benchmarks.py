@@ -0,0 +1,30 @@
+import json
+import os
+
+from benchmarks.suite import compare, run_suite
+
+
+class TestBenchmarkSuite:
+    def test_small_run_is_machine_readable(self, monkeypatch, tmp_path):
+        # The suite points the app's import-time storage at a temp database.
+        monkeypatch.setenv("SURVEY_STORAGE_BACKEND", "json")
+        monkeypatch.setenv("SURVEY_SQLITE_PATH", str(tmp_path / "unused.db"))
+        report = run_suite(sizes=[30], questions=3, submissions=10, repeat=1)
+        assert os.environ["SURVEY_STORAGE_BACKEND"] == "json"
+        assert os.environ["SURVEY_SQLITE_PATH"] == str(tmp_path / "unused.db")
+        report = json.loads(json.dumps(report))
+        assert report["metadata"]["json_engine"] in ("json", "orjson")
+        names = [r["benchmark"] for r in report["results"]]
+        assert names == [
+            "storage_save",
+            "storage_load",
+            "get_results",
+            "get_results_extended",
+            "csv_export",
+            "add_response",
+            "http_submit",
+        ]
+        assert all(r["seconds"] > 0 for r in report["results"])
+        rows = compare(report, report)
+        assert len(rows) == len(names)
+        assert all(ratio == 1 for *_, ratio in rows)
@@ -0,0 +1,29 @@
+from src.cache import SerializedCache
+
+
+class TestSerializedCache:
+    def test_builds_once_per_key(self):
+        cache = SerializedCache()
+        calls = []
+
+        def build():
+            calls.append(1)
+            return b"body"
+
+        assert cache.get_or_build(("s", "1"), build) == b"body"
+        assert cache.get_or_build(("s", "1"), build) == b"body"
+        assert len(calls) == 1
+        cache.get_or_build(("s", "2"), build)
+        assert len(calls) == 2
+
+    def test_least_recently_used_entries_are_dropped(self):
+        cache = SerializedCache(max_entries=2)
+        cache.get_or_build("a", lambda: b"a")
+        cache.get_or_build("b", lambda: b"b")
+        cache.get_or_build("a", lambda: b"stale")
+        cache.get_or_build("c", lambda: b"c")
+        assert len(cache) == 2
+        assert cache.get_or_build("a", lambda: b"new") == b"a"
+        assert cache.get_or_build("b", lambda: b"new") == b"new"
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,162 @@
+import tracemalloc
+import uuid
+from array import array
+from datetime import datetime
+
+import pytest
+
+from src.columnar import ResponseStore, timestamp_micros
+from src.models import MultipleChoiceQuestion, ScaleQuestion, TextQuestion
+
+
+@pytest.fixture
+def questions():
+    return [
+        TextQuestion("Name"),
+        MultipleChoiceQuestion("Color", ["Red", "Blue", "Green"]),
+        ScaleQuestion("Rating", 1, 10),
+    ]
+
+
+def _response(questions, name="Ann", color="Blue", rating=7):
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": datetime.utcnow().isoformat(),
+        "answers": {
+            questions[0].id: name,
+            questions[1].id: color,
+            questions[2].id: rating,
+        },
+    }
+
+
+class TestResponseStore:
+    def test_round_trip(self, questions):
+        store = ResponseStore(questions)
+        responses = [
+            _response(questions, name=f"Zoë {i}", rating=i % 10 + 1) for i in range(20)
+        ]
+        store.extend(responses)
+        assert len(store) == 20
+        assert list(store) == responses
+        assert store[-1] == responses[-1]
+        assert store[2:5] == responses[2:5]
+        with pytest.raises(IndexError):
+            store[20]
+
+    def test_answers_use_typed_columns(self, questions):
+        store = ResponseStore(questions)
+        store.append(_response(questions))
+        assert isinstance(store.column(questions[1].id).codes, array)
+        assert store.column(questions[2].id).values.typecode == "b"
+        assert store.answer(0, questions[1].id) == "Blue"
+        assert store.answer(0, "unknown", default="") == ""
+
+    def test_irregular_rows_round_trip(self, questions):
+        store = ResponseStore(questions)
+        odd = {
+            "id": "legacy-1",
+            "timestamp": "2024-01-01T00:00:00+00:00",
+            "answers": {
+                questions[1].id: "Purple",
+                questions[2].id: True,
+                "removed-question": "kept",
+            },
+        }
+        store.append(odd)
+        store.append(_response(questions))
+        assert store[0] == odd
+        assert store.answer(0, questions[0].id, default="") == ""
+        assert store[1]["answers"][questions[0].id] == "Ann"
+
+    def test_column_added_after_rows_is_backfilled(self, questions):
+        store = ResponseStore(questions[:1])
+        first = {
+            "id": str(uuid.uuid4()),
+            "timestamp": "2024-05-01T10:00:00",
+            "answers": {questions[0].id: "Ann"},
+        }
+        store.append(first)
+        store._questions = questions
+        second = _response(questions)
+        store.append(second)
+        assert store[0] == first
+        assert store[1] == second
+
+    def test_memory_is_an_order_of_magnitude_smaller(self, questions):
+        responses = [_response(questions, name=f"user{i}") for i in range(5000)]
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        as_dicts = [
+            {"id": r["id"], "timestamp": r["timestamp"], "answers": dict(r["answers"])}
+            for r in responses
+        ]
+        dict_size = tracemalloc.get_traced_memory()[0] - baseline
+        baseline = tracemalloc.get_traced_memory()[0]
+        store = ResponseStore(questions)
+        store.extend(responses)
+        store_size = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        assert store_size * 5 < dict_size
+        assert store.nbytes() < 5000 * 50
+        del as_dicts
+
+    def test_option_bitmaps_follow_appends(self, questions):
+        store = ResponseStore(questions)
+        colors = ["Red", "Blue", "Red", "Green", "Red"] * 30
+        for color in colors:
+            store.append(_response(questions, color=color))
+        mask = store.match_mask({questions[1].id: ["Red"]})
+        expected = sum(1 << i for i, c in enumerate(colors) if c == "Red")
+        assert mask == expected
+        both = store.match_mask({questions[1].id: ["Blue", "Green"]})
+        assert bin(both).count("1") == 60
+
+    def test_match_mask_rejects_bad_filters(self, questions):
+        store = ResponseStore(questions)
+        assert store.match_mask({questions[1].id: ["Red"]}) == 0
+        store.append(_response(questions))
+        with pytest.raises(ValueError):
+            store.match_mask({questions[1].id: ["Purple"]})
+        with pytest.raises(ValueError):
+            store.match_mask({questions[2].id: ["7"]})
+        with pytest.raises(ValueError):
+            store.match_mask({"unknown": ["Red"]})
+
+
+class TestTimeIndex:
+    def _store(self, questions, stamps):
+        store = ResponseStore(questions)
+        for stamp in stamps:
+            response = _response(questions)
+            response["timestamp"] = stamp
+            store.append(response)
+        return store
+
+    def test_in_order_appends_need_no_index(self, questions):
+        stamps = [f"2024-01-0{d}T00:00:00" for d in range(1, 6)]
+        store = self._store(questions, stamps)
+        assert store._time_order is None
+        assert store.time_slice() == [0, 1, 2, 3, 4]
+        assert store.time_slice(limit=2) == [0, 1]
+        assert store.time_slice(after=store.time_key(1)) == [2, 3, 4]
+
+    def test_out_of_order_appends(self, questions):
+        stamps = [
+            "2024-01-03T00:00:00",
+            "2024-01-01T00:00:00",
+            "2024-01-05T00:00:00",
+            "2024-01-02T00:00:00",
+        ]
+        store = self._store(questions, stamps)
+        assert store.time_slice() == [1, 3, 0, 2]
+        since = timestamp_micros(datetime(2024, 1, 2))
+        until = timestamp_micros(datetime(2024, 1, 5))
+        assert store.time_slice(since=since, until=until) == [3, 0]
+
+    def test_equal_timestamps_order_by_id(self, questions):
+        store = self._store(questions, ["2024-01-01T00:00:00"] * 10)
+        rows = store.time_slice()
+        ids = [store.response_id(row) for row in rows]
+        assert ids == sorted(ids)
+        assert store.time_slice(after=store.time_key(rows[4])) == rows[5:]
@@ -0,0 +1,39 @@
+import csv
+import gzip
+import io
+
+from src.export import gzip_chunks, iter_csv
+from src.models import Survey, TextQuestion, ScaleQuestion
+
+
+def _survey_with_responses(count):
+    s = Survey("Export")
+    name = TextQuestion("Name")
+    rating = ScaleQuestion("Rating", 1, 5)
+    s.add_question(name)
+    s.add_question(rating)
+    s.publish()
+    for i in range(count):
+        s.add_response({name.id: f"user, {i}", rating.id: i % 5 + 1})
+    return s
+
+
+class TestIterCsv:
+    def test_rows_match_responses(self):
+        s = _survey_with_responses(3)
+        rows = list(csv.reader(io.StringIO(b"".join(iter_csv(s)).decode("utf-8"))))
+        assert rows[0] == ["response_id", "timestamp", "Name", "Rating"]
+        assert len(rows) == 4
+        assert rows[1][0] == s.responses[0]["id"]
+        assert rows[3][2:] == ["user, 2", "3"]
+
+    def test_output_is_chunked(self):
+        s = _survey_with_responses(10)
+        chunks = list(iter_csv(s, chunk_rows=4))
+        assert len(chunks) == 3
+
+    def test_gzip_round_trip(self):
+        s = _survey_with_responses(50)
+        plain = b"".join(iter_csv(s, chunk_rows=7))
+        compressed = b"".join(gzip_chunks(iter_csv(s, chunk_rows=7)))
+        assert gzip.decompress(compressed) == plain
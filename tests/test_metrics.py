@@ -0,0 +1,65 @@
+import pytest
+
+from src import metrics
+from src.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics:
+    def test_counter(self):
+        counter = Counter("requests_total", "Requests.", ["route"])
+        counter.inc(route="/a")
+        counter.inc(2, route="/a")
+        assert counter.value(route="/a") == 3
+        assert counter.render() == [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/a"} 3',
+        ]
+        with pytest.raises(ValueError):
+            counter.inc(-1, route="/a")
+        with pytest.raises(ValueError):
+            counter.inc(path="/a")
+
+    def test_gauge_escapes_label_values(self):
+        gauge = Gauge("size", "Size.", ["name"])
+        gauge.set(1.5, name='a"b\\c\nd')
+        assert gauge.render()[-1] == 'size{name="a\\"b\\\\c\\nd"} 1.5'
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency", "Latency.", buckets=[0.1, 1])
+        for value in (0.05, 0.5, 0.7, 5):
+            histogram.observe(value)
+        assert histogram.count() == 4
+        assert histogram.render()[2:] == [
+            'latency_bucket{le="0.1"} 1',
+            'latency_bucket{le="1"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 6.25",
+            "latency_count 4",
+        ]
+        with pytest.raises(ValueError):
+            Histogram("bad", "Bad.", ["le"])
+
+    def test_registry(self):
+        registry = Registry()
+        registry.counter("a_total", "A.").inc()
+        registry.gauge("b", "B.").set(2)
+        assert registry.render().endswith(
+            "a_total 1\n# HELP b B.\n# TYPE b gauge\nb 2\n"
+        )
+        with pytest.raises(ValueError):
+            registry.counter("a_total", "Again.")
+
+    def test_timed_operations(self):
+        before = metrics.operation_seconds.count(operation="test_op")
+
+        @metrics.timed("test_op")
+        def work(x):
+            return x * 2
+
+        assert work(2) == 4
+        assert list(metrics.timed_iter(iter([b"a", b"b"]), "test_op")) == [b"a", b"b"]
+        abandoned = metrics.timed_iter(iter([b"a", b"b"]), "test_op")
+        next(abandoned)
+        abandoned.close()
+        assert metrics.operation_seconds.count(operation="test_op") == before + 3
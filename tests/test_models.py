@@ -8,6 +8,8 @@ from src.models import (
     ScaleQuestion,
     SurveyStatus,
     QuestionType,
+    QUESTION_CLASSES,
+    SURVEY_FIELDS,
 )
 
 
@@ -80,6 +82,57 @@ class TestScaleQuestion:
         assert q.validate_answer("3") is False
 
 
+class TestRestore:
+    @pytest.mark.parametrize(
+        "question",
+        [
+            TextQuestion("Name?"),
+            MultipleChoiceQuestion("Color?", ["Red", "Blue"]),
+            ScaleQuestion("Rate", min_value=0, max_value=10),
+        ],
+    )
+    def test_restore_round_trips_to_dict(self, question):
+        data = question.to_dict()
+        restored = QUESTION_CLASSES[data["type"]].restore(data)
+        assert type(restored) is type(question)
+        assert restored.to_dict() == data
+        assert restored.type == question.type
+
+    def test_restore_skips_validation(self):
+        data = {"id": "q1", "type": "multiple_choice", "text": "?", "options": ["A"]}
+        assert MultipleChoiceQuestion.restore(data).options == ["A"]
+
+    def test_restore_survey_keeps_identity(self):
+        created = datetime(2024, 1, 2, 3, 4, 5)
+        question = TextQuestion("Name?")
+        s = Survey.restore(
+            "s1", "Kept", "Desc", [question], SurveyStatus.PUBLISHED, created
+        )
+        assert (s.id, s.title, s.description) == ("s1", "Kept", "Desc")
+        assert s.created_at == created
+        assert s.status == SurveyStatus.PUBLISHED
+        s.add_response({question.id: "Ada"})
+        assert s.get_results()["response_count"] == 1
+
+    def test_models_have_no_instance_dict(self):
+        for obj in (
+            Survey("Test"),
+            TextQuestion("Name?"),
+            MultipleChoiceQuestion("Color?", ["Red", "Blue"]),
+            ScaleQuestion("Rate"),
+        ):
+            assert not hasattr(obj, "__dict__")
+
+    def test_etag_epoch_is_stable(self):
+        s = Survey("Test")
+        first = s.etag
+        assert s.etag == first
+        s.add_question(TextQuestion("Name?"))
+        assert s.etag != first
+        assert s.etag.split("-")[0] == first.split("-")[0]
+        assert Survey("Test").etag.split("-")[0] != first.split("-")[0]
+
+
 class TestSurvey:
     def test_create_survey(self):
         s = Survey("Customer Satisfaction", "Annual survey")
@@ -161,6 +214,25 @@ class TestSurvey:
         with pytest.raises(ValueError):
             s.add_response({q.id: 10})
 
+    def test_add_response_unexpected_answer(self):
+        s = Survey("Test Survey")
+        q = ScaleQuestion("Rating", 1, 5)
+        s.add_question(q)
+        s.publish()
+        with pytest.raises(ValueError, match="Unexpected answer for question extra"):
+            s.add_response({q.id: 3, "extra": "x"})
+        assert len(s.responses) == 0
+
+    def test_validation_plan_is_compiled_at_publish(self):
+        s = Survey("Test Survey")
+        q = MultipleChoiceQuestion("Color", ["Red", "Blue"])
+        s.add_question(q)
+        s.publish()
+        plan = s.validation_plan()
+        assert plan.required == frozenset([q.id])
+        s.add_response({q.id: "Red"})
+        assert s.validation_plan() is plan
+
     def test_get_results(self):
         s = Survey("Test Survey")
         q1 = MultipleChoiceQuestion("Color", ["Red", "Blue", "Green"])
@@ -181,3 +253,163 @@ class TestSurvey:
         assert scale_results["average"] == 4.67
         assert scale_results["min"] == 4
         assert scale_results["max"] == 5
+
+    def test_get_results_without_responses(self):
+        s = Survey("Test Survey")
+        q1 = MultipleChoiceQuestion("Color", ["Red", "Blue"])
+        q2 = ScaleQuestion("Rating", 1, 5)
+        s.add_question(q1)
+        s.add_question(q2)
+        s.publish()
+        results = s.get_results()
+        assert results["questions"][0]["distribution"]["Red"]["percentage"] == 0
+        assert results["questions"][1]["average"] == 0
+
+    def test_to_dict_fields(self):
+        survey = Survey("Projected")
+        survey.add_question(TextQuestion("Name?"))
+        assert survey.to_dict(["id", "question_count"]) == {
+            "id": survey.id,
+            "question_count": 1,
+        }
+        assert set(survey.to_dict()) == set(SURVEY_FIELDS)
+        with pytest.raises(ValueError):
+            survey.to_dict(["secret"])
+
+    def test_page_responses(self):
+        survey = Survey("Paged")
+        survey.add_question(TextQuestion("Name?"))
+        survey.publish()
+        ids = [survey.add_response({survey.questions[0].id: str(i)}) for i in range(5)]
+        page, last, has_more = survey.page_responses(limit=2)
+        assert [r["id"] for r in page] == ids[:2] and has_more
+        page, last, has_more = survey.page_responses(after=last, limit=10)
+        assert [r["id"] for r in page] == ids[2:] and not has_more
+        assert survey.page_responses(after=last) == ([], None, False)
+        since = datetime.fromisoformat(survey.responses[3]["timestamp"])
+        page, _, _ = survey.page_responses(since=since)
+        assert [r["id"] for r in page] == ids[3:]
+        page, _, _ = survey.page_responses(until=since)
+        assert [r["id"] for r in page] == ids[:3]
+
+    def test_mutations_change_the_etag(self):
+        survey = Survey("Versioned")
+        seen = {survey.etag}
+        question = TextQuestion("Name?")
+        survey.add_question(question)
+        seen.add(survey.etag)
+        survey.publish()
+        seen.add(survey.etag)
+        survey.add_response({question.id: "Ann"})
+        seen.add(survey.etag)
+        survey.add_responses([{question.id: "Bob"}, {question.id: "Cy"}])
+        seen.add(survey.etag)
+        assert len(seen) == 5
+        etag = survey.etag
+        survey.get_results(extended=True)
+        survey.to_dict()
+        assert survey.etag == etag
+        assert Survey("Other", survey_id=survey.id).etag != Survey("Other").etag
+
+
+class TestResultAggregates:
+    def _survey(self):
+        s = Survey("Test Survey")
+        s.add_question(TextQuestion("Name"))
+        s.add_question(MultipleChoiceQuestion("Color", ["Red", "Blue"]))
+        s.add_question(ScaleQuestion("Rating", 1, 10))
+        s.publish()
+        return s
+
+    def test_aggregates_follow_new_responses(self):
+        s = self._survey()
+        name, color, rating = s.questions
+        s.add_response({name.id: "Ann", color.id: "Red", rating.id: 7})
+        assert s.get_results()["questions"][2]["average"] == 7
+        s.add_response({name.id: "Bob", color.id: "Blue", rating.id: 2})
+        results = s.get_results()
+        assert results["questions"][0]["answer_count"] == 2
+        assert results["questions"][1]["distribution"]["Blue"] == {
+            "count": 1,
+            "percentage": 50.0,
+        }
+        assert results["questions"][2]["min"] == 2
+        assert results["questions"][2]["max"] == 7
+
+    def test_restored_responses_are_aggregated(self):
+        s = self._survey()
+        name, color, rating = s.questions
+        s.add_response({name.id: "Ann", color.id: "Red", rating.id: 4})
+        s.get_results()
+        restored = [
+            {"id": str(i), "timestamp": "", "answers": dict(r["answers"])}
+            for i, r in enumerate(list(s.responses) * 3)
+        ]
+        s.restore_responses(restored)
+        results = s.get_results()
+        assert results["response_count"] == 3
+        assert results["questions"][1]["distribution"]["Red"]["count"] == 3
+
+
+class TestBulkResponses:
+    def _survey(self):
+        s = Survey("Bulk")
+        s.add_question(TextQuestion("Name"))
+        s.add_question(MultipleChoiceQuestion("Color", ["Red", "Blue"]))
+        s.add_question(ScaleQuestion("Rating", 1, 5))
+        s.publish()
+        return s
+
+    def test_compiled_validators_match_validate_answer(self):
+        s = self._survey()
+        samples = ["Ann", "  ", "Red", "Green", 3, 0, 6, 2.5, True, None, ["Red"]]
+        for question in s.questions:
+            is_valid = question.compile_validator()
+            for answer in samples:
+                assert is_valid(answer) == question.validate_answer(answer)
+
+    def test_validation_plan_matches_validate_answer(self):
+        class Name(str):
+            pass
+
+        s = self._survey()
+        name, color, rating = s.questions
+        plan = s.validation_plan()
+        samples = ["Ann", Name("Ann"), "  ", "Red", "Green", 3, 0, 6, True, None]
+        for question in s.questions:
+            for answer in samples:
+                answers = {name.id: "Ann", color.id: "Red", rating.id: 3}
+                answers[question.id] = answer
+                expected = question.validate_answer(answer)
+                assert (plan.error(answers) is None) == expected
+
+    def test_add_responses_reports_each_item(self):
+        s = self._survey()
+        name, color, rating = s.questions
+        results = s.add_responses(
+            [
+                {name.id: "Ann", color.id: "Red", rating.id: 5},
+                {name.id: "Bob", color.id: "Green", rating.id: 5},
+                {name.id: "Cid", color.id: "Blue"},
+                None,
+                {name.id: "Dee", color.id: "Blue", rating.id: 1},
+                {name.id: "Eve", color.id: "Red", rating.id: 2, "other": 1},
+            ]
+        )
+        assert [r["index"] for r in results] == [0, 1, 2, 3, 4, 5]
+        assert "response_id" in results[0] and "response_id" in results[4]
+        assert results[1]["error"] == f"Invalid answer for question {color.id}"
+        assert results[2]["error"] == f"Missing answer for question {rating.id}"
+        assert results[3]["error"] == "Malformed response"
+        assert results[5]["error"] == "Unexpected answer for question other"
+        assert [r["id"] for r in s.responses] == [
+            results[0]["response_id"],
+            results[4]["response_id"],
+        ]
+        assert s.get_results()["questions"][2]["average"] == 3
+
+    def test_add_responses_to_draft_fails(self):
+        s = Survey("Draft")
+        s.add_question(TextQuestion("Name"))
+        with pytest.raises(ValueError):
+            s.add_responses([{}])
@@ -0,0 +1,136 @@
+import os
+import pstats
+
+import pytest
+
+from src import profiling
+from src.profiling import ProfileSession, Profiler, StackTracer
+
+
+def _leaf(n):
+    return sum(range(n))
+
+
+def _outer():
+    return _leaf(1000) + _leaf(10)
+
+
+class TestStackTracer:
+    def test_collapsed_stacks(self):
+        tracer = StackTracer()
+        tracer.enable()
+        try:
+            _outer()
+        finally:
+            tracer.disable()
+        lines = tracer.collapsed().splitlines()
+        assert any(
+            line.startswith("_outer (test_profiling.py:") and ";_leaf (" in line
+            for line in lines
+        )
+        assert all(int(line.rsplit(" ", 1)[1]) >= 1 for line in lines)
+        assert StackTracer().collapsed() == ""
+
+
+class TestProfileSession:
+    def test_pstats_output(self, tmp_path):
+        session = ProfileSession("GET /x", "pstats", str(tmp_path))
+        assert session.finish() is None
+        assert session.run(_outer) == _outer()
+        path = session.finish()
+        assert os.path.basename(path).endswith(".pstats") and "GET_x" in path
+        stats = pstats.Stats(path)
+        assert any(name == "_leaf" for _, _, name in stats.stats)
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            ProfileSession("x", "svg", str(tmp_path))
+        with pytest.raises(ValueError):
+            Profiler(output_format="svg")
+
+
+class TestProfiledHotPaths:
+    def test_inactive_by_default(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiling, "profiler", Profiler(directory=str(tmp_path)))
+        traced = profiling.profiled("op")(_outer)
+        assert traced() == _outer()
+        assert list(profiling.profile_iter([1, 2])) == [1, 2]
+        assert os.listdir(tmp_path) == []
+
+    def test_session_records_nested_hot_paths(self, tmp_path):
+        inner = profiling.profiled("inner")(_leaf)
+        outer = profiling.profiled("outer")(lambda: inner(100) + inner(5))
+        session = ProfileSession("request", "collapsed", str(tmp_path))
+        token = profiling.start(session)
+        try:
+            outer()
+            chunks = profiling.profile_iter(iter([b"a", b"b"]))
+        finally:
+            profiling.stop(token)
+        assert list(chunks) == [b"a", b"b"]
+        path = session.finish()
+        with open(path) as f:
+            collapsed = f.read()
+        assert "_leaf (test_profiling.py:" in collapsed
+
+    def test_process_wide_outside_requests(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            profiling,
+            "profiler",
+            Profiler(enabled=True, directory=str(tmp_path), output_format="collapsed"),
+        )
+        assert profiling.profiled("save_to_file")(_outer)() == _outer()
+        (name,) = os.listdir(tmp_path)
+        assert "save_to_file" in name and name.endswith(".collapsed")
+
+    def test_one_session_per_outermost_hot_path(self, tmp_path, monkeypatch):
+        sampler = Profiler(enabled=True, directory=str(tmp_path))
+        monkeypatch.setattr(profiling, "profiler", sampler)
+        inner = profiling.profiled("inner")(_leaf)
+        outer = profiling.profiled("outer")(lambda: inner(100) + inner(5))
+        outer()
+        (name,) = os.listdir(tmp_path)
+        assert "outer" in name
+        rolls = []
+        monkeypatch.setattr(sampler, "sampled", lambda: rolls.append(1) or False)
+        outer()
+        assert rolls == [1]
+
+    def test_unprofiled_request_is_not_sampled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            profiling, "profiler", Profiler(enabled=True, directory=str(tmp_path))
+        )
+        token = profiling.start(None)
+        try:
+            assert profiling.profiled("op")(_outer)() == _outer()
+            assert list(profiling.profile_iter([1, 2])) == [1, 2]
+        finally:
+            profiling.stop(token)
+        assert os.listdir(tmp_path) == []
+
+
+class TestProfiler:
+    def test_session_for_request(self, tmp_path):
+        closed = Profiler(directory=str(tmp_path))
+        assert closed.session_for_request("GET /", "1") is None
+        allowed = Profiler(allow_requests=True, directory=str(tmp_path))
+        assert allowed.session_for_request("GET /", None) is None
+        assert allowed.session_for_request("GET /", "1").output_format == "pstats"
+        session = allowed.session_for_request("GET /", "collapsed")
+        assert session.output_format == "collapsed"
+        sampled = Profiler(enabled=True, sample_rate=1.0, directory=str(tmp_path))
+        assert sampled.session_for_request("GET /", None) is not None
+        never = Profiler(enabled=True, sample_rate=0.0)
+        assert never.session_for_request("GET /", None) is None
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("SURVEY_PROFILE", "true")
+        monkeypatch.setenv("SURVEY_PROFILE_SAMPLE", "0.25")
+        monkeypatch.setenv("SURVEY_PROFILE_REQUESTS", "true")
+        monkeypatch.setenv("SURVEY_PROFILE_DIR", "/tmp/p")
+        monkeypatch.setenv("SURVEY_PROFILE_FORMAT", "collapsed")
+        profiler = Profiler.from_env()
+        assert profiler.enabled and profiler.allow_requests
+        assert profiler.sample_rate == 0.25
+        assert profiler.directory == "/tmp/p"
+        assert profiler.output_format == "collapsed"
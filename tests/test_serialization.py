@@ -0,0 +1,86 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src import serialization
+from src.models import MultipleChoiceQuestion, Survey, TextQuestion
+from src.serialization import Fragment, JsonSerializer, get_serializer
+
+ENGINES = ["json"] + (["orjson"] if serialization.orjson is not None else [])
+
+
+@pytest.fixture(params=ENGINES)
+def serializer(request):
+    return get_serializer(request.param)
+
+
+class TestSerializer:
+    def test_compact_utf8(self, serializer):
+        data = serializer.dumps({"b": [1, 2.5, None, True], "a": "café"})
+        assert data == '{"b":[1,2.5,null,true],"a":"café"}'.encode("utf-8")
+        assert serializer.loads(data) == {"b": [1, 2.5, None, True], "a": "café"}
+
+    def test_sort_keys(self, serializer):
+        assert serializer.dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+    def test_fragments_are_spliced_verbatim(self, serializer):
+        fragment = serializer.fragment({"z": 1, "a": [1, 2]})
+        assert fragment.data == b'{"a":[1,2],"z":1}'
+        data = serializer.dumps({"x": fragment, "y": [fragment, "\x00"]})
+        assert json.loads(data) == {
+            "x": {"a": [1, 2], "z": 1},
+            "y": [{"a": [1, 2], "z": 1}, "\x00"],
+        }
+
+    def test_default_and_unknown_types(self, serializer):
+        when = datetime(2024, 1, 2, 3, 4, 5)
+        data = serializer.dumps({"when": when}, default=lambda v: v.isoformat())
+        assert json.loads(data) == {"when": "2024-01-02T03:04:05"}
+        with pytest.raises(TypeError):
+            serializer.dumps({"when": when})
+        with pytest.raises(TypeError):
+            serializer.dumps(object())
+
+    def test_wide_integers_and_non_string_keys(self, serializer):
+        assert serializer.loads(serializer.dumps([2**70])) == [2**70]
+        assert serializer.loads(serializer.dumps({1: "a"})) == {"1": "a"}
+
+    def test_lone_surrogates_are_escaped(self, serializer):
+        data = serializer.dumps({"answer": "\ud800x", "fragment": Fragment(b"[1]")})
+        assert data == b'{"answer":"\\ud800x","fragment":[1]}'
+        assert serializer.loads(data) == {"answer": "\ud800x", "fragment": [1]}
+
+    def test_invalid_json(self, serializer):
+        with pytest.raises(json.JSONDecodeError):
+            serializer.loads(b"{")
+
+
+class TestGetSerializer:
+    def test_default_prefers_orjson(self, monkeypatch):
+        monkeypatch.delenv("SURVEY_JSON_ENGINE", raising=False)
+        assert get_serializer().name == ENGINES[-1]
+
+    def test_engine_from_environment(self, monkeypatch):
+        monkeypatch.setenv("SURVEY_JSON_ENGINE", "json")
+        assert type(get_serializer()) is JsonSerializer
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            get_serializer("yaml")
+
+
+class TestQuestionsFragment:
+    def test_reused_until_questions_change(self):
+        survey = Survey("Test")
+        survey.add_question(TextQuestion("Name"))
+        fragment = survey.questions_fragment()
+        assert isinstance(fragment, Fragment)
+        assert survey.questions_fragment() is fragment
+        color = MultipleChoiceQuestion("Color", ["Red", "Blue"])
+        survey.add_question(color)
+        assert json.loads(survey.questions_fragment().data) == [
+            q.to_dict() for q in survey.questions
+        ]
+        survey.remove_question(color.id)
+        assert len(json.loads(survey.questions_fragment().data)) == 1
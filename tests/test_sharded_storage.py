@@ -0,0 +1,243 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models import QuestionType, SurveyStatus
+from src.sharded_storage import ShardedSurveyStorage
+from src.storage import BaseStorage, StorageError
+
+
+class TestShardedSurveyStorage:
+    @pytest.fixture
+    def root(self, tmp_path):
+        return str(tmp_path / "surveys")
+
+    @pytest.fixture
+    def storage(self, root):
+        return ShardedSurveyStorage(root, segment_size=4)
+
+    def _published_survey(self, storage):
+        survey = storage.create_survey("Test", "Description")
+        storage.add_question_to_survey(survey.id, "text", "Name")
+        storage.add_question_to_survey(
+            survey.id, "multiple_choice", "Color", options=["Red", "Blue"]
+        )
+        storage.add_question_to_survey(
+            survey.id, "scale", "Rate", min_value=1, max_value=10
+        )
+        storage.publish_survey(survey.id)
+        return survey
+
+    def _scale_survey(self, storage):
+        survey = storage.create_survey("Ratings")
+        question = storage.add_question_to_survey(
+            survey.id, "scale", "Rate", max_value=10
+        )
+        storage.publish_survey(survey.id)
+        return survey, question
+
+    def test_implements_storage_interface(self, storage):
+        assert isinstance(storage, BaseStorage)
+
+    def test_persistence(self, storage, root):
+        survey = self._published_survey(storage)
+        name, color, rate = survey.questions
+        response_id = storage.add_response(
+            survey.id, {name.id: "Ann", color.id: "Blue", rate.id: 9}
+        )
+        loaded = ShardedSurveyStorage(root).get_survey(survey.id)
+        assert loaded.title == "Test"
+        assert loaded.status == SurveyStatus.PUBLISHED
+        assert [q.type for q in loaded.questions] == [
+            QuestionType.TEXT,
+            QuestionType.MULTIPLE_CHOICE,
+            QuestionType.SCALE,
+        ]
+        assert loaded.responses[0]["id"] == response_id
+        assert loaded.get_results()["questions"][2]["average"] == 9
+
+    def test_one_file_per_survey(self, storage, root):
+        first, rate = self._scale_survey(storage)
+        second, _ = self._scale_survey(storage)
+        before = os.stat(os.path.join(root, "surveys", second.id + ".json"))
+        storage.add_response(first.id, {rate.id: 3})
+        storage.delete_survey(first.id)
+        after = os.stat(os.path.join(root, "surveys", second.id + ".json"))
+        assert before.st_mtime_ns == after.st_mtime_ns
+        assert os.listdir(os.path.join(root, "surveys")) == [second.id + ".json"]
+        assert os.listdir(os.path.join(root, "responses")) == []
+
+    def test_responses_roll_over_into_segments(self, storage, root):
+        survey, rate = self._scale_survey(storage)
+        storage.add_responses(survey.id, [{rate.id: i % 10 + 1} for i in range(6)])
+        storage.add_response(survey.id, {rate.id: 10})
+        segments = sorted(os.listdir(os.path.join(root, "responses", survey.id)))
+        assert segments == ["00000000.jsonl", "00000001.jsonl"]
+        reopened = ShardedSurveyStorage(root, segment_size=4)
+        loaded = reopened.get_survey(survey.id)
+        assert [r["answers"][rate.id] for r in loaded.responses] == [
+            1,
+            2,
+            3,
+            4,
+            5,
+            6,
+            10,
+        ]
+        reopened.add_responses(survey.id, [{rate.id: 1}] * 2)
+        segments = sorted(os.listdir(os.path.join(root, "responses", survey.id)))
+        assert len(segments) == 3
+
+    def test_torn_append_is_dropped(self, storage, root):
+        survey, rate = self._scale_survey(storage)
+        storage.add_response(survey.id, {rate.id: 5})
+        segment = os.path.join(root, "responses", survey.id, "00000000.jsonl")
+        with open(segment, "a") as f:
+            f.write('{"id": "torn"')
+        reopened = ShardedSurveyStorage(root)
+        reopened.add_response(survey.id, {rate.id: 6})
+        loaded = ShardedSurveyStorage(root).get_survey(survey.id)
+        assert [r["answers"][rate.id] for r in loaded.responses] == [5, 6]
+
+    def test_invalid_stored_response(self, storage, root):
+        survey, rate = self._scale_survey(storage)
+        storage.add_response(survey.id, {rate.id: 5})
+        segment = os.path.join(root, "responses", survey.id, "00000000.jsonl")
+        with open(segment, "a") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "id": "x",
+                        "timestamp": "t",
+                        "answers": {rate.id: 99},
+                    }
+                )
+                + "\n"
+            )
+        with pytest.raises(StorageError):
+            ShardedSurveyStorage(root).get_survey(survey.id)
+
+    def test_manifest_is_rebuilt_from_survey_files(self, storage, root):
+        kept = self._published_survey(storage)
+        storage.create_survey("Draft")
+        os.unlink(os.path.join(root, "manifest.jsonl"))
+        reopened = ShardedSurveyStorage(root)
+        published, _ = reopened.list_surveys_page(status=SurveyStatus.PUBLISHED)
+        assert [s.id for s in published] == [kept.id]
+        assert len(reopened.list_surveys()) == 2
+        assert os.path.exists(os.path.join(root, "manifest.jsonl"))
+
+    def test_stale_manifest_status_is_repaired(self, storage, root):
+        survey = storage.create_survey("Draft")
+        manifest_path = os.path.join(root, "manifest.jsonl")
+        with open(manifest_path) as f:
+            manifest = f.read()
+        storage.add_question_to_survey(survey.id, "text", "Q")
+        storage.publish_survey(survey.id)
+        with open(manifest_path, "w") as f:
+            f.write(manifest)
+        reopened = ShardedSurveyStorage(root)
+        assert reopened.get_survey(survey.id).status == SurveyStatus.PUBLISHED
+        published, _ = reopened.list_surveys_page(status=SurveyStatus.PUBLISHED)
+        assert [s.id for s in published] == [survey.id]
+
+    def test_manifest_changes_are_appended(self, root):
+        storage = ShardedSurveyStorage(root, compact_every=3)
+        manifest_path = os.path.join(root, "manifest.jsonl")
+        first = storage.create_survey("First")
+        with open(manifest_path, "rb") as f:
+            first_line = f.read()
+        second = storage.create_survey("Second")
+        storage.add_question_to_survey(second.id, "text", "Q")
+        storage.publish_survey(second.id)
+        with open(manifest_path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        assert lines[0] == first_line and len(lines) == 3
+        assert json.loads(lines[-1])["status"] == "published"
+        # Three lines more than the one survey left: rewritten.
+        storage.delete_survey(second.id)
+        with open(manifest_path, "rb") as f:
+            assert f.read() == first_line
+        storage.create_survey("Third")
+        storage.close()
+        reopened = ShardedSurveyStorage(root)
+        assert [s.title for s in reopened.list_surveys()] == ["First", "Third"]
+
+    def test_torn_manifest_line_is_repaired(self, storage, root):
+        kept = storage.create_survey("Kept")
+        storage.close()
+        with open(os.path.join(root, "manifest.jsonl"), "ab") as f:
+            f.write(b'{"id": "tor')
+        reopened = ShardedSurveyStorage(root)
+        assert [s.id for s in reopened.list_surveys()] == [kept.id]
+        with open(os.path.join(root, "manifest.jsonl"), "rb") as f:
+            assert f.read().endswith(b"\n")
+
+    def test_least_recently_used_surveys_are_evicted(self, root):
+        storage = ShardedSurveyStorage(root, max_loaded=2)
+        surveys = [self._scale_survey(storage) for _ in range(3)]
+        assert list(storage._cache) == [surveys[1][0].id, surveys[2][0].id]
+        first, rate = surveys[0]
+        storage.add_response(first.id, {rate.id: 4})
+        assert list(storage._cache) == [surveys[2][0].id, first.id]
+        assert len(storage.get_survey(first.id).responses) == 1
+        storage.get_survey(surveys[1][0].id)
+        assert first.id in storage._cache and surveys[2][0].id not in storage._cache
+
+    def test_pagination(self, storage):
+        for i in range(5):
+            storage.create_survey(f"S{i}")
+        page, cursor = storage.list_surveys_page(limit=3)
+        assert [s.title for s in page] == ["S0", "S1", "S2"]
+        page, cursor = storage.list_surveys_page(cursor=cursor, limit=3)
+        assert [s.title for s in page] == ["S3", "S4"] and cursor is None
+
+    def test_missing_survey(self, storage):
+        assert storage.get_survey("missing") is None
+        assert storage.delete_survey("missing") is False
+        with pytest.raises(ValueError):
+            storage.add_question_to_survey("missing", "text", "Q")
+        with pytest.raises(ValueError):
+            storage.publish_survey("missing")
+        with pytest.raises(ValueError):
+            storage.add_response("missing", {})
+        with pytest.raises(ValueError):
+            storage.add_responses("missing", [])
+
+    def test_parallel_submissions_to_different_surveys(self, storage, root):
+        surveys = [self._scale_survey(storage) for _ in range(4)]
+
+        def submit(worker):
+            survey, rate = surveys[worker % 4]
+            for i in range(25):
+                storage.add_response(survey.id, {rate.id: i % 10 + 1}, durable=True)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(submit, range(8)))
+        reopened = ShardedSurveyStorage(root)
+        assert [len(reopened.get_survey(s.id).responses) for s, _ in surveys] == [
+            50
+        ] * 4
+
+    def test_stats(self, storage, root):
+        survey, rate = self._scale_survey(storage)
+        storage.add_responses(survey.id, [{rate.id: 5}] * 6)
+        storage.create_survey("Draft")
+        assert storage.stats()["responses"] == 6
+        reopened = ShardedSurveyStorage(root, segment_size=4)
+        stats = reopened.stats()
+        assert stats["surveys"] == 2 and stats["responses"] == 6
+        assert stats["bytes"] > 0
+        assert reopened._cache == {}
+        # Later scrapes reuse the counts instead of reading the segments again.
+        reopened._count_segments = None
+        assert reopened.stats()["responses"] == 6
+        reopened.add_response(survey.id, {rate.id: 1})
+        assert reopened.stats()["responses"] == 7
+
+    def test_bulk_rejects_invalid_items(self, storage):
+        survey = self._published_survey(storage)
+        results = storage.add_responses(survey.id, [{}])
+        assert "error" in results[0]
@@ -0,0 +1,99 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src import snapshot
+
+
+def _records():
+    return [
+        (
+            {
+                "id": f"s{i}",
+                "title": f"Survey ✓ {i}",
+                "created_at": datetime(2024, 1, 1, 12, 0, i, 250).isoformat(),
+                "status": status,
+                "questions": i + 1,
+                "responses": i,
+            },
+            json.dumps({"id": f"s{i}", "n": i}).encode(),
+        )
+        for i, status in enumerate(["draft", "published", "closed"])
+    ]
+
+
+def _write(tmp_path, records, snapshot_format="binary"):
+    payload, index = snapshot.encode(
+        records, datetime(2024, 2, 1, 8, 30), snapshot_format
+    )
+    path = tmp_path / f"snapshot.{snapshot_format}"
+    path.write_bytes(payload)
+    return str(path), payload, index
+
+
+class TestBinarySnapshot:
+    def test_directory_round_trips(self, tmp_path):
+        records = _records()
+        path, _, index = _write(tmp_path, records)
+        assert snapshot.detect_format(path) == "binary"
+        mapped = snapshot.BinarySnapshot(path)
+        try:
+            assert mapped.saved_at == datetime(2024, 2, 1, 8, 30)
+            assert mapped.index == index
+            for (entry, chunk), located in zip(records, mapped.index):
+                assert {k: located[k] for k in entry} == entry
+                assert mapped.read(located["offset"], located["length"]) == chunk
+        finally:
+            mapped.close()
+
+    def test_empty_snapshot(self, tmp_path):
+        path, _, _ = _write(tmp_path, [])
+        mapped = snapshot.BinarySnapshot(path)
+        assert mapped.index == []
+        mapped.close()
+
+    def test_json_offsets_point_at_records(self, tmp_path):
+        records = _records()
+        path, payload, index = _write(tmp_path, records, "json")
+        assert snapshot.detect_format(path) == "json"
+        assert [s["n"] for s in json.loads(payload)["surveys"]] == [0, 1, 2]
+        for (_, chunk), entry in zip(records, index):
+            assert payload[entry["offset"] : entry["offset"] + entry["length"]] == chunk
+
+    @pytest.mark.parametrize(
+        "damage",
+        [
+            lambda data: data[:20],
+            lambda data: data[:-1],
+            lambda data: data[:-3] + bytes([data[-3] ^ 0xFF]) + data[-2:],
+            lambda data: data[:8] + b"\x09\x00" + data[10:],
+        ],
+        ids=["header", "truncated", "directory", "version"],
+    )
+    def test_damaged_file_is_rejected(self, tmp_path, damage):
+        path, payload, _ = _write(tmp_path, _records())
+        with open(path, "wb") as f:
+            f.write(damage(payload))
+        with pytest.raises(ValueError):
+            snapshot.BinarySnapshot(path)
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            snapshot.encode([], datetime(2024, 1, 1), "xml")
+
+
+class TestConvertCommand:
+    def test_converts_to_the_other_format(self, tmp_path, monkeypatch, capsys):
+        from src.storage import SurveyStorage
+
+        source = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=source)
+        storage.create_survey("Kept")
+        storage.close()
+        target = str(tmp_path / "surveys.bin")
+        monkeypatch.setattr("sys.argv", ["snapshot", source, target])
+        snapshot.main()
+        assert snapshot.detect_format(target) == "binary"
+        assert "wrote 1 surveys" in capsys.readouterr().out
+        assert SurveyStorage(storage_path=target).list_surveys()[0].title == "Kept"
@@ -0,0 +1,291 @@
+import multiprocessing
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.models import SURVEY_FIELDS, QuestionType, SurveyStatus
+from src.sqlite_storage import SQLiteStorage
+from src.storage import BaseStorage
+
+
+def _hammer(db_path, survey_id, question_id, count, barrier, results):
+    storage = SQLiteStorage(db_path)
+    storage.get_survey(survey_id)
+    barrier.wait()
+    for i in range(count):
+        if i % 10 == 0:
+            storage.add_responses(survey_id, [{question_id: i % 5 + 1}] * 5)
+        else:
+            storage.add_response(survey_id, {question_id: i % 5 + 1})
+    barrier.wait()
+    survey = storage.get_survey(survey_id)
+    results.put((len(survey.responses), survey.get_results()["response_count"]))
+    storage.close()
+
+
+class TestSQLiteStorage:
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        return str(tmp_path / "surveys.db")
+
+    @pytest.fixture
+    def sqlite_storage(self, db_path):
+        storage = SQLiteStorage(db_path)
+        yield storage
+        storage.close()
+
+    def _published_survey(self, storage):
+        survey = storage.create_survey("Test", "Description")
+        storage.add_question_to_survey(survey.id, "text", "Name")
+        storage.add_question_to_survey(
+            survey.id, "multiple_choice", "Color", options=["Red", "Blue"]
+        )
+        storage.add_question_to_survey(
+            survey.id, "scale", "Rate", min_value=1, max_value=10
+        )
+        storage.publish_survey(survey.id)
+        return survey
+
+    def test_implements_storage_interface(self, sqlite_storage):
+        assert isinstance(sqlite_storage, BaseStorage)
+
+    def test_uses_wal_mode(self, sqlite_storage, db_path):
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.close()
+
+    def test_create_and_list_surveys(self, sqlite_storage):
+        sqlite_storage.create_survey("Survey 1")
+        sqlite_storage.create_survey("Survey 2")
+        assert len(sqlite_storage.list_surveys()) == 2
+        assert sqlite_storage.get_survey("nonexistent") is None
+
+    def test_persistence(self, sqlite_storage, db_path):
+        survey = self._published_survey(sqlite_storage)
+        name, color, rate = survey.questions
+        response_id = sqlite_storage.add_response(
+            survey.id, {name.id: "Ann", color.id: "Blue", rate.id: 9}
+        )
+        reopened = SQLiteStorage(db_path)
+        loaded = reopened.get_survey(survey.id)
+        assert loaded.title == "Test"
+        assert loaded.status == SurveyStatus.PUBLISHED
+        assert [q.type for q in loaded.questions] == [
+            QuestionType.TEXT,
+            QuestionType.MULTIPLE_CHOICE,
+            QuestionType.SCALE,
+        ]
+        assert loaded.questions[1].options == ["Red", "Blue"]
+        assert loaded.questions[2].max_value == 10
+        assert loaded.responses[0]["id"] == response_id
+        assert loaded.get_results()["questions"][2]["average"] == 9
+        reopened.close()
+
+    def test_surveys_are_loaded_on_demand(self, sqlite_storage, db_path):
+        survey = sqlite_storage.create_survey("Lazy")
+        reopened = SQLiteStorage(db_path)
+        assert reopened._cache == {}
+        assert reopened.get_survey(survey.id).title == "Lazy"
+        assert list(reopened._cache) == [survey.id]
+        reopened.close()
+
+    def test_least_recently_used_surveys_are_evicted(self, db_path):
+        storage = SQLiteStorage(db_path, max_loaded=2)
+        surveys = [storage.create_survey(f"S{i}") for i in range(3)]
+        assert list(storage._cache) == [surveys[1].id, surveys[2].id]
+        assert list(storage._synced) == list(storage._cache)
+        storage.add_question_to_survey(surveys[0].id, "text", "Q")
+        assert list(storage._cache) == [surveys[2].id, surveys[0].id]
+        assert len(storage.get_survey(surveys[0].id).questions) == 1
+        with storage._updating(surveys[2].id):
+            storage.get_survey(surveys[1].id)
+            assert surveys[2].id in storage._cache
+            assert surveys[0].id not in storage._cache
+        storage.close()
+
+    def test_delete_cascades(self, sqlite_storage, db_path):
+        survey = self._published_survey(sqlite_storage)
+        assert sqlite_storage.delete_survey(survey.id) is True
+        assert sqlite_storage.delete_survey(survey.id) is False
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0] == 0
+        conn.close()
+
+    def test_invalid_response_is_not_stored(self, sqlite_storage, db_path):
+        survey = self._published_survey(sqlite_storage)
+        with pytest.raises(ValueError):
+            sqlite_storage.add_response(survey.id, {})
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+        conn.close()
+
+    def test_durable_commit_is_fully_synchronous(self, sqlite_storage):
+        survey = self._published_survey(sqlite_storage)
+        answers = {
+            survey.questions[0].id: "Ann",
+            survey.questions[1].id: "Red",
+            survey.questions[2].id: 5,
+        }
+        statements = []
+        sqlite_storage._conn.set_trace_callback(statements.append)
+        sqlite_storage.add_response(survey.id, answers)
+        assert not any("synchronous" in sql for sql in statements)
+        sqlite_storage.add_responses(survey.id, [answers], durable=True)
+        assert statements.count("PRAGMA synchronous=FULL") == 1
+        sqlite_storage._conn.set_trace_callback(None)
+        mode = sqlite_storage._conn.execute("PRAGMA synchronous").fetchone()[0]
+        assert mode == 1  # NORMAL again
+
+    def test_missing_survey(self, sqlite_storage):
+        with pytest.raises(ValueError):
+            sqlite_storage.add_question_to_survey("missing", "text", "Q")
+        with pytest.raises(ValueError):
+            sqlite_storage.publish_survey("missing")
+        with pytest.raises(ValueError):
+            sqlite_storage.add_response("missing", {})
+
+    def test_parallel_submissions(self, sqlite_storage, db_path):
+        survey = sqlite_storage.create_survey("Busy")
+        question = sqlite_storage.add_question_to_survey(survey.id, "text", "Name")
+        sqlite_storage.publish_survey(survey.id)
+
+        def submit(worker):
+            for i in range(25):
+                sqlite_storage.add_response(survey.id, {question.id: f"{worker}-{i}"})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(submit, range(8)))
+        assert len(survey.responses) == 200
+        reopened = SQLiteStorage(db_path)
+        assert len(reopened.get_survey(survey.id).responses) == 200
+        reopened.close()
+
+    def test_bulk_insert(self, sqlite_storage, db_path):
+        survey = self._published_survey(sqlite_storage)
+        name, color, rate = survey.questions
+        results = sqlite_storage.add_responses(
+            survey.id,
+            [
+                {name.id: "Ann", color.id: "Red", rate.id: 3},
+                {name.id: "Bob", color.id: "Pink", rate.id: 3},
+            ],
+        )
+        assert "response_id" in results[0] and "error" in results[1]
+        assert sqlite_storage.add_responses(survey.id, [{}])[0]["error"]
+        with pytest.raises(ValueError):
+            sqlite_storage.add_responses("missing", [])
+        reopened = SQLiteStorage(db_path)
+        assert len(reopened.get_survey(survey.id).responses) == 1
+        reopened.close()
+
+    def test_paginated_listing(self, sqlite_storage):
+        surveys = [sqlite_storage.create_survey(f"S{i}") for i in range(5)]
+        sqlite_storage.add_question_to_survey(surveys[3].id, "text", "Q")
+        sqlite_storage.publish_survey(surveys[3].id)
+        page, cursor = sqlite_storage.list_surveys_page(limit=2)
+        assert [s.title for s in page] == ["S0", "S1"]
+        page, cursor = sqlite_storage.list_surveys_page(cursor=cursor, limit=2)
+        assert [s.title for s in page] == ["S2", "S3"]
+        page, cursor = sqlite_storage.list_surveys_page(cursor=cursor, limit=2)
+        assert [s.title for s in page] == ["S4"]
+        assert cursor is None
+        drafts, _ = sqlite_storage.list_surveys_page(status=SurveyStatus.DRAFT)
+        assert [s.title for s in drafts] == ["S0", "S1", "S2", "S4"]
+        with pytest.raises(ValueError):
+            sqlite_storage.list_surveys_page(cursor="???")
+
+    def test_summaries_page(self, sqlite_storage, db_path):
+        survey = self._published_survey(sqlite_storage)
+        name, color, rate = survey.questions
+        sqlite_storage.add_responses(
+            survey.id, [{name.id: "Ann", color.id: "Red", rate.id: 3}] * 3
+        )
+        sqlite_storage.create_survey("Draft")
+        reopened = SQLiteStorage(db_path)
+        fields = list(SURVEY_FIELDS[:-1])
+        summaries, cursor = reopened.list_survey_summaries_page(fields, limit=1)
+        assert summaries == [survey.to_dict(fields)]
+        assert reopened._cache == {}
+        drafts, _ = reopened.list_survey_summaries_page(
+            ["title", "response_count"], status=SurveyStatus.DRAFT
+        )
+        assert drafts == [{"title": "Draft", "response_count": 0}]
+        page, _ = reopened.list_survey_summaries_page(["title"], cursor=cursor)
+        assert page == [{"title": "Draft"}]
+        full, _ = reopened.list_survey_summaries_page(["questions"], limit=1)
+        assert len(full[0]["questions"]) == 3
+        with pytest.raises(ValueError):
+            reopened.list_survey_summaries_page(["secret"])
+        reopened.close()
+
+    def test_stats(self, sqlite_storage):
+        survey = self._published_survey(sqlite_storage)
+        name, color, rate = survey.questions
+        sqlite_storage.add_responses(
+            survey.id, [{name.id: "Ann", color.id: "Red", rate.id: 3}] * 3
+        )
+        sqlite_storage.create_survey("Draft")
+        stats = sqlite_storage.stats()
+        assert stats["surveys"] == 2 and stats["responses"] == 3
+        assert stats["bytes"] > 0
+
+
+@pytest.mark.integration
+class TestMultiProcess:
+    def test_processes_share_one_database(self, tmp_path):
+        db_path = str(tmp_path / "shared.db")
+        storage = SQLiteStorage(db_path)
+        survey = storage.create_survey("Shared")
+        question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+        storage.publish_survey(survey.id)
+        context = multiprocessing.get_context("spawn")
+        workers, count = 4, 50
+        barrier = context.Barrier(workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_hammer,
+                args=(db_path, survey.id, question.id, count, barrier, results),
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        seen = [results.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(timeout=60)
+            assert process.exitcode == 0
+        expected = workers * (count + 5 * 4)
+        # Every process sees every other process's responses, without reloading.
+        assert seen == [(expected, expected)] * workers
+        assert len(storage.get_survey(survey.id).responses) == expected
+        ids = [r["id"] for r in storage.get_survey(survey.id).responses]
+        assert len(set(ids)) == expected
+        storage.close()
+
+    def test_cached_survey_follows_other_connections(self, tmp_path):
+        db_path = str(tmp_path / "shared.db")
+        first = SQLiteStorage(db_path)
+        second = SQLiteStorage(db_path)
+        survey = first.create_survey("Shared")
+        assert second.get_survey(survey.id).questions == []
+        question = first.add_question_to_survey(survey.id, "text", "Name")
+        first.publish_survey(survey.id)
+        cached = second.get_survey(survey.id)
+        assert cached.status == SurveyStatus.PUBLISHED
+        assert [q.id for q in cached.questions] == [question.id]
+        second.add_response(survey.id, {question.id: "Ann"})
+        first.add_response(survey.id, {question.id: "Bob"})
+        assert [
+            r["answers"][question.id] for r in first.get_survey(survey.id).responses
+        ] == ["Ann", "Bob"]
+        assert [
+            r["answers"][question.id] for r in second.get_survey(survey.id).responses
+        ] == ["Ann", "Bob"]
+        first.delete_survey(survey.id)
+        assert second.get_survey(survey.id) is None
+        with pytest.raises(ValueError):
+            second.add_response(survey.id, {question.id: "Cy"})
+        first.close()
+        second.close()
@@ -1,9 +1,32 @@
 import pytest
+import hashlib
+import json
+import multiprocessing
 import os
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from src.storage import SurveyStorage
-from src.models import QuestionType
+from src import snapshot
+from src import storage as storage_module
+from src.storage import StorageError, SurveyStorage, convert_snapshot, encode_cursor
+from src.models import QuestionType, SurveyStatus
+
+
+def _try_open(path, results):
+    try:
+        SurveyStorage(storage_path=path).close()
+        results.put("opened")
+    except StorageError:
+        results.put("locked")
+
+
+def _use_inherited(storage, results):
+    try:
+        storage.create_survey("From a forked worker")
+        results.put("written")
+    except StorageError:
+        results.put("refused")
 
 
 class TestSurveyStorage:
@@ -13,8 +36,10 @@ class TestSurveyStorage:
         temp_file.close()
         storage = SurveyStorage(storage_path=temp_file.name)
         yield storage
-        if os.path.exists(temp_file.name):
-            os.unlink(temp_file.name)
+        for suffix in ("", ".sha256", ".index", ".lock"):
+            path = temp_file.name + suffix
+            if os.path.exists(path):
+                os.unlink(path)
 
     def test_create_survey(self, temp_storage):
         survey = temp_storage.create_survey("Test Survey", "Description")
@@ -87,3 +112,765 @@ class TestSurveyStorage:
         assert loaded_survey is not None
         assert loaded_survey.title == "Test Survey"
         assert len(loaded_survey.questions) == 2
+
+    def test_snapshot_is_compact(self, temp_storage):
+        survey = temp_storage.create_survey("Test Survey")
+        temp_storage.add_question_to_survey(
+            survey.id, "multiple_choice", "Color", options=["A", "B"]
+        )
+        with open(temp_storage.storage_path, "rb") as f:
+            payload = f.read()
+        assert b": " not in payload and b"\n  " not in payload
+        loaded = SurveyStorage(storage_path=temp_storage.storage_path)
+        question = loaded.get_survey(survey.id).questions[0]
+        assert question.options == ["A", "B"]
+
+
+class TestResponseJournal:
+    @pytest.fixture
+    def journal_storage(self, tmp_path):
+        storage = SurveyStorage(
+            storage_path=str(tmp_path / "surveys.json"), journal=True, compact_every=5
+        )
+        yield storage
+        storage.close()
+
+    def _published_survey(self, storage):
+        survey = storage.create_survey("Journaled")
+        question = storage.add_question_to_survey(survey.id, "scale", "Rate us")
+        storage.publish_survey(survey.id)
+        return survey, question
+
+    def test_response_is_appended_without_snapshot_rewrite(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        snapshot_mtime = os.stat(journal_storage.storage_path).st_mtime_ns
+        journal_storage.add_response(survey.id, {question.id: 3})
+        assert os.stat(journal_storage.storage_path).st_mtime_ns == snapshot_mtime
+        with open(journal_storage.journal_path) as f:
+            assert len(f.readlines()) == 1
+
+    def test_load_replays_journal(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        response_id = journal_storage.add_response(survey.id, {question.id: 4})
+        journal_storage.close()
+        reloaded = SurveyStorage(storage_path=journal_storage.storage_path)
+        loaded = reloaded.get_survey(survey.id)
+        assert [r["id"] for r in loaded.responses] == [response_id]
+
+    def test_compaction_moves_journal_into_snapshot(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        for value in range(1, 6):
+            journal_storage.add_response(survey.id, {question.id: value})
+        assert os.path.getsize(journal_storage.journal_path) == 0
+        reloaded = SurveyStorage(storage_path=journal_storage.storage_path)
+        assert len(reloaded.get_survey(survey.id).responses) == 5
+
+    def test_journal_is_utf8_whatever_the_locale(self, journal_storage):
+        survey = journal_storage.create_survey("Journaled")
+        question = journal_storage.add_question_to_survey(survey.id, "text", "Name")
+        journal_storage.publish_survey(survey.id)
+        journal_storage.add_response(survey.id, {question.id: "Zoë ✓"})
+        journal_storage.close()
+        with open(journal_storage.journal_path, "rb") as f:
+            line = f.read()
+        assert "Zoë ✓".encode("utf-8") in line
+        with open(journal_storage.journal_path, "ab") as f:
+            # A torn append ending inside a multi-byte character.
+            f.write(line[: line.index("✓".encode("utf-8")) + 1])
+        reloaded = SurveyStorage(storage_path=journal_storage.storage_path)
+        [response] = reloaded.get_survey(survey.id).responses
+        assert response["answers"][question.id] == "Zoë ✓"
+
+    def test_replay_skips_duplicates_and_torn_lines(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        journal_storage.add_response(survey.id, {question.id: 2})
+        journal_storage.close()
+        with open(journal_storage.journal_path) as f:
+            line = f.readline()
+        with open(journal_storage.journal_path, "a") as f:
+            f.write(line)
+            f.write('{"survey_id": "')
+        reloaded = SurveyStorage(storage_path=journal_storage.storage_path)
+        assert len(reloaded.get_survey(survey.id).responses) == 1
+        # The torn line is dropped, so later appends replay too.
+        reloaded.add_response(survey.id, {question.id: 3})
+        reloaded.close()
+        reloaded = SurveyStorage(storage_path=journal_storage.storage_path)
+        assert len(reloaded.get_survey(survey.id).responses) == 2
+        reloaded.close()
+
+    def test_corrupt_line_before_the_end_fails_loading(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        journal_storage.add_response(survey.id, {question.id: 2})
+        journal_storage.close()
+        with open(journal_storage.journal_path) as f:
+            line = f.readline()
+        with open(journal_storage.journal_path, "w") as f:
+            f.write('{"survey_id": "\n' + line)
+        with pytest.raises(StorageError, match="line 1"):
+            SurveyStorage(storage_path=journal_storage.storage_path)
+
+    def test_invalid_journaled_answer_fails_loading(self, journal_storage):
+        survey, question = self._published_survey(journal_storage)
+        journal_storage.close()
+        entry = {
+            "survey_id": survey.id,
+            "response": {"id": "r", "timestamp": "t", "answers": {question.id: 99}},
+        }
+        with open(journal_storage.journal_path, "w") as f:
+            f.write(json.dumps(entry) + "\n")
+        with pytest.raises(StorageError, match="Invalid stored answer"):
+            SurveyStorage(storage_path=journal_storage.storage_path)
+
+
+class TestConcurrentAccess:
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_parallel_submissions_and_saves(self, tmp_path, journal):
+        storage = SurveyStorage(
+            storage_path=str(tmp_path / "surveys.json"),
+            journal=journal,
+            compact_every=7,
+        )
+        surveys = []
+        for title in ("A", "B"):
+            survey = storage.create_survey(title)
+            question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+            storage.publish_survey(survey.id)
+            surveys.append((survey, question))
+
+        def submit(worker):
+            survey, question = surveys[worker % 2]
+            for value in range(1, 26):
+                storage.add_response(survey.id, {question.id: value % 5 + 1})
+            storage.create_survey(f"Extra {worker}")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(submit, range(8)))
+        storage.close()
+
+        for survey, _ in surveys:
+            assert len(survey.responses) == 100
+            assert survey.get_results()["response_count"] == 100
+        reloaded = SurveyStorage(storage_path=storage.storage_path)
+        assert len(reloaded.surveys) == 10
+        for survey, _ in surveys:
+            assert len(reloaded.get_survey(survey.id).responses) == 100
+
+
+class TestGroupCommit:
+    def _storage(self, tmp_path, **kwargs):
+        return SurveyStorage(
+            storage_path=str(tmp_path / "surveys.json"), journal=True, **kwargs
+        )
+
+    def test_mutations_are_batched(self, tmp_path, monkeypatch):
+        storage = self._storage(tmp_path, flush_interval_ms=60000)
+        saves = []
+        original_save = storage.save_to_file
+        monkeypatch.setattr(
+            storage, "save_to_file", lambda: saves.append(1) or original_save()
+        )
+        for i in range(20):
+            storage.create_survey(f"Survey {i}")
+        assert not os.path.exists(storage.storage_path)
+        storage.flush().result(timeout=5)
+        assert len(saves) == 1
+        assert len(SurveyStorage(storage_path=storage.storage_path).surveys) == 20
+        storage.close()
+
+    def test_durable_response_waits_for_flush(self, tmp_path):
+        storage = self._storage(tmp_path, flush_interval_ms=60000)
+        survey = storage.create_survey("Durable")
+        question = storage.add_question_to_survey(survey.id, "text", "Name")
+        storage.publish_survey(survey.id)
+        storage.flush().result(timeout=5)
+        storage.add_response(survey.id, {question.id: "Ann"}, durable=True)
+        with open(storage.journal_path) as f:
+            assert len(f.readlines()) == 1
+        storage.close()
+
+    def test_flushes_after_operation_threshold(self, tmp_path):
+        storage = self._storage(tmp_path, flush_interval_ms=60000, flush_every_ops=3)
+        for i in range(3):
+            storage.create_survey(f"Survey {i}")
+        deadline = time.monotonic() + 5
+        while not os.path.exists(storage.storage_path):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        storage.close()
+
+    def test_close_flushes_pending_changes(self, tmp_path):
+        storage = self._storage(tmp_path, flush_interval_ms=60000)
+        survey = storage.create_survey("Pending")
+        storage.close()
+        reloaded = SurveyStorage(storage_path=storage.storage_path)
+        assert reloaded.get_survey(survey.id) is not None
+
+    def test_flusher_survives_unexpected_errors(self, tmp_path, monkeypatch, caplog):
+        storage = self._storage(tmp_path, flush_interval_ms=60000)
+        storage.create_survey("Pending")
+        original = storage.save_to_file
+
+        def broken():
+            raise RuntimeError("unencodable")
+
+        monkeypatch.setattr(storage, "save_to_file", broken)
+        with pytest.raises(RuntimeError):
+            storage.flush().result(timeout=5)
+        monkeypatch.setattr(storage, "save_to_file", original)
+        storage.flush().result(timeout=5)
+        assert "Error flushing survey data" in caplog.text
+        assert os.path.exists(storage.storage_path)
+        storage.close()
+
+    def test_failing_flush_backs_off(self, tmp_path, monkeypatch):
+        storage = self._storage(tmp_path, flush_interval_ms=100, flush_every_ops=1)
+        survey = storage.create_survey("Backoff")
+        question = storage.add_question_to_survey(survey.id, "text", "Name")
+        storage.publish_survey(survey.id)
+        storage.flush().result(timeout=5)
+        attempts = []
+
+        def broken(lines, fsync=False):
+            attempts.append(time.monotonic())
+            raise OSError("disk full")
+
+        monkeypatch.setattr(storage, "_write_journal", broken)
+        storage.add_response(survey.id, {question.id: "Ann"})
+        time.sleep(0.5)
+        assert 1 <= len(attempts) <= 7
+        monkeypatch.undo()
+        storage.flush().result(timeout=5)
+        storage.close()
+
+    def test_durable_response_is_fsynced(self, tmp_path, monkeypatch):
+        storage = self._storage(tmp_path)
+        survey = storage.create_survey("Durable")
+        question = storage.add_question_to_survey(survey.id, "text", "Name")
+        storage.publish_survey(survey.id)
+        synced = []
+        monkeypatch.setattr(os, "fsync", synced.append)
+        storage.add_response(survey.id, {question.id: "Ann"})
+        assert synced == []
+        storage.add_response(survey.id, {question.id: "Bo"}, durable=True)
+        assert synced == [storage._journal_file.fileno()]
+        storage.close()
+
+    def test_synchronous_mode_flush_is_immediate(self, tmp_path):
+        storage = SurveyStorage(storage_path=str(tmp_path / "surveys.json"))
+        assert storage.flush().done()
+
+
+class TestSnapshotSafety:
+    @pytest.fixture
+    def path(self, tmp_path):
+        return str(tmp_path / "surveys.json")
+
+    def _survey_with_response(self, storage):
+        survey = storage.create_survey("Safe")
+        question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+        storage.publish_survey(survey.id)
+        storage.add_response(survey.id, {question.id: 4})
+        return survey
+
+    def test_failed_write_keeps_previous_snapshot(self, path, monkeypatch):
+        storage = SurveyStorage(storage_path=path)
+        survey = storage.create_survey("Kept")
+        with open(path, "rb") as f:
+            before = f.read()
+
+        def crash(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "replace", crash)
+        with pytest.raises(OSError):
+            storage.create_survey("Lost")
+        with open(path, "rb") as f:
+            assert f.read() == before
+        assert [p for p in os.listdir(os.path.dirname(path)) if ".tmp" in p] == []
+        monkeypatch.undo()
+        assert list(SurveyStorage(storage_path=path).surveys) == [survey.id]
+
+    def test_checksum_skips_response_validation(self, path, monkeypatch):
+        survey = self._survey_with_response(SurveyStorage(storage_path=path))
+        validated = []
+        monkeypatch.setattr(
+            SurveyStorage,
+            "_validate_stored_response",
+            lambda self, s, r: validated.append(r["id"]),
+        )
+        reloaded = SurveyStorage(storage_path=path)
+        assert len(reloaded.get_survey(survey.id).responses) == 1
+        assert validated == []
+
+    def test_checksum_mismatch_validates_responses(self, path):
+        survey = self._survey_with_response(SurveyStorage(storage_path=path))
+        with open(path) as f:
+            data = json.load(f)
+        question_id = data["surveys"][0]["questions"][0]["id"]
+        data["surveys"][0]["responses"][0]["answers"][question_id] = 99
+        with open(path, "w") as f:
+            json.dump(data, f)
+        with pytest.raises(StorageError):
+            SurveyStorage(storage_path=path)
+        data["surveys"][0]["responses"][0]["answers"][question_id] = 3
+        with open(path, "w") as f:
+            json.dump(data, f)
+        reloaded = SurveyStorage(storage_path=path)
+        assert reloaded.get_survey(survey.id).get_results()["questions"][0]["max"] == 3
+
+    def test_checksum_restores_questions_without_validation(self, path):
+        storage = SurveyStorage(storage_path=path)
+        survey = storage.create_survey("Trusted")
+        storage.add_question_to_survey(
+            survey.id, "multiple_choice", "Pick", options=["A", "B"]
+        )
+        storage.close()
+        with open(path) as f:
+            data = json.load(f)
+        # Not something the constructor accepts, so it loads only when trusted.
+        data["surveys"][0]["questions"][0]["options"] = ["A"]
+        payload = json.dumps(data).encode()
+        with open(path, "wb") as f:
+            f.write(payload)
+        with pytest.raises(StorageError):
+            SurveyStorage(storage_path=path)
+        with open(path + ".sha256", "w") as f:
+            f.write(hashlib.sha256(payload).hexdigest())
+        reloaded = SurveyStorage(storage_path=path)
+        question = reloaded.get_survey(survey.id).questions[0]
+        assert question.options == ["A"]
+        assert reloaded.get_survey(survey.id).created_at == survey.created_at
+
+    def test_corrupt_snapshot_raises_instead_of_starting_empty(self, path):
+        with open(path, "w") as f:
+            f.write('{"surveys": [')
+        with pytest.raises(StorageError):
+            SurveyStorage(storage_path=path)
+
+
+class TestFailedWrites:
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_failed_write_leaves_survey_unchanged(self, tmp_path, monkeypatch, journal):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path, journal=journal)
+        survey = storage.create_survey("Failing")
+        question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+        storage.publish_survey(survey.id)
+        storage.add_response(survey.id, {question.id: 1})
+
+        def full_disk(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(os, "replace", full_disk)
+        monkeypatch.setattr(os, "fsync", full_disk)
+        monkeypatch.setattr(storage, "_write_journal", full_disk)
+        with pytest.raises(OSError):
+            storage.add_response(survey.id, {question.id: 2})
+        with pytest.raises(OSError):
+            storage.add_responses(survey.id, [{question.id: 3}])
+        assert len(survey.responses) == 1
+        assert survey.get_results()["response_count"] == 1
+        monkeypatch.undo()
+        storage.close()
+        reloaded = SurveyStorage(storage_path=path)
+        assert len(reloaded.get_survey(survey.id).responses) == 1
+
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_unpaired_surrogate_answer(self, tmp_path, journal):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path, journal=journal)
+        survey = storage.create_survey("Surrogates")
+        question = storage.add_question_to_survey(survey.id, "text", "Name?")
+        storage.publish_survey(survey.id)
+        storage.add_response(survey.id, {question.id: "\ud800x"})
+        storage.save_to_file()
+        storage.close()
+        reloaded = SurveyStorage(storage_path=path)
+        [response] = reloaded.get_survey(survey.id).responses
+        assert response["answers"][question.id] == "\ud800x"
+
+
+class TestBulkIngestion:
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_batch_is_persisted_once(self, tmp_path, monkeypatch, journal):
+        storage = SurveyStorage(
+            storage_path=str(tmp_path / "surveys.json"), journal=journal
+        )
+        survey = storage.create_survey("Kiosk")
+        question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+        storage.publish_survey(survey.id)
+        writes = []
+        monkeypatch.setattr(
+            storage, "save_to_file", lambda *args: writes.append("save")
+        )
+        original_journal = storage._write_journal
+        monkeypatch.setattr(
+            storage,
+            "_write_journal",
+            lambda lines, fsync=False: writes.append(len(lines))
+            or original_journal(lines, fsync),
+        )
+        batch = [{question.id: value % 5 + 1} for value in range(200)]
+        batch.append({question.id: 42})
+        results = storage.add_responses(survey.id, batch)
+        assert len(results) == 201
+        assert "error" in results[-1]
+        assert writes == ([200] if journal else ["save"])
+        storage.close()
+        if journal:
+            reloaded = SurveyStorage(storage_path=storage.storage_path)
+            assert len(reloaded.get_survey(survey.id).responses) == 200
+
+    def test_bulk_for_missing_survey(self, tmp_path):
+        storage = SurveyStorage(storage_path=str(tmp_path / "surveys.json"))
+        with pytest.raises(ValueError):
+            storage.add_responses("missing", [])
+
+
+class TestPaginatedListing:
+    @pytest.fixture
+    def storage(self, tmp_path):
+        storage = SurveyStorage(storage_path=str(tmp_path / "surveys.json"))
+        yield storage
+        storage.close()
+
+    def _pages(self, storage, **kwargs):
+        pages, cursor = [], None
+        while True:
+            surveys, cursor = storage.list_surveys_page(cursor=cursor, **kwargs)
+            pages.append([s.title for s in surveys])
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_survey_once(self, storage):
+        for i in range(7):
+            storage.create_survey(f"S{i}")
+        pages = self._pages(storage, limit=3)
+        assert pages == [["S0", "S1", "S2"], ["S3", "S4", "S5"], ["S6"]]
+
+    def test_status_index_follows_publish_and_delete(self, storage):
+        surveys = [storage.create_survey(f"S{i}") for i in range(4)]
+        for survey in surveys[1:3]:
+            storage.add_question_to_survey(survey.id, "text", "Q")
+            storage.publish_survey(survey.id)
+        storage.delete_survey(surveys[2].id)
+        published = self._pages(storage, status=SurveyStatus.PUBLISHED, limit=10)
+        draft = self._pages(storage, status=SurveyStatus.DRAFT, limit=1)
+        assert published == [["S1"]]
+        assert draft == [["S0"], ["S3"]]
+        assert self._pages(storage, status=SurveyStatus.CLOSED) == [[]]
+
+    def test_index_survives_reload(self, storage):
+        for i in range(3):
+            storage.create_survey(f"S{i}")
+        reloaded = SurveyStorage(storage_path=storage.storage_path)
+        assert self._pages(reloaded, limit=2) == [["S0", "S1"], ["S2"]]
+
+    def test_cursor_is_stable_across_inserts(self, storage):
+        for i in range(3):
+            storage.create_survey(f"S{i}")
+        first, cursor = storage.list_surveys_page(limit=2)
+        storage.create_survey("S3")
+        rest, _ = storage.list_surveys_page(cursor=cursor, limit=10)
+        assert [s.title for s in rest] == ["S2", "S3"]
+
+    def test_malformed_cursor(self, storage):
+        with pytest.raises(ValueError):
+            storage.list_surveys_page(cursor="not-a-cursor")
+        with pytest.raises(ValueError):
+            storage.list_surveys_page(cursor=encode_cursor("yesterday", "x"))
+        aware = encode_cursor("2020-01-01T00:00:00+00:00", "x")
+        with pytest.raises(ValueError):
+            storage.list_surveys_page(cursor=aware)
+
+
+class TestLazyLoading:
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path)
+        for i in range(5):
+            survey = storage.create_survey(f"S{i}")
+            question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+            storage.publish_survey(survey.id)
+            storage.add_responses(survey.id, [{question.id: i % 5 + 1}] * (i + 1))
+        storage.close()
+        return path
+
+    def test_stats_without_loading(self, path):
+        storage = SurveyStorage(storage_path=path, lazy=True)
+        stats = storage.stats()
+        assert stats["surveys"] == 5 and stats["responses"] == 15
+        assert stats["bytes"] == sum(
+            os.path.getsize(path + suffix) for suffix in ("", ".index")
+        )
+        assert len(storage.surveys) == 0
+        survey = storage.create_survey("New")
+        question = storage.add_question_to_survey(survey.id, "text", "Q")
+        storage.publish_survey(survey.id)
+        storage.add_response(survey.id, {question.id: "A"})
+        assert storage.stats()["responses"] == 16
+        storage.close()
+
+    def test_startup_reads_only_the_index(self, path):
+        storage = SurveyStorage(storage_path=path, lazy=True)
+        assert len(storage.surveys) == 0
+        page, _ = storage.list_surveys_page(status=SurveyStatus.PUBLISHED, limit=2)
+        assert [s.title for s in page] == ["S0", "S1"]
+        assert len(storage.surveys) == 2
+        assert len(page[1].responses) == 2
+
+    def test_least_recently_used_surveys_are_evicted(self, path):
+        storage = SurveyStorage(storage_path=path, lazy=True, max_loaded=2)
+        surveys = storage.list_surveys()
+        assert [len(s.responses) for s in surveys] == [1, 2, 3, 4, 5]
+        assert list(storage.surveys) == [surveys[3].id, surveys[4].id]
+        storage.get_survey(surveys[3].id)
+        storage.get_survey(surveys[0].id)
+        assert list(storage.surveys) == [surveys[3].id, surveys[0].id]
+
+    def test_changed_surveys_stay_loaded_until_saved(self, path):
+        storage = SurveyStorage(
+            storage_path=path, lazy=True, max_loaded=1, journal=True
+        )
+        first = storage.list_surveys_page(limit=1)[0][0]
+        storage.add_response(first.id, {first.questions[0].id: 5})
+        for survey_id in list(storage._index):
+            storage.get_survey(survey_id)
+        assert first.id in storage.surveys
+        storage.close()
+        reopened = SurveyStorage(storage_path=path, lazy=True, max_loaded=1)
+        assert len(reopened.get_survey(first.id).responses) == 2
+        reopened.save_to_file()
+        assert len(reopened.surveys) == 1
+
+    def test_failed_save_keeps_changes_loaded(self, path, monkeypatch):
+        storage = SurveyStorage(
+            storage_path=path, lazy=True, max_loaded=1, journal=True
+        )
+        first, second = storage.list_surveys_page(limit=2)[0]
+        storage.add_response(first.id, {first.questions[0].id: 5})
+
+        def full_disk(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(storage_module, "write_snapshot", full_disk)
+        with pytest.raises(OSError):
+            storage.save_to_file()
+        monkeypatch.undo()
+        storage.get_survey(second.id)
+        assert len(storage.get_survey(first.id).responses) == 2
+        storage.save_to_file()
+        storage.close()
+        reopened = SurveyStorage(storage_path=path, lazy=True)
+        assert len(reopened.get_survey(first.id).responses) == 2
+
+    def test_stale_index_falls_back_to_full_load(self, path):
+        os.unlink(path + ".index")
+        storage = SurveyStorage(storage_path=path, lazy=True, max_loaded=2)
+        assert os.path.exists(path + ".index")
+        assert len(storage.surveys) == 2
+        assert len(storage.list_surveys()) == 5
+
+    def test_create_and_delete(self, path):
+        storage = SurveyStorage(storage_path=path, lazy=True, max_loaded=1)
+        doomed = storage.list_surveys_page(limit=1)[0][0].id
+        storage.get_survey(storage.list_surveys_page(limit=2)[0][1].id)
+        assert doomed not in storage.surveys
+        assert storage.delete_survey(doomed)
+        assert not storage.delete_survey(doomed)
+        storage.create_survey("New")
+        reopened = SurveyStorage(storage_path=path)
+        assert sorted(s.title for s in reopened.list_surveys()) == [
+            "New",
+            "S1",
+            "S2",
+            "S3",
+            "S4",
+        ]
+
+    @pytest.mark.parametrize("snapshot_format", ["json", "binary"])
+    def test_summaries_come_from_the_index(self, path, snapshot_format):
+        SurveyStorage(storage_path=path, snapshot_format=snapshot_format).close()
+        storage = SurveyStorage(storage_path=path, lazy=True, max_loaded=1)
+        fields = ["id", "title", "status", "question_count", "response_count"]
+        summaries, cursor = storage.list_survey_summaries_page(fields, limit=3)
+        assert [
+            (s["title"], s["status"], s["question_count"], s["response_count"])
+            for s in summaries
+        ] == [
+            ("S0", "published", 1, 1),
+            ("S1", "published", 1, 2),
+            ("S2", "published", 1, 3),
+        ]
+        assert len(storage.surveys) == 0
+        first = storage.get_survey(summaries[0]["id"])
+        assert summaries[0] == first.to_dict(fields)
+        rest, _ = storage.list_survey_summaries_page(["description"], cursor=cursor)
+        assert rest == [{"description": ""}] * 2
+        with pytest.raises(ValueError):
+            storage.list_survey_summaries_page(["secret"])
+        storage.close()
+
+    def test_unverified_chunk_is_validated(self, path):
+        with open(path + ".index") as f:
+            index = json.load(f)
+        index["surveys"][0]["sha256"] = "0" * 64
+        with open(path + ".index", "w") as f:
+            json.dump(index, f)
+        os.utime(path, ns=(0, index["snapshot"]["mtime_ns"]))
+        storage = SurveyStorage(storage_path=path, lazy=True)
+        assert len(storage.get_survey(index["surveys"][0]["id"]).responses) == 1
+
+
+class TestBinarySnapshot:
+    @pytest.fixture
+    def json_path(self, tmp_path):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path)
+        for i in range(4):
+            survey = storage.create_survey(f"S{i}")
+            question = storage.add_question_to_survey(survey.id, "scale", "Rate")
+            storage.publish_survey(survey.id)
+            storage.add_responses(survey.id, [{question.id: i + 1}] * (i + 1))
+        storage.close()
+        return path
+
+    def _summary(self, storage):
+        return [
+            (s.id, s.title, s.status, s.created_at, len(s.responses))
+            for s in storage.list_surveys()
+        ]
+
+    def test_format_setting_converts_at_next_save(self, json_path):
+        before = self._summary(SurveyStorage(storage_path=json_path))
+        storage = SurveyStorage(storage_path=json_path, snapshot_format="binary")
+        storage.create_survey("S4")
+        storage.close()
+        assert snapshot.detect_format(json_path) == "binary"
+        assert not os.path.exists(json_path + ".sha256")
+        reopened = SurveyStorage(storage_path=json_path)
+        assert self._summary(reopened)[:4] == before
+        assert reopened.list_surveys()[4].title == "S4"
+
+    def test_lazy_load_reads_only_the_directory(self, json_path, tmp_path):
+        path = str(tmp_path / "surveys.bin")
+        assert convert_snapshot(json_path, path, "binary") == 4
+        storage = SurveyStorage(
+            storage_path=path, lazy=True, max_loaded=2, snapshot_format="binary"
+        )
+        assert len(storage.surveys) == 0
+        assert storage.stats()["responses"] == 10
+        page, _ = storage.list_surveys_page(limit=3)
+        assert [len(s.responses) for s in page] == [1, 2, 3]
+        assert len(storage.surveys) == 2
+        survey = page[0]
+        storage.add_response(survey.id, {survey.questions[0].id: 5})
+        storage.close()
+        reopened = SurveyStorage(storage_path=path, lazy=True)
+        assert len(reopened.get_survey(survey.id).responses) == 2
+
+    def test_journal_is_replayed(self, json_path, tmp_path):
+        path = str(tmp_path / "surveys.bin")
+        convert_snapshot(json_path, path, "binary")
+        storage = SurveyStorage(
+            storage_path=path, journal=True, snapshot_format="binary"
+        )
+        survey = storage.list_surveys()[0]
+        storage.add_response(survey.id, {survey.questions[0].id: 5})
+        storage.close()
+        assert snapshot.detect_format(path) == "binary"
+        reopened = SurveyStorage(storage_path=path)
+        assert len(reopened.get_survey(survey.id).responses) == 2
+
+    def test_convert_round_trip(self, json_path, tmp_path):
+        binary_path = str(tmp_path / "surveys.bin")
+        back_path = str(tmp_path / "back.json")
+        convert_snapshot(json_path, binary_path, "binary")
+        convert_snapshot(binary_path, back_path, "json")
+        assert snapshot.detect_format(back_path) == "json"
+        with open(json_path) as f, open(back_path) as g:
+            assert json.load(f)["surveys"] == json.load(g)["surveys"]
+        assert os.path.exists(back_path + ".sha256")
+
+    def test_convert_validates_untrusted_json(self, json_path, tmp_path):
+        with open(json_path) as f:
+            data = json.load(f)
+        question_id = data["surveys"][0]["questions"][0]["id"]
+        data["surveys"][0]["responses"][0]["answers"][question_id] = 99
+        with open(json_path, "w") as f:
+            json.dump(data, f)
+        with pytest.raises(StorageError):
+            convert_snapshot(json_path, str(tmp_path / "surveys.bin"), "binary")
+
+    def test_tampered_record_is_validated(self, json_path, tmp_path):
+        path = str(tmp_path / "surveys.bin")
+        convert_snapshot(json_path, path, "binary")
+        with open(path, "rb") as f:
+            payload = f.read()
+        # Same length, so the directory still locates every record.
+        with open(path, "wb") as f:
+            f.write(payload.replace(b'"Rate"', b'"Rat3"', 1))
+        storage = SurveyStorage(storage_path=path)
+        assert storage.list_surveys()[0].questions[0].text == "Rat3"
+        with open(path, "wb") as f:
+            f.write(payload.replace(b'"answers":{', b'"answerz":{', 1))
+        with pytest.raises(StorageError):
+            SurveyStorage(storage_path=path)
+
+    def test_damaged_file_raises(self, json_path, tmp_path):
+        path = str(tmp_path / "surveys.bin")
+        convert_snapshot(json_path, path, "binary")
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 1)
+        with pytest.raises(StorageError):
+            SurveyStorage(storage_path=path)
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            SurveyStorage(storage_path=str(tmp_path / "s.json"), snapshot_format="xml")
+
+
+@pytest.mark.integration
+class TestProcessLock:
+    def _open_elsewhere(self, path):
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(target=_try_open, args=(path, results))
+        process.start()
+        outcome = results.get(timeout=60)
+        process.join(timeout=60)
+        return outcome
+
+    def test_second_process_is_refused(self, tmp_path):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path)
+        assert self._open_elsewhere(path) == "locked"
+        storage.close()
+        assert self._open_elsewhere(path) == "opened"
+
+    def test_storages_in_one_process_share_the_lock(self, tmp_path):
+        path = str(tmp_path / "surveys.json")
+        storage = SurveyStorage(storage_path=path)
+        second = SurveyStorage(storage_path=path)
+        second.close()
+        second.close()
+        assert self._open_elsewhere(path) == "locked"
+        storage.close()
+        assert self._open_elsewhere(path) == "opened"
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+    )
+    def test_forked_worker_is_refused(self, tmp_path):
+        storage = SurveyStorage(storage_path=str(tmp_path / "surveys.json"))
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        process = context.Process(target=_use_inherited, args=(storage, results))
+        process.start()
+        outcome = results.get(timeout=60)
+        process.join(timeout=60)
+        assert outcome == "refused"
+        storage.create_survey("In the owning process")
+        storage.close()